@@ -0,0 +1,11 @@
+# Copyright (c) 2026 Cisco Systems, Inc. and its affiliates
+# All rights reserved.
+
+"""Offline benchmarks for the finders.
+
+Each scenario replays canned HTTP responses (and, for Alpine, a synthetic
+aports tree) through a real finder, so that changes to the lookup hot
+paths can be measured without touching the network.  Run them with::
+
+    python -m soufi.benchmarks
+"""
@@ -0,0 +1,87 @@
+# Copyright (c) 2026 Cisco Systems, Inc. and its affiliates
+# All rights reserved.
+
+import argparse
+import json
+import multiprocessing
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from soufi.benchmarks import scenarios
+
+
+def _format_bytes(n):
+    for unit in ('B', 'KiB', 'MiB'):
+        if n < 1024:
+            return f"{n:.0f}{unit}"
+        n /= 1024
+    return f"{n:.1f}GiB"
+
+
+def _format_row(result):
+    hit_rate = result['cache_hit_rate']
+    return (
+        f"{result['scenario']:<20} "
+        f"{result['cold_seconds']:>9.3f} "
+        f"{result['warm_seconds']:>9.3f} "
+        f"{result['requests']:>9} "
+        f"{_format_bytes(result['bytes']):>9} "
+        f"{_format_bytes(result['peak_rss'] or 0):>9} "
+        f"{'-' if hit_rate is None else f'{hit_rate:.0%}':>6}"
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m soufi.benchmarks',
+        description="Run the offline finder benchmarks.",
+    )
+    parser.add_argument(
+        '-k',
+        dest='filter',
+        default='',
+        help="Only run scenarios whose name contains this string",
+    )
+    parser.add_argument(
+        '--scale',
+        type=float,
+        default=1.0,
+        help="Multiplier for the size of the generated fixtures",
+    )
+    parser.add_argument(
+        '--passes',
+        type=int,
+        default=2,
+        help="Number of times to run each scenario's lookups; every pass "
+        "after the first runs against a warm cache",
+    )
+    parser.add_argument(
+        '--json', action='store_true', help="Output results as JSON lines"
+    )
+    args = parser.parse_args(argv)
+
+    names = [name for name in scenarios.SCENARIOS if args.filter in name]
+    if not names:
+        parser.error(f"No scenarios match {args.filter!r}")
+
+    if not args.json:
+        print(
+            f"{'scenario':<20} {'cold (s)':>9} {'warm (s)':>9} "
+            f"{'requests':>9} {'bytes':>9} {'peak RSS':>9} {'hits':>6}"
+        )
+    # Run each scenario in a fresh process, so that its peak RSS is its own.
+    context = multiprocessing.get_context('spawn')
+    for name in names:
+        with ProcessPoolExecutor(1, mp_context=context) as pool:
+            result = pool.submit(
+                scenarios.run, name, args.scale, args.passes
+            ).result()
+        if args.json:
+            print(json.dumps(result))
+        else:
+            print(_format_row(result))
+        sys.stdout.flush()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,332 @@
+# Copyright (c) 2026 Cisco Systems, Inc. and its affiliates
+# All rights reserved.
+
+"""Generators for synthetic, but realistically shaped, index data.
+
+Everything here is deterministic, so that successive benchmark runs
+replay identical payloads.
+"""
+
+import datetime
+import gzip
+import hashlib
+import pathlib
+import textwrap
+from xml.sax.saxutils import escape
+
+DESCRIPTION = (
+    "A synthetic package used to exercise the lookup hot paths.  "
+    "It has a reasonably long description, as real packages do, so that "
+    "the payloads are roughly the size of the real thing."
+)
+
+
+def versions(n):
+    """Return `n` distinct, ascending, semver-ish version strings."""
+    return [f"{i // 100}.{i // 10 % 10}.{i % 10}" for i in range(n)]
+
+
+def timestamp(i):
+    """Return an ISO 8601 timestamp that increases with `i`."""
+    start = datetime.datetime(2015, 1, 1, tzinfo=datetime.timezone.utc)
+    return (start + datetime.timedelta(hours=i)).isoformat()
+
+
+def digest(*parts, algorithm='sha256'):
+    """Return a stable hex digest of `parts`."""
+    return hashlib.new(
+        algorithm, '/'.join(map(str, parts)).encode()
+    ).hexdigest()
+
+
+def npm_version(registry, name, version):
+    return {
+        'name': name,
+        'version': version,
+        'description': DESCRIPTION,
+        'license': 'MIT',
+        'dependencies': {f"dep-{j}": f"^{j}.0.0" for j in range(10)},
+        'dist': {
+            'tarball': f"{registry}{name}/-/{name}-{version}.tgz",
+            'shasum': digest(name, version, algorithm='sha1'),
+            'integrity': f"sha512-{digest(name, version, algorithm='sha512')}",
+        },
+    }
+
+
+def npm_packument(registry, name, all_versions):
+    times = {v: timestamp(i) for i, v in enumerate(all_versions)}
+    return {
+        'name': name,
+        'description': DESCRIPTION,
+        'dist-tags': {'latest': all_versions[-1]},
+        'versions': {v: npm_version(registry, name, v) for v in all_versions},
+        'time': {
+            'created': timestamp(0),
+            'modified': timestamp(len(all_versions)),
+            **times,
+        },
+    }
+
+
+def pypi_file(name, version, packagetype, i):
+    if packagetype == 'sdist':
+        filename = f"{name}-{version}.tar.gz"
+    else:
+        filename = f"{name}-{version}-py3-none-any.whl"
+    return {
+        'filename': filename,
+        'packagetype': packagetype,
+        'upload_time_iso_8601': timestamp(i),
+        'url': f"https://files.pythonhosted.org/packages/{filename}",
+        'digests': {'sha256': digest(filename)},
+        'size': 100_000,
+    }
+
+
+def pypi_release(name, version, i):
+    return [
+        pypi_file(name, version, 'bdist_wheel', i),
+        pypi_file(name, version, 'sdist', i),
+    ]
+
+
+def pypi_project(name, all_versions):
+    return {
+        'info': {'name': name, 'summary': DESCRIPTION},
+        'releases': {
+            v: pypi_release(name, v, i) for i, v in enumerate(all_versions)
+        },
+    }
+
+
+def rubygems_versions(all_versions):
+    return [
+        {
+            'number': v,
+            'created_at': timestamp(i),
+            'platform': 'ruby',
+            'summary': DESCRIPTION,
+            'sha': digest(v),
+        }
+        for i, v in enumerate(all_versions)
+    ]
+
+
+def crates_versions(name, all_versions):
+    return {
+        'versions': [
+            {
+                'num': v,
+                'crate': name,
+                'created_at': timestamp(i),
+                'yanked': i % 50 == 0,
+                'dl_path': f"/api/v1/crates/{name}/{v}/download",
+                'checksum': digest(name, v),
+                'features': {},
+            }
+            for i, v in enumerate(all_versions)
+        ]
+    }
+
+
+def packagist_versions(name, all_versions):
+    return {
+        'packages': {
+            name: [
+                {
+                    'name': name,
+                    'version': v,
+                    'version_normalized': f"{v}.0",
+                    'description': DESCRIPTION,
+                    'dist': {
+                        'type': 'zip',
+                        'url': f"https://api.github.com/repos/{name}/"
+                        f"zipball/{digest(name, v, algorithm='sha1')}",
+                    },
+                }
+                # Packagist lists the newest first
+                for v in reversed(all_versions)
+            ]
+        }
+    }
+
+
+def pecl_release(name, version):
+    return textwrap.dedent(
+        f"""\
+        <?xml version="1.0" encoding="UTF-8" ?>
+        <r xmlns="http://pear.php.net/dtd/rest.release"
+           xmlns:xlink="http://www.w3.org/1999/xlink">
+         <p xlink:href="/rest/p/{name}">{name}</p>
+         <c>pecl.php.net</c>
+         <v>{version}</v>
+         <st>stable</st>
+         <l>PHP License</l>
+         <s>{DESCRIPTION}</s>
+         <d>{DESCRIPTION}</d>
+         <da>{timestamp(0)}</da>
+         <g>https://pecl.php.net/get/{name}-{version}</g>
+        </r>
+        """
+    )
+
+
+def snapshot_binary(name, source, n):
+    """Return `n` snapshot.debian.org binary-version records."""
+    return {
+        '_comment': 'foo',
+        'binary': name,
+        'result': [
+            {
+                'binary_version': f"{v}-1",
+                'name': name,
+                'source': source,
+                'version': f"{v}-1",
+            }
+            for v in versions(n)
+        ],
+    }
+
+
+def rpm(name, version, release, arch, source=None):
+    """Return a tuple describing an RPM, for `primary_xml`."""
+    if source is None:
+        source = name
+    sourcerpm = (
+        '' if arch == 'src' else f"{source}-{version}-{release}.src.rpm"
+    )
+    return name, version, release, arch, sourcerpm
+
+
+def primary_xml(rpms):
+    """Return primary metadata (as bytes) for the given `rpm` tuples."""
+    parts = [
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<metadata xmlns="http://linux.duke.edu/metadata/common" '
+        'xmlns:rpm="http://linux.duke.edu/metadata/rpm" '
+        f'packages="{len(rpms)}">\n'
+    ]
+    for i, (name, version, release, arch, sourcerpm) in enumerate(rpms):
+        filename = f"{name}-{version}-{release}.{arch}.rpm"
+        parts.append(
+            f"""<package type="rpm">
+  <name>{escape(name)}</name>
+  <arch>{arch}</arch>
+  <version epoch="0" ver="{version}" rel="{release}"/>
+  <checksum type="sha256" pkgid="YES">{digest(filename)}</checksum>
+  <summary>{DESCRIPTION[:60]}</summary>
+  <description>{DESCRIPTION}</description>
+  <packager>Synthetic Packager</packager>
+  <url>https://example.com/{escape(name)}</url>
+  <time file="{1600000000 + i}" build="{1600000000 + i}"/>
+  <size package="100000" installed="300000" archive="300000"/>
+  <location href="Packages/{filename[0]}/{escape(filename)}"/>
+  <format>
+    <rpm:license>MIT</rpm:license>
+    <rpm:vendor>Synthetic</rpm:vendor>
+    <rpm:group>Unspecified</rpm:group>
+    <rpm:buildhost>builder.example.com</rpm:buildhost>
+    <rpm:sourcerpm>{escape(sourcerpm)}</rpm:sourcerpm>
+    <rpm:header-range start="4504" end="20000"/>
+    <rpm:provides>
+      <rpm:entry name="{escape(name)}" flags="EQ" epoch="0" ver="{version}" rel="{release}"/>
+      <rpm:entry name="{escape(name)}({arch})" flags="EQ" epoch="0" ver="{version}" rel="{release}"/>
+    </rpm:provides>
+    <rpm:requires>
+      <rpm:entry name="libc.so.6()(64bit)"/>
+      <rpm:entry name="rtld(GNU_HASH)"/>
+    </rpm:requires>
+  </format>
+</package>
+"""  # noqa: E501
+        )
+    parts.append('</metadata>\n')
+    return ''.join(parts).encode('utf-8')
+
+
+def repomd_xml(primary_href, checksum):
+    return textwrap.dedent(
+        f"""\
+        <?xml version="1.0" encoding="UTF-8"?>
+        <repomd xmlns="http://linux.duke.edu/metadata/repo"
+                xmlns:rpm="http://linux.duke.edu/metadata/rpm">
+          <revision>1600000000</revision>
+          <data type="primary">
+            <checksum type="sha256">{checksum}</checksum>
+            <open-checksum type="sha256">{checksum}</open-checksum>
+            <location href="{primary_href}"/>
+            <timestamp>1600000000</timestamp>
+          </data>
+        </repomd>
+        """
+    )
+
+
+def add_yum_repo(fixtures, url, rpms):
+    """Publish a Yum repo made of `rpms` at `url`."""
+    primary = gzip.compress(primary_xml(rpms), mtime=0)
+    checksum = digest(primary)
+    href = f"repodata/{checksum}-primary.xml.gz"
+    fixtures.add(f"{url}repodata/repomd.xml", repomd_xml(href, checksum))
+    fixtures.add(f"{url}{href}", primary)
+
+
+APKBUILD = """\
+# Contributor: Synthetic Packager <packager@example.com>
+pkgname={name}
+pkgver={version}
+pkgrel=0
+pkgdesc="{description}"
+url="https://example.com/{name}"
+arch="all"
+license="MIT"
+makedepends="autoconf automake"
+subpackages="$pkgname-dev $pkgname-doc {subpackages}"
+source="https://example.com/$pkgname-$pkgver.tar.gz
+\tfix-build.patch
+\t"
+
+build() {{
+\t./configure --prefix=/usr
+\tmake
+}}
+
+package() {{
+\tmake DESTDIR="$pkgdir" install
+}}
+
+sha512sums="
+{sha_source}  $pkgname-$pkgver.tar.gz
+{sha_patch}  fix-build.patch
+"
+"""
+
+
+def write_aports(root, n):
+    """Write a synthetic aports tree of `n` packages under `root`.
+
+    Packages are spread over the usual repos, and every package `pkgN`
+    has `pkgN-dev`, `pkgN-doc` and `pkgN-libs` subpackages.
+
+    :return: a list of (name, version) of the packages written.
+    """
+    packages = []
+    for i, version in enumerate(versions(n)):
+        repo = ('main', 'community', 'testing')[i % 3]
+        name = f"pkg{i}"
+        path = pathlib.Path(root, repo, name)
+        path.mkdir(parents=True)
+        (path / 'APKBUILD').write_text(
+            APKBUILD.format(
+                name=name,
+                version=version,
+                description=DESCRIPTION[:60],
+                subpackages=f"{name}-libs:libs",
+                sha_source=digest(name, version, algorithm='sha512'),
+                sha_patch=digest(name, 'patch', algorithm='sha512'),
+            )
+        )
+        (path / 'fix-build.patch').write_text(f"--- a/{name}\n+++ b/{name}\n")
+        packages.append((name, version))
+    return packages
@@ -0,0 +1,209 @@
+# Copyright (c) 2026 Cisco Systems, Inc. and its affiliates
+# All rights reserved.
+
+import http
+import io
+import json
+import tempfile
+import time
+
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+from soufi import finder
+
+try:
+    import resource
+except ImportError:  # pragma: no cover
+    resource = None
+
+
+class Fixtures:
+    """Canned HTTP responses, keyed by fully-qualified URL.
+
+    URLs are normalized the same way requests normalizes them before
+    sending, so query parameters may be given separately.  Anything that
+    is not found is answered with a 404.
+    """
+
+    def __init__(self):
+        self._responses = {}
+
+    @staticmethod
+    def _key(url, params=None):
+        return requests.Request('GET', url, params=params).prepare().url
+
+    def add(self, url, body=b'', status=200, headers=None, params=None):
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        self._responses[self._key(url, params)] = (
+            status,
+            dict(headers or {}),
+            body,
+        )
+
+    def add_json(self, url, data, **kwargs):
+        headers = {'Content-Type': 'application/json'}
+        self.add(url, json.dumps(data), headers=headers, **kwargs)
+
+    def get(self, url):
+        return self._responses.get(url, (404, {}, b''))
+
+    def __len__(self):
+        return len(self._responses)
+
+
+class Stats:
+    """Counters collected while running a scenario."""
+
+    def __init__(self):
+        self.requests = 0
+        self.bytes = 0
+        self.cache_lookups = 0
+        self.cache_misses = 0
+
+    @property
+    def cache_hit_rate(self):
+        if not self.cache_lookups:
+            return None
+        return 1 - self.cache_misses / self.cache_lookups
+
+
+class ReplayAdapter(BaseAdapter):
+    """A requests transport adapter that answers from `Fixtures`."""
+
+    def __init__(self, fixtures, stats):
+        super().__init__()
+        self.fixtures = fixtures
+        self.stats = stats
+
+    def send(self, request, stream=False, timeout=None, **kwargs):
+        status, headers, body = self.fixtures.get(request.url)
+        if request.method == 'HEAD':
+            body = b''
+        self.stats.requests += 1
+        self.stats.bytes += len(body)
+
+        response = requests.Response()
+        response.status_code = status
+        response.reason = http.HTTPStatus(status).phrase
+        response.headers = CaseInsensitiveDict(headers)
+        response.headers['Content-Length'] = str(len(body))
+        response.encoding = requests.utils.get_encoding_from_headers(
+            response.headers
+        )
+        response.raw = io.BytesIO(body)
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        return response
+
+    def close(self):
+        pass
+
+
+class Bench:
+    """The environment a scenario runs in.
+
+    While active (as a context manager), every session made by
+    `soufi.finder.make_session` answers from `fixtures`, and finders made
+    with `finder()` share an in-memory cache whose hit rate is recorded in
+    `stats`.
+
+    :param scale: multiplier for the size of generated fixtures.
+    """
+
+    def __init__(self, scale=1.0):
+        self.scale = scale
+        self.fixtures = Fixtures()
+        self.stats = Stats()
+        self.cache = {}
+        self._tempdir = None
+        self._make_session = None
+
+    def size(self, n):
+        """Scale `n` by the bench's scale factor."""
+        return max(1, int(n * self.scale))
+
+    @property
+    def tmpdir(self):
+        if self._tempdir is None:
+            self._tempdir = tempfile.TemporaryDirectory(prefix='soufi-bench-')
+        return self._tempdir.name
+
+    def make_session(self, *args, **kwargs):
+        session = requests.Session()
+        adapter = ReplayAdapter(self.fixtures, self.stats)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    def __enter__(self):
+        self._make_session = finder.make_session
+        finder.make_session = self.make_session
+        return self
+
+    def __exit__(self, *exc_info):
+        finder.make_session = self._make_session
+        if self._tempdir is not None:
+            self._tempdir.cleanup()
+
+    def finder(self, distro, name, version=None, s_type=None, **kwargs):
+        """Make a finder that uses the replayed fixtures and shared cache."""
+        if s_type is None:
+            s_type = finder.SourceType.os
+        kwargs.setdefault('cache_backend', 'dogpile.cache.memory')
+        kwargs.setdefault('cache_args', dict(cache_dict=self.cache))
+        kwargs.setdefault('session', self.make_session())
+        instance = finder.factory(distro, name, version, s_type, **kwargs)
+        self._count_cache(instance._cache)
+        return instance
+
+    def _count_cache(self, region):
+        get_or_create = region.get_or_create
+        stats = self.stats
+
+        def counting_get_or_create(key, creator, *args, **kwargs):
+            def counting_creator(*args, **kwargs):
+                stats.cache_misses += 1
+                return creator(*args, **kwargs)
+
+            stats.cache_lookups += 1
+            return get_or_create(key, counting_creator, *args, **kwargs)
+
+        region.get_or_create = counting_get_or_create
+
+
+def peak_rss():
+    """Return the peak resident set size of this process, in bytes."""
+    if resource is None:  # pragma: no cover
+        return None
+    self_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children_rss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    # Linux reports this in KiB
+    return max(self_rss, children_rss) * 1024
+
+
+def run_scenario(scenario, scale=1.0, passes=2):
+    """Run a scenario, returning a dict of its measurements.
+
+    The scenario's lookups are run `passes` times against the same cache;
+    the first pass is timed as "cold" and the rest as "warm".
+    """
+    with Bench(scale) as bench:
+        run = scenario(bench)
+        timings = []
+        for _ in range(passes):
+            start = time.perf_counter()
+            run()
+            timings.append(time.perf_counter() - start)
+        return {
+            'scenario': scenario.__name__,
+            'cold_seconds': timings[0],
+            'warm_seconds': sum(timings[1:]),
+            'requests': bench.stats.requests,
+            'bytes': bench.stats.bytes,
+            'peak_rss': peak_rss(),
+            'cache_hit_rate': bench.stats.cache_hit_rate,
+        }
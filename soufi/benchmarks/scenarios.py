@@ -0,0 +1,356 @@
+# Copyright (c) 2026 Cisco Systems, Inc. and its affiliates
+# All rights reserved.
+
+"""Benchmark scenarios.
+
+A scenario is a function taking a `harness.Bench`.  It sets up whatever
+fixtures it needs (untimed) and returns a callable that performs the
+lookups being measured.  Register new scenarios with `@scenario`.
+"""
+
+from soufi import finder
+from soufi.benchmarks import fixtures, harness
+from soufi.finders import (
+    crate,
+    debian,
+    gem,
+    golang,
+    java,
+    npm,
+    php_composer,
+    php_pecl,
+    python,
+)
+
+SCENARIOS = {}
+
+
+def scenario(func):
+    SCENARIOS[func.__name__] = func
+    return func
+
+
+def run(name, scale=1.0, passes=2):
+    """Run the scenario called `name`; see `harness.run_scenario`."""
+    return harness.run_scenario(SCENARIOS[name], scale, passes)
+
+
+def _lookups(versions, count=20):
+    """Pick `count` versions spread evenly over `versions`."""
+    step = max(1, len(versions) // count)
+    return versions[::step][:count]
+
+
+@scenario
+def npm_packuments(bench):
+    """Get release history and find against large npm packuments."""
+    names = [f"package-{i}" for i in range(bench.size(20))]
+    all_versions = fixtures.versions(bench.size(1000))
+    for name in names:
+        bench.fixtures.add_json(
+            f"{npm.NPM_REGISTRY}{name}",
+            fixtures.npm_packument(npm.NPM_REGISTRY, name, all_versions),
+        )
+        for version in all_versions:
+            bench.fixtures.add_json(
+                f"{npm.NPM_REGISTRY}{name}/{version}",
+                fixtures.npm_version(npm.NPM_REGISTRY, name, version),
+            )
+    source_finder = bench.finder('npm', None, s_type=finder.SourceType.npm)
+
+    def run():
+        for name in names:
+            source_finder.get_release_history(name)
+            for version in _lookups(all_versions):
+                source_finder.find(name, version)
+
+    return run
+
+
+@scenario
+def python_pypi(bench):
+    """Get release history and find against a PyPI-style JSON index."""
+    names = [f"package-{i}" for i in range(bench.size(20))]
+    all_versions = fixtures.versions(bench.size(500))
+    for name in names:
+        bench.fixtures.add_json(
+            f"{python.DEFAULT_INDEX}{name}/json",
+            fixtures.pypi_project(name, all_versions),
+        )
+        for i, version in enumerate(all_versions):
+            bench.fixtures.add_json(
+                f"{python.DEFAULT_INDEX}{name}/{version}/json",
+                {'urls': fixtures.pypi_release(name, version, i)},
+            )
+    source_finder = bench.finder(
+        'python', None, s_type=finder.SourceType.python
+    )
+
+    def run():
+        for name in names:
+            source_finder.get_release_history(name)
+            for version in _lookups(all_versions):
+                source_finder.find(name, version)
+
+    return run
+
+
+@scenario
+def gem_versions(bench):
+    """Get release history and find against the RubyGems API."""
+    names = [f"gem-{i}" for i in range(bench.size(20))]
+    all_versions = fixtures.versions(bench.size(500))
+    for name in names:
+        bench.fixtures.add_json(
+            f"{gem.GEM_VERSIONS_URL}{name}.json",
+            fixtures.rubygems_versions(all_versions),
+        )
+        for version in all_versions:
+            bench.fixtures.add(f"{gem.GEM_DOWNLOADS}{name}-{version}.gem")
+    source_finder = bench.finder('gem', None, s_type=finder.SourceType.gem)
+
+    def run():
+        for name in names:
+            source_finder.get_release_history(name)
+            for version in _lookups(all_versions):
+                source_finder.find(name, version)
+
+    return run
+
+
+@scenario
+def crate_versions(bench):
+    """Get release history and find against the crates.io index and API."""
+    dl = 'https://static.crates.io/crates'
+    bench.fixtures.add_json(f"{crate.DEFAULT_INDEX}config.json", {'dl': dl})
+    names = [f"crate-{i}" for i in range(bench.size(20))]
+    all_versions = fixtures.versions(bench.size(500))
+    for name in names:
+        bench.fixtures.add_json(
+            f"{crate.CRATES_API}{name}/versions",
+            fixtures.crates_versions(name, all_versions),
+        )
+        for version in all_versions:
+            bench.fixtures.add(f"{dl}/{name}/{name}-{version}.crate")
+    source_finder = bench.finder('crate', None, s_type=finder.SourceType.crate)
+
+    def run():
+        for name in names:
+            source_finder.get_release_history(name)
+            for version in _lookups(all_versions):
+                source_finder.find(name, version)
+
+    return run
+
+
+@scenario
+def go_proxy(bench):
+    """Get release history and find against a Go module proxy."""
+    names = [f"github.com/example/module-{i}" for i in range(bench.size(20))]
+    all_versions = [f"v{v}" for v in fixtures.versions(bench.size(500))]
+    proxy = golang.PUBLIC_PROXY
+    for name in names:
+        bench.fixtures.add(f"{proxy}{name}/@v/list", '\n'.join(all_versions))
+        bench.fixtures.add_json(
+            f"{proxy}{name}/@latest",
+            {'Version': all_versions[-1], 'Time': fixtures.timestamp(0)},
+        )
+        for version in all_versions:
+            bench.fixtures.add(f"{proxy}{name}/@v/{version}.zip")
+    source_finder = bench.finder('go', None, s_type=finder.SourceType.go)
+
+    def run():
+        for name in names:
+            source_finder.get_release_history(name)
+            for version in _lookups(all_versions):
+                source_finder.find(name, version)
+
+    return run
+
+
+@scenario
+def java_maven(bench):
+    """Find against Maven Central search and remote content."""
+    names = [f"artifact-{i}" for i in range(bench.size(50))]
+    all_versions = fixtures.versions(bench.size(100))
+    for name in names:
+        for version in _lookups(all_versions):
+            bench.fixtures.add_json(
+                java.MAVEN_SEARCH_URL,
+                {'response': {'docs': [{'g': 'org.example', 'a': name}]}},
+                params=dict(q=f'a:{name} v:{version} l:sources', rows=1),
+            )
+            bench.fixtures.add(
+                java.MAVEN_REPO_URL,
+                params=dict(
+                    filepath=f"org/example/{name}/{version}/"
+                    f"{name}-{version}-sources.jar"
+                ),
+            )
+    source_finder = bench.finder('java', None, s_type=finder.SourceType.java)
+
+    def run():
+        for name in names:
+            for version in _lookups(all_versions):
+                source_finder.find(name, version)
+
+    return run
+
+
+@scenario
+def php_packagist(bench):
+    """Find against Packagist version listings."""
+    names = [f"vendor/package-{i}" for i in range(bench.size(20))]
+    all_versions = fixtures.versions(bench.size(500))
+    for name in names:
+        bench.fixtures.add_json(
+            f"{php_composer.DEFAULT_INDEX}p2/{name}.json",
+            fixtures.packagist_versions(name, all_versions),
+        )
+    source_finder = bench.finder(
+        'phpcomposer', None, s_type=finder.SourceType.phpcomposer
+    )
+
+    def run():
+        for name in names:
+            for version in _lookups(all_versions):
+                source_finder.find(name, version)
+
+    return run
+
+
+@scenario
+def php_pecl_releases(bench):
+    """Find against the PECL REST API."""
+    names = [f"extension{i}" for i in range(bench.size(50))]
+    all_versions = fixtures.versions(bench.size(100))
+    for name in names:
+        for version in _lookups(all_versions):
+            bench.fixtures.add(
+                f"{php_pecl.DEFAULT_INDEX}rest/r/{name}/{version}.xml",
+                fixtures.pecl_release(name, version),
+            )
+    source_finder = bench.finder(
+        'phppecl', None, s_type=finder.SourceType.phppecl
+    )
+
+    def run():
+        for name in names:
+            for version in _lookups(all_versions):
+                source_finder.find(name, version)
+
+    return run
+
+
+@scenario
+def debian_snapshot(bench):
+    """Find against snapshot.debian.org, with many source files each."""
+    api = debian.SNAPSHOT_API
+    names = [f"binary{i}" for i in range(bench.size(20))]
+    history = bench.size(500)
+    srcfiles = 5
+    for name in names:
+        source = f"source-{name}"
+        bench.fixtures.add_json(
+            f"{api}mr/binary/{name}/",
+            fixtures.snapshot_binary(name, source, history),
+        )
+        for version in fixtures.versions(history):
+            hashes = [
+                fixtures.digest(source, version, j, algorithm='sha1')
+                for j in range(srcfiles)
+            ]
+            bench.fixtures.add_json(
+                f"{api}mr/package/{source}/{version}-1/srcfiles",
+                {'result': [{'hash': h} for h in hashes]},
+            )
+            for j, h in enumerate(hashes):
+                bench.fixtures.add_json(
+                    f"{api}mr/file/{h}/info",
+                    {'result': [{'name': f"{source}_{version}-{j}.tar.xz"}]},
+                )
+    source_finder = bench.finder('debian', None)
+
+    def run():
+        for name in names:
+            for version in _lookups(fixtures.versions(history)):
+                source_finder.find(name, f"{version}-1")
+
+    return run
+
+
+YUM_BASEURL = 'https://yum.example.com/'
+
+
+@scenario
+def yum_primary(bench):
+    """Find against Yum repos with large primary metadata.
+
+    Binary packages are named differently to their sources, and the
+    looked-up sources live in the last repo, so every lookup walks the
+    whole repo list.
+    """
+    packages = bench.size(20000)
+    source_repos = [f"{YUM_BASEURL}source/{i}/" for i in range(3)]
+    binary_repos = [f"{YUM_BASEURL}os/{i}/" for i in range(3)]
+    for i, (source_repo, binary_repo) in enumerate(
+        zip(source_repos, binary_repos)
+    ):
+        sources, binaries = [], []
+        for j, version in enumerate(fixtures.versions(packages)):
+            source = f"src{i}-{j}"
+            sources.append(fixtures.rpm(source, version, '1.el9', 'src'))
+            for sub in ('', '-libs', '-devel'):
+                binaries.append(
+                    fixtures.rpm(
+                        f"bin{i}-{j}{sub}",
+                        version,
+                        '1.el9',
+                        'x86_64',
+                        source=source,
+                    )
+                )
+        fixtures.add_yum_repo(bench.fixtures, source_repo, sources)
+        fixtures.add_yum_repo(bench.fixtures, binary_repo, binaries)
+
+    last = len(source_repos) - 1
+    lookups = [
+        (j, version)
+        for j, version in enumerate(fixtures.versions(packages))
+        if j % max(1, packages // 20) == 0
+    ]
+    for j, version in lookups:
+        filename = f"src{last}-{j}-{version}-1.el9.src.rpm"
+        bench.fixtures.add(
+            f"{source_repos[last]}Packages/{filename[0]}/{filename}"
+        )
+    source_finder = bench.finder(
+        'rhel',
+        None,
+        source_repos=source_repos,
+        binary_repos=binary_repos,
+        isolate_repomd=False,
+    )
+
+    def run():
+        for j, version in lookups:
+            source_finder.find(f"bin{last}-{j}-libs", f"{version}-1.el9")
+
+    return run
+
+
+@scenario
+def alpine_aports(bench):
+    """Find, including by subpackage, in a synthetic aports tree."""
+    packages = fixtures.write_aports(bench.tmpdir, bench.size(500))
+    # Subpackage lookups evaluate APKBUILDs until they find a match, so
+    # they are slow enough that a few go a long way.
+    lookups = _lookups(packages, count=5)
+    source_finder = bench.finder('alpine', None, aports_dir=bench.tmpdir)
+
+    def run():
+        for name, version in lookups:
+            source_finder.find(name, f"{version}-r0")
+            source_finder.find(f"{name}-libs", f"{version}-r0")
+
+    return run
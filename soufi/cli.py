@@ -6,11 +6,11 @@
 import functools
 import json
 import os
-import shutil
 import sys
 import warnings
 
 from soufi import exceptions, finder, history_cli
+from soufi.download_cache import DownloadCache
 
 try:
     import click
@@ -251,12 +251,46 @@ class DefaultFindGroup(click.Group):
         return super().resolve_command(ctx, args)
 
 
+def compression_from_file_name(fname):
+    """Return the name of the compression matching fname's extension."""
+    for compression in finder.Compression:
+        if fname.endswith(f".tar{compression.value}"):
+            return compression.name
+    if fname.endswith(".tgz"):
+        return finder.Compression.gzip.name
+    return None
+
+
+def configure_compression(
+    disc_src, compression, threads, recompress=True, fname=None
+):
+    """Set how disc_src compresses archives.
+
+    If no compression is given, it is chosen by fname's extension, if any.
+    """
+    if compression is None and fname is not None:
+        compression = compression_from_file_name(fname)
+    if compression is not None:
+        disc_src.compression = finder.Compression[compression]
+    disc_src.compression_threads = threads
+    disc_src.recompress = recompress
+
+
+def configure_download_cache(disc_src, path, max_size_mib=None):
+    """Set the download cache disc_src uses, if path is given."""
+    if path is None:
+        return
+    max_size = None if max_size_mib is None else max_size_mib * 1024 * 1024
+    disc_src.download_cache = DownloadCache(path, max_size=max_size)
+
+
 def make_archive_from_discovery_source(disc_src, fname):
     try:
-        with disc_src.make_archive() as in_fd, open(fname, "wb") as out_fd:
-            # copyfileobj copies in chunks, so as not to exhaust memory.
-            shutil.copyfileobj(in_fd, out_fd)
+        with open(fname, "wb") as out_fd:
+            disc_src.write_archive(out_fd)
     except exceptions.DownloadError as e:
+        # Don't leave a partial archive behind.
+        os.remove(fname)
         click.echo(str(e))
         click.get_current_context().exit(255)
 
@@ -278,9 +312,10 @@ def main():
 )
 @click.option(
     "--aports",
-    default=None,
-    help="Path to a checked-out aports directory if getting Alpine",
-    show_default=True,
+    default=(),
+    multiple=True,
+    help="Path to a checked-out aports directory if getting Alpine. "
+    "May be repeated to search several release branches, in order.",
 )
 @click.option(
     "--repo",
@@ -325,9 +360,48 @@ def main():
     help="Download the source archive and write to a default file name."
     "The names vary according to the source type and the archive type, "
     "but will generally follow the format: "
-    "{name}-{version}.{distro/type}.tar.[gz|xz] "
+    "{name}-{version}.{distro/type}.tar[.gz|.xz|.zst] "
     "(This option takes precedence over -o/--output)",
 )
+@click.option(
+    "--compression",
+    type=click.Choice([c.name for c in finder.Compression]),
+    default=None,
+    help="Compression for archives made from the source files. "
+    "Defaults to one matching the -o/--output file name's extension, "
+    "or xz.",
+)
+@click.option(
+    "--compression-threads",
+    type=click.IntRange(0),
+    default=1,
+    help="Number of threads to compress xz or zstd archives with, "
+    "or 0 for one per CPU.",
+    show_default=True,
+)
+@click.option(
+    "--recompress/--no-recompress",
+    default=True,
+    help="Whether to compress archives of source files that are already "
+    "compressed, such as .orig.tar.gz files.  With --no-recompress, "
+    "those archives are left uncompressed, which is much faster for "
+    "little difference in size.",
+    show_default=True,
+)
+@click.option(
+    "--download-cache",
+    default=None,
+    type=click.Path(file_okay=False),
+    help="Directory of a cache of downloaded source files, so that files "
+    "already downloaded for an earlier archive are not downloaded again.",
+)
+@click.option(
+    "--download-cache-size",
+    type=click.IntRange(1),
+    default=None,
+    help="Maximum size of the --download-cache in MiB; the least recently "
+    "used files are evicted to stay within it.  Defaults to no limit.",
+)
 @click.option(
     "--timeout",
     type=click.IntRange(1),
@@ -347,6 +421,11 @@ def find(
     auto_output,
     source_repo,
     binary_repo,
+    compression,
+    compression_threads,
+    recompress,
+    download_cache,
+    download_cache_size,
     timeout,
 ):
     """Find and optionally download source files.
@@ -355,9 +434,11 @@ def find(
     source file(s).
 
     If the --output option is present, the URLs are all downloaded and
-    combined into a LZMA-compressed tar file and written to the file
-    name specifed.  If the original source is already an archive then that
-    archive is used instead.
+    combined into a tar file and written to the file name specifed.  The
+    tar file is compressed according to --compression, or else the file
+    name's extension (.tar, .tar.gz, .tar.xz or .tar.zst), defaulting to
+    xz.  If the original source is already an archive then that archive is
+    used instead.
 
     The sources currently supported are 'debian', 'ubuntu', 'rhel', 'centos',
     'alpine', 'photon', 'java', 'go', 'python', 'create', 'phppecl',
@@ -377,14 +458,14 @@ def find(
     except AttributeError:
         click.echo(f"{distro} not available")
         click.get_current_context().exit(255)
-    if distro == "alpine" and aports is None:
+    if distro == "alpine" and not aports:
         click.echo("Must provide --aports for Alpine")
         click.get_current_context().exit(255)
     try:
         if distro == "python":
             disc_source = func(pyindex=pyindex)
         elif distro == "alpine":
-            disc_source = func(aports_dir=aports)
+            disc_source = func(aports_dir=list(aports))
         elif distro == "centos":
             disc_source = func(
                 repos=repo, source_repos=source_repo, binary_repos=binary_repo
@@ -402,6 +483,16 @@ def find(
         click.get_current_context().exit(255)
 
     if auto_output is not False or output is not None:
+        configure_compression(
+            disc_source,
+            compression,
+            compression_threads,
+            recompress,
+            None if auto_output else output,
+        )
+        configure_download_cache(
+            disc_source, download_cache, download_cache_size
+        )
         fname = output
         if auto_output:
             name = name.replace(os.sep, ".")
@@ -0,0 +1,220 @@
+# Copyright (c) 2026 Cisco Systems, Inc. and its affiliates
+# All rights reserved.
+
+"""A content-addressed, on-disk cache of downloaded source files."""
+
+import hashlib
+import os
+import pathlib
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from typing import List, Mapping, Optional
+
+# Seconds to wait for another process's lock on the cache's database.
+DB_TIMEOUT = 30
+CHUNK_SIZE = 1024 * 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    sha256 TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS blobs_last_used ON blobs (last_used);
+CREATE TABLE IF NOT EXISTS keys (
+    key TEXT PRIMARY KEY,
+    sha256 TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS keys_sha256 ON keys (sha256);
+"""
+
+
+class DownloadCache:
+    """A size-bounded, content-addressed store of downloaded files.
+
+    Each file is stored once, named by the SHA-256 digest of its contents,
+    and may be found by the URL it was downloaded from or by any digest of
+    its contents that was known when it was added.  Digests are checked
+    before they are recorded, so a file found by digest is always the
+    right one; a URL is assumed to always serve the same file, as is the
+    case for released source artifacts.
+
+    :param path: The directory to keep the cache in.  It is made if it
+        does not exist.
+    :param max_size: The maximum total size of the cached files, in bytes.
+        The least recently used files are evicted to stay within it.
+        Defaults to no limit.
+
+    The cache is safe to share between threads and between processes.
+    """
+
+    def __init__(self, path, max_size: int = None):
+        self.path = pathlib.Path(path)
+        self.max_size = max_size
+        self._blobs = self.path / 'blobs'
+        self._blobs.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            str(self.path / 'index.sqlite'),
+            timeout=DB_TIMEOUT,
+            check_same_thread=False,
+        )
+        with self._lock, self._conn:
+            self._conn.executescript(_SCHEMA)
+
+    @staticmethod
+    def keys(url: str = None, digests: Mapping[str, str] = None) -> List[str]:
+        """Return the keys to look up a file by, in order of preference.
+
+        :param url: The URL the file is downloaded from.
+        :param digests: A mapping of `hashlib` algorithm names to the
+            known hex digests of the file.
+        """
+        keys = [
+            f"{algorithm}:{digest.lower()}"
+            for algorithm, digest in (digests or {}).items()
+        ]
+        if url is not None:
+            keys.append(f"url:{url}")
+        return keys
+
+    def _blob(self, sha256):
+        return self._blobs / sha256[:2] / sha256
+
+    def get(
+        self, url: str = None, digests: Mapping[str, str] = None
+    ) -> Optional[pathlib.Path]:
+        """Return the path of a cached file, or None if it is not cached.
+
+        The file is found by any of its known `digests` in preference to
+        its `url`, and is marked as recently used.  The returned file must
+        not be modified.
+        """
+        with self._lock, self._conn as conn:
+            for key in self.keys(url, digests):
+                row = conn.execute(
+                    'SELECT sha256 FROM keys WHERE key = ?', (key,)
+                ).fetchone()
+                if row is None:
+                    continue
+                [sha256] = row
+                blob = self._blob(sha256)
+                if not blob.exists():
+                    # Evicted by another process.
+                    self._forget(conn, sha256)
+                    continue
+                conn.execute(
+                    'UPDATE blobs SET last_used = ? WHERE sha256 = ?',
+                    (time.time(), sha256),
+                )
+                return blob
+        return None
+
+    def copy(
+        self, target: str, url: str = None, digests: Mapping[str, str] = None
+    ) -> bool:
+        """Copy a cached file to `target`, if it is cached.
+
+        The file is hard-linked rather than copied where possible, so
+        `target` must not be modified either.
+
+        :return: True if the file was cached and copied.
+        """
+        blob = self.get(url, digests)
+        if blob is None:
+            return False
+        try:
+            _link_or_copy(blob, target)
+        except FileNotFoundError:
+            # Evicted by another process since it was found.
+            return False
+        return True
+
+    def add(
+        self, path: str, url: str = None, digests: Mapping[str, str] = None
+    ) -> str:
+        """Add a file to the cache, to be found by its URL and digests.
+
+        Any of the `digests` that do not match the file's contents, or whose
+        algorithms `hashlib` does not provide, are not recorded.  The file
+        is also always found by its SHA-256 digest.  It is hard-linked into
+        the cache where possible, so must not be modified afterwards.
+
+        :return: The SHA-256 hex digest of the file.
+        """
+        digests = {
+            algorithm: digest.lower()
+            for algorithm, digest in (digests or {}).items()
+            if algorithm in hashlib.algorithms_available
+        }
+        hashes = {
+            algorithm: hashlib.new(algorithm)
+            for algorithm in {'sha256', *digests}
+        }
+        size = 0
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+                size += len(chunk)
+                for file_hash in hashes.values():
+                    file_hash.update(chunk)
+        sha256 = hashes['sha256'].hexdigest()
+        verified = {
+            algorithm: digest
+            for algorithm, digest in digests.items()
+            if hashes[algorithm].hexdigest() == digest
+        }
+        verified['sha256'] = sha256
+
+        blob = self._blob(sha256)
+        if not blob.exists():
+            blob.parent.mkdir(exist_ok=True)
+            # Put the file in place atomically, so that other processes
+            # never see a partial one.
+            tmp_name = blob.with_name(f".{sha256}.{uuid.uuid4().hex}")
+            _link_or_copy(path, tmp_name)
+            os.replace(tmp_name, blob)
+
+        with self._lock, self._conn as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO blobs VALUES (?, ?, ?)',
+                (sha256, size, time.time()),
+            )
+            conn.executemany(
+                'INSERT OR REPLACE INTO keys VALUES (?, ?)',
+                ((key, sha256) for key in self.keys(url, verified)),
+            )
+            self._evict(conn, sha256)
+        return sha256
+
+    def _evict(self, conn, keep):
+        if self.max_size is None:
+            return
+        [total] = conn.execute('SELECT TOTAL(size) FROM blobs').fetchone()
+        rows = conn.execute(
+            'SELECT sha256, size FROM blobs WHERE sha256 != ? '
+            'ORDER BY last_used',
+            (keep,),
+        ).fetchall()
+        for sha256, size in rows:
+            if total <= self.max_size:
+                break
+            self._forget(conn, sha256)
+            self._blob(sha256).unlink(missing_ok=True)
+            total -= size
+
+    def _forget(self, conn, sha256):
+        conn.execute('DELETE FROM keys WHERE sha256 = ?', (sha256,))
+        conn.execute('DELETE FROM blobs WHERE sha256 = ?', (sha256,))
+
+
+def _link_or_copy(source, target):
+    try:
+        os.link(source, target)
+    except FileNotFoundError:
+        raise
+    except OSError:
+        # Probably on different filesystems.
+        shutil.copyfile(source, target)
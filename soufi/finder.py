@@ -2,31 +2,81 @@
 # All rights reserved.
 
 import abc
+import asyncio
 import contextlib
+import copy
 import enum
+import functools
+import gzip
+import hashlib
 import importlib
+import lzma
+import os
 import pathlib
 import pkgutil
+import shutil
+import subprocess
 import tarfile
 import tempfile
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 from inspect import isclass
 from typing import (
     Any,
+    Awaitable,
     BinaryIO,
     Callable,
     ContextManager,
     Iterable,
+    Iterator,
+    List,
     Mapping,
+    Tuple,
     Union,
 )
-from urllib.parse import urlencode
+from urllib.parse import urlencode, urlsplit
 
 import requests
+import urllib3
 from dogpile.cache import make_region
+from dogpile.cache.api import NO_VALUE
+from requests.adapters import HTTPAdapter, Retry
 
 from soufi import exceptions
+from soufi.download_cache import DownloadCache
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover
+    httpx = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
 
 DEFAULT_TIMEOUT = 30  # seconds
+DEFAULT_POOL_SIZE = 10  # connections kept alive per host
+DEFAULT_MAX_CONNECTIONS = 100  # concurrent connections per async client
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF_FACTOR = 0.5  # seconds
+# Transient server-side failures worth retrying; anything else is returned
+# to the caller as-is.
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+DEFAULT_MAX_WORKERS = 8  # concurrent lookups in FinderFactory.find_many
+DEFAULT_DOWNLOAD_WORKERS = 8  # concurrent downloads per archive
+DEFAULT_DOWNLOADS_PER_HOST = 4  # ... of which to any one host
+DEFAULT_DOWNLOAD_RETRIES = 3  # resumptions of an interrupted download
+DEFAULT_SEGMENT_SIZE = 64 * 1024 * 1024  # minimum bytes per ranged segment
+CHUNK_SIZE = 1024 * 1024  # bytes read at a time when hashing a file
+
+# Errors that interrupt a download, after which it may be resumed.
+_INTERRUPTED_DOWNLOAD_ERRORS = (
+    requests.exceptions.ChunkedEncodingError,
+    requests.exceptions.ConnectionError,
+    requests.exceptions.Timeout,
+)
 
 
 @enum.unique
@@ -54,16 +104,346 @@ class Distro(enum.Enum):
     almalinux = "almalinux"
 
 
+# File name extensions of files that are already compressed.
+COMPRESSED_EXTENSIONS = (
+    '.7z',
+    '.bz2',
+    '.gz',
+    '.jar',
+    '.lz',
+    '.lzma',
+    '.tbz',
+    '.tbz2',
+    '.tgz',
+    '.txz',
+    '.xz',
+    '.zip',
+    '.zst',
+)
+
+
+@enum.unique
+class Compression(enum.Enum):
+    """Compression methods for archives made by `DiscoveredSource`.
+
+    The values are the file name extensions of the compressed archives.
+    """
+
+    none = ""
+    gzip = ".gz"
+    xz = ".xz"
+    zstd = ".zst"
+
+
+def make_session(
+    pool_size: int = DEFAULT_POOL_SIZE,
+    retries: int = DEFAULT_RETRIES,
+    backoff_factor: float = DEFAULT_BACKOFF_FACTOR,
+) -> requests.Session:
+    """Make a connection-pooling HTTP session.
+
+    The session keeps up to `pool_size` connections alive per host, so
+    that repeated lookups against the same index do not pay for a new
+    TCP+TLS handshake each time.  Idempotent requests that fail with a
+    connection error or a transient server-side status are retried
+    `retries` times with an exponential backoff of `backoff_factor`.
+
+    :param pool_size: Number of connections to keep alive per host.
+    :param retries: Number of times to retry failed requests.
+    :param backoff_factor: Backoff factor between retries, in seconds.
+    """
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset(('HEAD', 'GET')),
+        # Hand the final response back rather than raising, as the finders
+        # inspect the status codes themselves.
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry
+    )
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def make_async_client(
+    pool_size: int = DEFAULT_POOL_SIZE,
+    max_connections: int = DEFAULT_MAX_CONNECTIONS,
+    retries: int = DEFAULT_RETRIES,
+    timeout: int = DEFAULT_TIMEOUT,
+) -> 'httpx.AsyncClient':
+    """Make a connection-pooling asynchronous HTTP client.
+
+    The asynchronous counterpart to `make_session`, used by the `afind()`
+    family of methods on finders.  Requires the optional `httpx`
+    dependency, which is installed with `soufi[async]`.
+
+    Note that, unlike sessions, only connection failures are retried.
+
+    :param pool_size: Number of idle connections to keep alive.
+    :param max_connections: Maximum number of concurrent connections.
+    :param retries: Number of times to retry failed connections.
+    :param timeout: Default timeout for requests, in seconds.
+    """
+    if httpx is None:
+        raise RuntimeError(
+            "Async support not installed; please install soufi[async]"
+        )
+    transport = httpx.AsyncHTTPTransport(
+        retries=retries,
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=pool_size,
+        ),
+    )
+    return httpx.AsyncClient(
+        transport=transport, timeout=timeout, follow_redirects=True
+    )
+
+
+@contextlib.contextmanager
+def open_compressor(
+    fileobj: BinaryIO,
+    compression: Compression,
+    level: int = None,
+    threads: int = 1,
+) -> ContextManager[BinaryIO]:
+    """Make a context manager to a stream that compresses into `fileobj`.
+
+    Everything written to the yielded stream is compressed and written to
+    `fileobj` as it goes, and the compressed stream is finished when the
+    context manager exits.  `fileobj` itself is left open.
+
+    :param compression: A `Compression` method.
+    :param level: The compression level, or xz preset; the compressor's
+        own default if None.
+    :param threads: The number of threads to compress with, or 0 for one
+        per CPU.  Only used for xz, which then requires the `xz` command,
+        and zstd.
+    """
+    if compression is Compression.none:
+        yield fileobj
+    elif compression is Compression.gzip:
+        kwargs = {} if level is None else dict(compresslevel=level)
+        # Leave the name and time out of the header, so that archives of
+        # the same files are identical.
+        with gzip.GzipFile(
+            filename='', fileobj=fileobj, mode='wb', mtime=0, **kwargs
+        ) as stream:
+            yield stream
+    elif compression is Compression.xz and threads == 1:
+        with lzma.LZMAFile(fileobj, mode='wb', preset=level) as stream:
+            yield stream
+    elif compression is Compression.xz:
+        with _xz_command(fileobj, level, threads) as stream:
+            yield stream
+    else:
+        if zstandard is None:
+            raise RuntimeError(
+                "zstd support not installed; please install soufi[zstd]"
+            )
+        # zstandard counts *extra* worker threads, with -1 for one per CPU.
+        compressor = zstandard.ZstdCompressor(
+            level=3 if level is None else level,
+            threads=-1 if threads == 0 else threads - 1,
+        )
+        with compressor.stream_writer(fileobj, closefd=False) as stream:
+            yield stream
+
+
+@contextlib.contextmanager
+def _xz_command(fileobj, level, threads):
+    # The lzma module cannot compress with multiple threads, so pipe
+    # through the xz command instead.
+    command = ['xz', '--compress', '--stdout', f'--threads={threads}']
+    if level is not None:
+        command.append(f'-{level}')
+    try:
+        process = subprocess.Popen(  # noqa: S603
+            command, stdin=subprocess.PIPE, stdout=subprocess.PIPE
+        )
+    except OSError as e:
+        raise RuntimeError(
+            f"Multi-threaded xz compression requires the xz command: {e}"
+        )
+    pump = threading.Thread(
+        target=shutil.copyfileobj, args=(process.stdout, fileobj)
+    )
+    pump.start()
+    try:
+        yield process.stdin
+    finally:
+        process.stdin.close()
+        pump.join()
+        process.stdout.close()
+        process.wait()
+    if process.returncode:
+        raise subprocess.CalledProcessError(process.returncode, command)
+
+
+def _range_support(response):
+    """Return the length and validator of a response's ranges.
+
+    If the response's URL cannot be downloaded in ranges, both are None.
+    """
+    headers = response.headers
+    if headers.get('Accept-Ranges') != 'bytes':
+        return None, None
+    # Ranges are of the encoded content, but iter_content decodes it.
+    if headers.get('Content-Encoding', 'identity') != 'identity':
+        return None, None
+    try:
+        length = int(headers['Content-Length'])
+    except (KeyError, ValueError):
+        return None, None
+    etag = headers.get('ETag')
+    if etag is not None and etag.startswith('W/'):
+        # Servers must ignore weak validators in If-Range, and would send
+        # the whole file instead of each range.
+        etag = None
+        if 'Last-Modified' not in headers:
+            return None, None
+    return length, etag or headers.get('Last-Modified')
+
+
+def _check_digests(hashes, digests, name):
+    """Raise a DownloadError if any of `hashes` do not match `digests`."""
+    for algorithm, digest in digests.items():
+        actual = hashes[algorithm].hexdigest()
+        if actual != digest.lower():
+            raise exceptions.DownloadError(
+                f"{algorithm} digest of downloaded file {name} does not "
+                f"match: {actual} != {digest}"
+            )
+
+
+class _VerifyingReader:
+    """A file-like wrapper around a raw HTTP response body.
+
+    It checks the digests of what is read through it: a DownloadError is
+    raised by the read that reaches the end of the file if its contents do
+    not match `digests`.  Errors reading the response are also raised as
+    DownloadError.
+    """
+
+    def __init__(self, fileobj, digests, name):
+        self._fileobj = fileobj
+        self._digests = digests
+        self._name = name
+        self._hashes = {
+            algorithm: hashlib.new(algorithm) for algorithm in digests
+        }
+        self._checked = False
+
+    def read(self, size=-1):
+        if size == 0:
+            return b''
+        try:
+            data = self._fileobj.read(size)
+        except (urllib3.exceptions.HTTPError, OSError) as e:
+            raise exceptions.DownloadError(
+                f"Failed to download {self._name}: {e}"
+            )
+        for file_hash in self._hashes.values():
+            file_hash.update(data)
+        if not self._checked and (not data or size is None or size < 0):
+            self._checked = True
+            _check_digests(self._hashes, self._digests, self._name)
+        return data
+
+    def __getattr__(self, name):
+        return getattr(self._fileobj, name)
+
+
 class DiscoveredSource(metaclass=abc.ABCMeta):
     """Base class for all objects implementing a discovered source."""
 
-    # The default 'make_archive' produces .tar.xz files. Override as
-    # necessary if make_archive is also overridden.
-    archive_extension = '.tar.xz'
+    # How the default 'make_archive' compresses its tar archives; see
+    # `open_compressor`.  Set these on an instance before making an
+    # archive to change them.
+    compression = Compression.xz
+    compression_level = None
+    compression_threads = 1
+    # If False, archives containing already-compressed files are not
+    # compressed again; see `archive_compression`.
+    recompress = True
+    _archive_extension = None
+
+    @property
+    def archive_extension(self):
+        """The file name extension of the archive made by `make_archive`.
+
+        This follows `archive_compression`, unless it has been set.
+        Derived classes that override `make_archive` should override or
+        set this too.
+        """
+        if self._archive_extension is not None:
+            return self._archive_extension
+        return '.tar' + self.archive_compression.value
+
+    @archive_extension.setter
+    def archive_extension(self, value):
+        self._archive_extension = value
+
+    @property
+    def archive_compression(self) -> Compression:
+        """The compression used by `make_archive`.
+
+        This is `compression`, unless `recompress` is False and any of the
+        `member_names` is that of an already-compressed file.  Such files
+        are usually the bulk of a source, and compressing them again costs
+        a lot of CPU for almost no gain, so the archive is left
+        uncompressed instead.
+        """
+        if not self.recompress and any(
+            name.lower().endswith(COMPRESSED_EXTENSIONS)
+            for name in self.member_names()
+        ):
+            return Compression.none
+        return self.compression
+
+    def member_names(self) -> List[str]:
+        """Return the names of the files that `make_archive` will archive.
+
+        By default, these are the last segments of the URL paths.  Derived
+        classes that name their files differently should override this.
+        """
+        return [url.rsplit('/', 1)[-1] for url in self.urls]
+
+    # Limits on concurrent downloads in `download_files`.
+    max_download_workers = DEFAULT_DOWNLOAD_WORKERS
+    max_downloads_per_host = DEFAULT_DOWNLOADS_PER_HOST
+
+    # Times `download_file` retries an interrupted download, resuming it
+    # where the server supports range requests, with an exponential
+    # backoff of `download_backoff_factor` seconds.  If `download_segments`
+    # is more than one, large files are downloaded in up to that many
+    # ranged segments at once, each of at least `download_segment_size`
+    # bytes.
+    download_retries = DEFAULT_DOWNLOAD_RETRIES
+    download_backoff_factor = DEFAULT_BACKOFF_FACTOR
+    download_segments = 1
+    download_segment_size = DEFAULT_SEGMENT_SIZE
+
+    # A `DownloadCache` to look for files in before downloading them.  The
+    # finder's, if it has one, is set on the sources it discovers.
+    download_cache: DownloadCache = None
 
-    def __init__(self, urls: Iterable[str], timeout: int = DEFAULT_TIMEOUT):
+    def __init__(
+        self,
+        urls: Iterable[str],
+        timeout: int = DEFAULT_TIMEOUT,
+        session: requests.Session = None,
+    ):
         self._urls = urls
         self.timeout = timeout
+        # Finders pass in their own session so that downloads share its
+        # connection pool.
+        self.session = session if session is not None else make_session()
 
     @property
     def urls(self):
@@ -82,19 +462,50 @@ class DiscoveredSource(metaclass=abc.ABCMeta):
         # The temp dir is cleaned up once the context manager exits.
         with tempfile.TemporaryDirectory() as target_dir:
             tarfile_fd, tarfile_name = tempfile.mkstemp(dir=target_dir)
-            with tarfile.open(name=tarfile_name, mode='w:xz') as tar:
-                self.populate_archive(target_dir, tar)
+            with open(tarfile_fd, 'wb') as fd:
+                self._write_tar(target_dir, fd)
             with open(tarfile_name, 'rb') as fd:
                 yield fd
 
+    def write_archive(self, fileobj: BinaryIO):
+        """Write a tar archive of all the source URLs to a file object.
+
+        Unlike `make_archive`, the archive is streamed into `fileobj` as it
+        is made, rather than being written to a temporary file that the
+        caller then copies, so `fileobj` need not be seekable.
+
+        If `make_archive` is overridden (for example, by
+        `remote_url_is_archive`), whatever it yields is copied instead.
+        """
+        if type(self).make_archive is not DiscoveredSource.make_archive:
+            with self.make_archive() as fd:
+                # copyfileobj copies in chunks, so as not to exhaust memory.
+                shutil.copyfileobj(fd, fileobj)
+            return
+        with tempfile.TemporaryDirectory() as target_dir:
+            self._write_tar(target_dir, fileobj)
+
+    def _write_tar(self, target_dir, fileobj):
+        with open_compressor(
+            fileobj,
+            self.archive_compression,
+            self.compression_level,
+            self.compression_threads,
+        ) as stream:
+            with tarfile.open(fileobj=stream, mode='w|') as tar:
+                self.populate_archive(target_dir, tar)
+
     @contextlib.contextmanager
     def remote_url_is_archive(self) -> ContextManager[BinaryIO]:
         """Replace make_archive when remote URL is already an archive.
 
         In the case where the URL found for the source is already an archive,
         derived classes can replace the make_archive function with this one
-        instead, and it will simply download the remote archive and
-        yield its file instead of making a new archive.
+        instead, and it will yield the remote archive instead of making a
+        new archive.  The archive is downloaded to a temporary file first,
+        so that an interrupted download can be resumed, unless
+        `download_retries` is 0, in which case its body is yielded as it
+        is downloaded.
 
         The derived class should do something such as::
 
@@ -106,14 +517,20 @@ class DiscoveredSource(metaclass=abc.ABCMeta):
 
         and define `populate_archive` as a no-op.
         """
-        with tempfile.TemporaryDirectory() as target_dir:
-            [url] = self.urls
-            _, download_file_name = url.rsplit('/', 1)
-            tarfile_name = self.download_file(
-                target_dir, download_file_name, url
-            )
-            with open(tarfile_name, 'rb') as fd:
-                yield fd
+        [url] = self.urls
+        [name] = self.member_names()
+        if self.download_cache is not None or self.download_retries:
+            with tempfile.TemporaryDirectory() as target_dir:
+                [tarfile_name] = self.download_files(target_dir, [(name, url)])
+                with open(tarfile_name, 'rb') as fd:
+                    yield fd
+            return
+        digests = self.known_digests(name, url)
+        with self.open_url(url) as response:
+            # Undo any Content-Encoding, as iter_content does for
+            # download_file.
+            response.raw.decode_content = True
+            yield _VerifyingReader(response.raw, digests, name)
 
     @abc.abstractmethod
     def populate_archive(self, temp_dir: str, tar: tarfile.TarFile):
@@ -132,6 +549,7 @@ class DiscoveredSource(metaclass=abc.ABCMeta):
         target_dir: str,
         target_name: str,
         url: str,
+        digests: Mapping[str, str] = None,
     ) -> pathlib.Path:
         """Download a file from a URL and place it in a directory.
 
@@ -144,21 +562,232 @@ class DiscoveredSource(metaclass=abc.ABCMeta):
 
         Raises a DownloadError upon problems retrieving the remote file.
 
+        Interrupted downloads are retried up to `download_retries` times,
+        carrying on from where they left off if the server supports range
+        requests, or from the start if not.  See also `download_segments`.
+
+        The file is checked against `digests`, a dict mapping `hashlib`
+        algorithm names to hex digests, which defaults to `known_digests`.
+        It is hashed as it is downloaded, so that it need not be read
+        again, and is removed if it does not match.
+
         NOTE: No decoding is performed on the file, it is saved as raw.
         """
+        if digests is None:
+            digests = self.known_digests(target_name, url)
+        hashes = {algorithm: hashlib.new(algorithm) for algorithm in digests}
         tmp_file_name = pathlib.Path(target_dir) / target_name
-        with requests.get(url, stream=True, timeout=self.timeout) as response:
+        try:
+            self._download_to(tmp_file_name, url, hashes)
+            _check_digests(hashes, digests, target_name)
+        except exceptions.DownloadError:
+            tmp_file_name.unlink(missing_ok=True)
+            raise
+        return tmp_file_name
+
+    def _download_to(self, tmp_file_name, url, hashes):
+        with self.open_url(url) as response:
+            length, validator = _range_support(response)
+            segments = self._segments(length)
+            if len(segments) == 1:
+                with open(tmp_file_name, 'wb') as f:
+                    self._write_range(
+                        f.fileno(), url, 0, length, validator, response, hashes
+                    )
+                return
+        # The first response is abandoned in favour of the segments.
+        with open(tmp_file_name, 'wb') as f:
+            f.truncate(length)
+            with ThreadPoolExecutor(max_workers=len(segments)) as executor:
+                futures = [
+                    executor.submit(
+                        self._write_range, f.fileno(), url, *segment, validator
+                    )
+                    for segment in segments
+                ]
+            for future in futures:
+                future.result()
+        if hashes:
+            # The segments arrive out of order, so can only be hashed once
+            # they are all written.
+            with open(tmp_file_name, 'rb') as f:
+                for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+                    for file_hash in hashes.values():
+                        file_hash.update(chunk)
+
+    def _segments(self, length):
+        """Return the (start, end) byte ranges to download a file in."""
+        if not length or self.download_segments <= 1:
+            return [(0, length)]
+        count = min(
+            self.download_segments, -(-length // self.download_segment_size)
+        )
+        size = -(-length // count)
+        return [
+            (start, min(start + size, length))
+            for start in range(0, length, size)
+        ]
+
+    def _write_range(
+        self, fd, url, start, end, validator, response=None, hashes=None
+    ):
+        """Download bytes `start` to `end` of `url` into `fd`.
+
+        If `end` is None, the rest of the file is downloaded and cannot be
+        resumed.  `response` may be an already-open response to continue.
+        The bytes are also fed to the `hashes` dict of `hashlib` objects.
+        """
+        if hashes is None:
+            hashes = {}
+        position = start
+        for attempt in range(self.download_retries + 1):
+            if attempt:
+                # Back off as the session's Retry does.
+                time.sleep(self.download_backoff_factor * 2 ** (attempt - 1))
+            try:
+                if response is None:
+                    response = self._open_range(url, position, end, validator)
+                with response:
+                    # Setting chunk_size to None reads whatever size the
+                    # chunk is as data chunks arrive. This avoids reading
+                    # the whole file into memory.
+                    for chunk in response.iter_content(chunk_size=None):
+                        os.pwrite(fd, chunk, position)
+                        position += len(chunk)
+                        for file_hash in hashes.values():
+                            file_hash.update(chunk)
+                if end is None or position >= end:
+                    return
+                error = "connection closed early"
+            except _INTERRUPTED_DOWNLOAD_ERRORS as e:
+                error = e
+            response = None
+            if end is None:
+                # Without range support, the download must start again.
+                position = start
+                os.ftruncate(fd, start)
+                for algorithm in hashes:
+                    hashes[algorithm] = hashlib.new(algorithm)
+        raise exceptions.DownloadError(f"Failed to download {url}: {error}")
+
+    def _open_range(self, url, start, end, validator):
+        headers = {}
+        if end is not None:
+            headers['Range'] = f"bytes={start}-{end - 1}"
+            if validator is not None:
+                # Get the whole file instead if it has changed.
+                headers['If-Range'] = validator
+        response = self.session.get(
+            url, stream=True, timeout=self.timeout, headers=headers
+        )
+        try:
+            response.raise_for_status()
+        except requests.exceptions.HTTPError as e:
+            response.close()
+            raise exceptions.DownloadError(e)
+        if end is not None and response.status_code != requests.codes.partial:
+            response.close()
+            raise exceptions.DownloadError(
+                f"Cannot resume downloading {url}; it may have changed"
+            )
+        return response
+
+    @contextlib.contextmanager
+    def open_url(self, url: str) -> ContextManager[requests.Response]:
+        """Make a context manager to a streamed HTTP response from a URL.
+
+        The response body has not been read when it is yielded, so may be
+        consumed incrementally with `iter_content` or `raw`.
+
+        Raises a DownloadError upon problems retrieving the remote file.
+        """
+        with self.session.get(
+            url, stream=True, timeout=self.timeout
+        ) as response:
             try:
                 response.raise_for_status()
             except requests.exceptions.HTTPError as e:
                 raise exceptions.DownloadError(e)
-            with open(tmp_file_name, 'wb') as f:
-                # Setting chunk_size to None reads whatever size the
-                # chunk is as data chunks arrive. This avoids reading
-                # the whole file into memory.
-                for chunk in response.iter_content(chunk_size=None):
-                    f.write(chunk)
-        return tmp_file_name
+            yield response
+
+    def download_files(
+        self,
+        target_dir: str,
+        files: Iterable[Tuple[str, str]],
+        download: Callable[[str, str, str], pathlib.Path] = None,
+    ) -> List[pathlib.Path]:
+        """Download several files concurrently.
+
+        Up to `max_download_workers` files are downloaded at once, but no
+        more than `max_downloads_per_host` from any one host.
+
+        May be called by derived classes to help retrieve files.
+
+        :param files: An iterable of (target_name, url) tuples.
+        :param download: The function to download each file with, taking
+            the same arguments as, and defaulting to, `download_file`.
+        :return: A list of the Path objects of the downloaded files, in the
+            same order as `files`, so that archives can be populated in a
+            deterministic order.
+        :raises: The error raised by the first file (in order) that failed
+            to download, once all the downloads have finished.
+        """
+        if download is None:
+            download = self.download_file
+        if self.download_cache is not None:
+            download = functools.partial(self._download_cached, download)
+        files = list(files)
+        workers = min(self.max_download_workers, len(files))
+        if workers <= 1:
+            return [download(target_dir, name, url) for name, url in files]
+
+        hosts = {
+            urlsplit(url).netloc: threading.BoundedSemaphore(
+                self.max_downloads_per_host
+            )
+            for _, url in files
+        }
+
+        def download_one(name, url):
+            with hosts[urlsplit(url).netloc]:
+                return download(target_dir, name, url)
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(download_one, name, url) for name, url in files
+            ]
+        return [future.result() for future in futures]
+
+    def _download_cached(self, download, target_dir, target_name, url):
+        # Local files are not cached, as they may change at any time.
+        if urlsplit(url).scheme in ('', 'file'):
+            return download(target_dir, target_name, url)
+        digests = self.known_digests(target_name, url)
+        target = pathlib.Path(target_dir) / target_name
+        # A file with known digests is only found by them, as whatever is
+        # cached for its URL may no longer match.
+        found = (
+            self.download_cache.copy(target, digests=digests)
+            if digests
+            else self.download_cache.copy(target, url=url)
+        )
+        if found:
+            return target
+        target = download(target_dir, target_name, url)
+        self.download_cache.add(target, url=url, digests=digests)
+        return target
+
+    def known_digests(self, target_name: str, url: str) -> Mapping[str, str]:
+        """Return the known digests of a file before it is downloaded.
+
+        Used to verify the file as it is downloaded, and to find it in the
+        `download_cache` even if it was downloaded from a different URL.
+        Derived classes that know their files' digests should override
+        this.
+
+        :return: A dict mapping `hashlib` algorithm names to hex digests.
+        """
+        return {}
 
     def reset_tarinfo(self, tarinfo: tarfile.TarInfo) -> tarfile.TarInfo:
         """Filter to reset TarInfo fields to remove user details.
@@ -183,12 +812,25 @@ class SourceFinder(metaclass=abc.ABCMeta):
         Default: `dogpile.cache.null`, or no caching.
     :param cache_args: An iterable of arguments to use when initializing the
         cache.
+    :param session: A `requests.Session` used for all HTTP requests made by
+        the finder and the sources it discovers.  Finders made by the
+        `FinderFactory` share the factory's session; otherwise a new
+        pooled session is made (see `make_session`).
+    :param async_client: An `httpx.AsyncClient` used for all HTTP requests
+        made by the asynchronous API (`afind()`, `aget_release_history()`,
+        etc.)  Share one between finders to share its connection pool.  If
+        not specified, one is made on first use (see `make_async_client`).
+    :param download_cache: A `DownloadCache` for the sources the finder
+        discovers to look for their files in before downloading them.
 
     These options may be left unspecified if required and the call to
     `find()` should then specify any that were not passed to `__init__`.
     """
 
     timeout = DEFAULT_TIMEOUT
+    # Set to False in finders whose lookups must not run concurrently, e.g.
+    # because they use a client library that is not thread-safe.
+    thread_safe = True
 
     @property
     @abc.abstractmethod
@@ -204,17 +846,32 @@ class SourceFinder(metaclass=abc.ABCMeta):
         cache_args: Mapping[str, Any] = None,
         cache_ttl: int = None,
         timeout: int = DEFAULT_TIMEOUT,
+        session: requests.Session = None,
+        async_client: 'httpx.AsyncClient' = None,
+        download_cache: DownloadCache = None,
     ):
         self.name = name
         self.version = version
         self.s_type = s_type
         self.timeout = timeout
         self.cache_ttl = cache_ttl
+        self.session = session if session is not None else make_session()
+        self._async_client = async_client
+        self.download_cache = download_cache
 
         self._cache = make_region(
             key_mangler=lambda key: 'soufi/' + key
         ).configure(cache_backend, arguments=cache_args)
 
+    @property
+    def async_client(self) -> 'httpx.AsyncClient':
+        """Return the HTTP client used by the asynchronous API."""
+        # Made lazily, so that the optional dependency is only needed when
+        # the asynchronous API is used.
+        if self._async_client is None:
+            self._async_client = make_async_client(timeout=self.timeout)
+        return self._async_client
+
     def find(
         self, name: str = None, version: str = None, s_type: SourceType = None
     ):
@@ -228,6 +885,22 @@ class SourceFinder(metaclass=abc.ABCMeta):
         to the values passed in the constructor. Any value specified here will
         override the value passed in the constructor.
         """
+        self._set_find_params(name, version, s_type)
+        return self._set_download_cache(self._find())
+
+    async def afind(
+        self, name: str = None, version: str = None, s_type: SourceType = None
+    ):
+        """Asynchronous counterpart to `find()`."""
+        self._set_find_params(name, version, s_type)
+        return self._set_download_cache(await self._afind())
+
+    def _set_download_cache(self, source):
+        if self.download_cache is not None:
+            source.download_cache = self.download_cache
+        return source
+
+    def _set_find_params(self, name, version, s_type):
         if name is not None:
             self.name = name
         if version is not None:
@@ -239,7 +912,6 @@ class SourceFinder(metaclass=abc.ABCMeta):
             raise ValueError(
                 "All of name, version and s_type must have a value"
             )
-        return self._find()
 
     def get_release_history(self, name: str = None, s_type: SourceType = None):
         """Return release history for a package type/name.
@@ -248,17 +920,37 @@ class SourceFinder(metaclass=abc.ABCMeta):
         :param s_type: A SourceType indicating the type of package
         :return: Iterable of dicts with at least `version`.
         """
+        self._set_release_history_params(name, s_type)
+        return self._get_release_history()
+
+    async def aget_release_history(
+        self, name: str = None, s_type: SourceType = None
+    ):
+        """Asynchronous counterpart to `get_release_history()`."""
+        self._set_release_history_params(name, s_type)
+        return await self._aget_release_history()
+
+    def _set_release_history_params(self, name, s_type):
         if name is not None:
             self.name = name
         if s_type is not None:
             self.s_type = s_type
         if None in (self.name, self.s_type):
             raise ValueError("Both of name and s_type must have a value")
-        return self._get_release_history()
 
     def _get_release_history(self):
         raise NotImplementedError
 
+    # Finders without a native asynchronous implementation fall back to
+    # running their blocking lookups in the event loop's default executor.
+    async def _afind(self) -> DiscoveredSource:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self._find)
+
+    async def _aget_release_history(self):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self._get_release_history)
+
     def _cache_get_or_create(
         self,
         key: str,
@@ -271,6 +963,28 @@ class SourceFinder(metaclass=abc.ABCMeta):
             kwargs['expiration_time'] = ttl
         return self._cache.get_or_create(key, creator, **kwargs)
 
+    async def _acache_get_or_create(
+        self,
+        key: str,
+        creator: Callable[[], Awaitable[Any]],
+        expiration_time: int = None,
+    ):
+        # dogpile.cache has no asynchronous API, so this does not take the
+        # dogpile lock; concurrent misses on the same key may each fetch.
+        ttl = self.cache_ttl if expiration_time is None else expiration_time
+        value = self._cache.get(key, expiration_time=ttl)
+        if value is NO_VALUE:
+            value = await creator()
+            self._cache.set(key, value)
+        return value
+
+    @staticmethod
+    def _cache_key(url, kwargs):
+        key = url
+        if 'params' in kwargs:
+            key += f"?{urlencode(kwargs['params'], doseq=True)}"
+        return key
+
     # Use this wrapper for doing HTTP HEAD requests, as it will swallow
     # Timeout exceptions, but cache other lookups.
     def test_url(self, url, **kwargs):
@@ -284,15 +998,22 @@ class SourceFinder(metaclass=abc.ABCMeta):
         except requests.exceptions.Timeout:
             return False
 
+    async def atest_url(self, url, **kwargs):
+        """Asynchronous counterpart to `test_url()`."""
+        try:
+            return await self._ahead_url(url, **kwargs)
+        except httpx.TimeoutException:
+            return False
+
     def _head_url(self, url, **kwargs):
         def inner():
-            response = requests.head(
+            response = self.session.head(
                 url, timeout=self.timeout, allow_redirects=True, **kwargs
             )
             if response.status_code == requests.codes.not_allowed:
                 # HEAD not available; we can try to download it instead and
                 # abort before starting the stream.
-                response = requests.get(
+                response = self.session.get(
                     url, stream=True, timeout=self.timeout, **kwargs
                 )
                 response.close()
@@ -301,11 +1022,31 @@ class SourceFinder(metaclass=abc.ABCMeta):
                 return None
             return response
 
-        key = url
-        if 'params' in kwargs:
-            key += f"?{urlencode(kwargs['params'], doseq=True)}"
+        key = self._cache_key(url, kwargs)
         return self._cache_get_or_create(f"head-{key}", inner)
 
+    async def _ahead_url(self, url, **kwargs):
+        client = self.async_client
+
+        async def inner():
+            response = await client.head(url, timeout=self.timeout, **kwargs)
+            if response.status_code == httpx.codes.METHOD_NOT_ALLOWED:
+                # HEAD not available; as above, start a download and abort
+                # it before reading the body.
+                async with client.stream(
+                    'GET', url, timeout=self.timeout, **kwargs
+                ) as response:
+                    pass
+
+            if response.status_code != httpx.codes.OK:
+                return None
+            return response
+
+        # The responses are not interchangeable with the ones cached by the
+        # synchronous API, so are cached under their own keys.
+        key = self._cache_key(url, kwargs)
+        return await self._acache_get_or_create(f"ahead-{key}", inner)
+
     def get_url(self, url, **kwargs):
         """Fetch the contents of the given URL and cache/return the result.
 
@@ -313,16 +1054,67 @@ class SourceFinder(metaclass=abc.ABCMeta):
         public resources when doing lookups, to reduce traffic.
         """
 
+        key = f"get-{self._cache_key(url, kwargs)}"
+
         def inner():
-            response = requests.get(url, timeout=self.timeout, **kwargs)
+            stale, request_kwargs = self._revalidate(key, kwargs)
+            response = self.session.get(
+                url, timeout=self.timeout, **request_kwargs
+            )
+            if stale and response.status_code == requests.codes.not_modified:
+                return stale
             if response.status_code != requests.codes.ok:
                 raise exceptions.DownloadError(response.reason)
             return response
 
-        key = url
-        if 'params' in kwargs:
-            key += f"?{urlencode(kwargs['params'], doseq=True)}"
-        return self._cache_get_or_create(f"get-{key}", inner)
+        return self._cache_get_or_create(key, inner)
+
+    async def aget_url(self, url, **kwargs):
+        """Asynchronous counterpart to `get_url()`.
+
+        Returns an `httpx.Response` rather than a `requests.Response`.
+        """
+        client = self.async_client
+
+        key = f"aget-{self._cache_key(url, kwargs)}"
+
+        async def inner():
+            stale, request_kwargs = self._revalidate(key, kwargs)
+            response = await client.get(
+                url, timeout=self.timeout, **request_kwargs
+            )
+            if stale and response.status_code == httpx.codes.NOT_MODIFIED:
+                return stale
+            if response.status_code != httpx.codes.OK:
+                raise exceptions.DownloadError(response.reason_phrase)
+            return response
+
+        return await self._acache_get_or_create(key, inner)
+
+    def _revalidate(self, key, kwargs):
+        """Make a request for the expired cache entry `key` conditional.
+
+        When a cached response expires, it may still be sitting in the
+        cache backend; if so, its validators are added to the request
+        headers, so that an unchanged resource costs a 304 instead of a
+        full download.
+
+        :return: a tuple of the expired response (or None if there is
+            nothing to revalidate) and the keyword arguments to make the
+            request with.
+        """
+        stale = self._cache.get(key, ignore_expiration=True)
+        if stale is NO_VALUE:
+            return None, kwargs
+        validators = {}
+        if stale.headers.get('ETag'):
+            validators['If-None-Match'] = stale.headers['ETag']
+        if stale.headers.get('Last-Modified'):
+            validators['If-Modified-Since'] = stale.headers['Last-Modified']
+        if not validators:
+            return None, kwargs
+        headers = {**(kwargs.get('headers') or {}), **validators}
+        return stale, {**kwargs, 'headers': headers}
 
     @abc.abstractmethod
     def _find(self) -> DiscoveredSource:
@@ -336,10 +1128,15 @@ class FinderFactory:
         factory('<type>', arg1, arg2...)
     Where <type> is a known Finder type (e.g. 'ubuntu') and the rest of the
     args/kwargs are passed directly to the Finder's __init__.
+
+    All Finders made by the factory share one pooled HTTP session, unless
+    a `session` is passed explicitly.  Use `configure_session` to tune or
+    replace it.
     """
 
     def __init__(self):
         self._finders = dict()
+        self._session = None
         # TODO: Make this path configurable.
         import soufi.finders
 
@@ -357,8 +1154,135 @@ class FinderFactory:
     def __call__(
         self, distro: Union[Distro, str], *args, **kwargs
     ) -> SourceFinder:
+        kwargs.setdefault('session', self.session)
         return self._finders[distro](*args, **kwargs)
 
+    def find_many(
+        self,
+        packages: Iterable[Tuple[str, str, str]],
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        finder_kwargs: Mapping[str, Mapping[str, Any]] = None,
+        **kwargs,
+    ) -> Iterator[Tuple[Tuple[str, str, str], Any]]:
+        """Find sources for many packages concurrently.
+
+        One Finder is made per Finder type and its state (cache, HTTP
+        session, any remote logins) is shared between all lookups of that
+        type, so expensive setup is only done once.  The lookups themselves
+        run in a pool of up to `max_workers` threads.
+
+        :param packages: An iterable of (type, name, version) tuples, where
+            type is a known Finder type (e.g. 'debian', 'python').
+        :param max_workers: Maximum number of lookups to run concurrently.
+        :param finder_kwargs: A mapping of Finder type to a dict of extra
+            keyword arguments for that Finder's __init__, e.g.
+            ``{'alpine': {'aports_dir': '/src/aports'}}``.
+
+        Any other keyword arguments (e.g. `cache_backend`) are passed to the
+        __init__ of every Finder, unless overridden by `finder_kwargs`.
+
+        :return: A generator of (package, result) tuples, in the order that
+            the lookups complete.  The package is the tuple that was passed
+            in, and the result is either the DiscoveredSource, or the
+            SourceNotFound or DownloadError exception that was raised.  If
+            the type is not a known Finder type, the result is a KeyError,
+            and if its Finder cannot be made, whatever exception that
+            raised.
+        """
+        if finder_kwargs is None:
+            finder_kwargs = {}
+        finders = {}
+        locks = {}
+
+        def make_finder(distro):
+            # Any failure is the result of every lookup of this type, rather
+            # than cancelling the whole batch.
+            if distro not in self._finders:
+                return KeyError(f"Unknown Finder type {distro!r}")
+            try:
+                source_finder = self(
+                    distro,
+                    **{
+                        **kwargs,
+                        **finder_kwargs.get(distro, {}),
+                        's_type': self._source_type(distro),
+                    },
+                )
+            except Exception as e:
+                return e
+            locks[distro] = (
+                contextlib.nullcontext()
+                if source_finder.thread_safe
+                else threading.Lock()
+            )
+            return source_finder
+
+        def find_one(distro, name, version):
+            # Finders keep the package being looked up as state, so give
+            # each lookup its own shallow copy.
+            source_finder = copy.copy(finders[distro])
+            with locks[distro]:
+                return source_finder.find(name, version)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {}
+            try:
+                for package in packages:
+                    distro, name, version = package
+                    if distro not in finders:
+                        finders[distro] = make_finder(distro)
+                    if isinstance(finders[distro], Exception):
+                        future = Future()
+                        future.set_result(finders[distro])
+                        futures[future] = package
+                        continue
+                    future = executor.submit(find_one, distro, name, version)
+                    futures[future] = package
+                for future in as_completed(futures):
+                    try:
+                        result = future.result()
+                    except (
+                        exceptions.SourceNotFound,
+                        exceptions.DownloadError,
+                    ) as e:
+                        result = e
+                    yield futures[future], result
+            finally:
+                # Don't wait on lookups nobody will collect if the caller
+                # stops iterating early.
+                for future in futures:
+                    future.cancel()
+
+    @staticmethod
+    def _source_type(distro: str) -> SourceType:
+        """Return the SourceType for a Finder type."""
+        try:
+            return SourceType(distro)
+        except ValueError:
+            # Everything that is not a language ecosystem is an OS.
+            return SourceType.os
+
+    @property
+    def session(self) -> requests.Session:
+        """Return the HTTP session shared by all Finders."""
+        # Made lazily, as the factory singleton is made at import time.
+        if self._session is None:
+            self._session = make_session()
+        return self._session
+
+    def configure_session(self, session: requests.Session = None, **kwargs):
+        """Replace the HTTP session shared by all subsequent Finders.
+
+        :param session: A ready-made `requests.Session` to use.  If not
+            specified, a new one is made by passing any other keyword
+            arguments (e.g. `pool_size`) to `make_session`.
+        """
+        if session is None:
+            session = make_session(**kwargs)
+        # The old session is not closed, as existing Finders may still be
+        # using it.
+        self._session = session
+
     @property
     def supported_types(self):
         """Return a list of known Finder types."""
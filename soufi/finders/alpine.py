@@ -1,55 +1,98 @@
 # Copyright (c) 2021 Cisco Systems, Inc. and its affiliates
 # All rights reserved.
 
-import glob
 import hashlib
+import json
+import os
 import pathlib
+import select
 import shutil
+import signal
+import sqlite3
 import subprocess
+import threading
+import time
 import urllib
 import warnings
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import closing
 from pathlib import Path
 from shutil import copyfile
-from typing import Iterable, Union
+from typing import Iterable
 
 from soufi import exceptions, finder
 
-# Shell snippet that will source an APKBUILD and spit out the vars that we
-# need. CARCH is set to work around a bug in 3.12.0 scripts. CTARGET_ARCH
-# is needed for more complex scripts like `community/go`.
-SH_GET_APK_VARS = """
-function die () {{
+# Shell script that sources each APKBUILD whose path is read from stdin, in
+# its own subshell, and spits out the vars that we need.  For each one, it
+# writes three NUL-terminated fields: the subshell's exit status, the vars
+# (one per line) and anything written to stderr.  CARCH is set to work
+# around a bug in 3.12.0 scripts. CTARGET_ARCH is needed for more complex
+# scripts like `community/go`.
+SH_GET_APK_VARS = r"""
+function die () {
 :
-}}
+}
 export CARCH=$(arch)
 export CTARGET_ARCH=$(arch)
-. {file}
-echo $source
-echo $subpackages
-echo $provides
-echo $pkgver
-echo $pkgrel
-echo $sha512sums
+errors=$(mktemp)
+trap 'rm -f "$errors"' EXIT
+while IFS= read -r file; do
+    vars=$(
+        exec 2>"$errors"
+        # The APKBUILD must be sourced with a CWD of where it is located,
+        # since it can use relative paths to source other files.
+        cd -- "${file%/*}" || exit
+        . "$file" </dev/null >/dev/null
+        echo $source
+        echo $subpackages
+        echo $provides
+        echo $pkgver
+        echo $pkgrel
+        echo $sha512sums
+        # Stop the command substitution from eating empty trailing vars.
+        printf .
+    )
+    status=$?
+    printf '%s\0%s\0' "$status" "${vars%.}"
+    cat "$errors"
+    printf '\0'
+done
 """
 
+# Seconds to wait for an APKBUILD to be evaluated.
+APKBUILD_TIMEOUT = 60
+
 
 class AlpineFinder(finder.SourceFinder):
     """Find Alpine APK sources.
 
-    :param aports_dir: An aports branch checked out locally.
+    :param aports_dir: An aports branch checked out locally, or a list of
+        them.
 
     It is recommended to clone the branch like this to save time/space:
     git clone --depth 1 --branch vN.N.N git://git.alpinelinux.org/aports
 
-    The results of parsing each directory with the branch is cached, so it
-    is also recommended to check out each branch into its own place.
+    :param apkbuild_index: An `ApkbuildIndex`, or the path of the SQLite
+        database to use for one, in which to persist the parsed APKBUILDs.
+        By default they are only indexed in memory, for the lifetime of the
+        finder.
+    :param apkbuild_workers: The number of APKBUILDs to evaluate
+        concurrently when indexing, across all the checkouts in
+        `aports_dir`.  Defaults to the number of CPUs.
+
+    The parsed APKBUILDs are indexed by package, subpackage and provided
+    names, keyed by aports directory, so it is also recommended to check
+    out each branch into its own place.  An index is updated incrementally:
+    only APKBUILDs that changed since they were last indexed are parsed
+    again, and a git checkout whose HEAD has not moved is not scanned at
+    all (so uncommitted changes in it go unnoticed).
 
-    The caller therefore must know in which release branch the package is
-    likely to reside as it is impossible to know this information outside
-    the context of an actual distro image.  This Finder *could* iterate
-    over every release, but this is inefficient. There's nothing
-    stopping the caller doing this though, as required.
+    It is impossible to know which release branch a package resides in
+    outside the context of an actual distro image, so `aports_dir` may
+    also be a list of checkouts (e.g. one per release branch, or worktrees
+    of the same clone made with `git worktree add`).  They are searched
+    concurrently, each with its own index, and the first one in the list
+    whose APKBUILD matches the version is used.
     """
 
     distro = finder.Distro.alpine.value
@@ -57,74 +100,166 @@ class AlpineFinder(finder.SourceFinder):
     # See https://wiki.alpinelinux.org/wiki/APKBUILD_Reference
     # for info on dealing with APKBUILD files.
 
-    def __init__(self, *args, aports_dir, **kwargs):
+    def __init__(
+        self,
+        *args,
+        aports_dir,
+        apkbuild_index=None,
+        apkbuild_workers=None,
+        **kwargs,
+    ):
         # TODO: take a sudo user name that will be used to run APKBUILDs
         self.aports_dir = aports_dir
+        if isinstance(aports_dir, (str, os.PathLike)):
+            aports_dir = [aports_dir]
+        # Resolve the paths, so that an index shared between finders knows
+        # each checkout by one name.
+        self.aports_dirs = [str(Path(path).resolve()) for path in aports_dir]
+        if apkbuild_workers is None:
+            apkbuild_workers = os.cpu_count() or 1
+        self.apkbuild_workers = apkbuild_workers
+        # Checkouts are indexed concurrently, so their shells share one
+        # limit.
+        self._shell_slots = threading.BoundedSemaphore(apkbuild_workers)
+        if apkbuild_index is None:
+            apkbuild_index = ApkbuildIndex()
+        elif not isinstance(apkbuild_index, ApkbuildIndex):
+            apkbuild_index = ApkbuildIndex(apkbuild_index)
+        self.apkbuild_index = apkbuild_index
         super().__init__(*args, **kwargs)
 
     def _find_apkbuilds(self, aports_dir):
         """Given a starting dir, find all the APKBUILD files.
 
-        :return: A dict mapping package names to the APKBUILD path.
-        """
+        The aports tree is laid out as `repo/package/APKBUILD`, so only the
+        repo directories need to be listed, and then only if they have
+        changed (i.e. packages have been added or removed) since they were
+        last listed.  Each APKBUILD is still stat'ed, to catch changes.
 
-        def inner():
-            apkbuilds = {}
-            for apkbuild in glob.iglob(
-                f"{aports_dir}/**/*/APKBUILD", recursive=True
-            ):
-                path = Path(apkbuild)
-                package = path.parent.name
-                apkbuilds[package] = path
-            return apkbuilds
-
-        return self._cache.get_or_create(f"glob-{aports_dir}", inner)
-
-    def _find_apkbuild_path(self, name):
-        """Return the Path to the APKBUILD for package with 'name'."""
-        apkbuilds = self._find_apkbuilds(self.aports_dir)
-        path = apkbuilds.get(name)
-        if path is not None:
-            return path
-
-        path = self._search_subpackages(name, apkbuilds)
-        return path
-
-    def _search_subpackages(
-        self, name: str, apkbuilds: dict
-    ) -> Union[Path, None]:
-        """Return path to APKBUILD containing named subpackage."""
-        for path in apkbuilds.values():
-            apkbuild = self._parse_apkbuild(path)
-            if name in apkbuild['subpackages']:
-                return path
-            for prov in apkbuild['provides']:
-                if '=' not in prov:
-                    # A virtual package, ignore.
+        :return: A tuple of the listing of each repo directory, mapping its
+            name to a tuple of its modification time and package names; and
+            a dict mapping the APKBUILD paths to a tuple of their package
+            (directory) name and modification time.
+        """
+        listed = self.apkbuild_index.listing(aports_dir)
+        listing = {}
+        apkbuilds = {}
+        with os.scandir(aports_dir) as repos:
+            for repo in repos:
+                if repo.name.startswith('.') or not repo.is_dir():
                     continue
-                prov_name, _ = prov.split('=', 1)
-                if name == prov_name:
-                    return path
-        return None
+                mtime = repo.stat().st_mtime_ns
+                if listed.get(repo.name, (None,))[0] == mtime:
+                    packages = listed[repo.name][1]
+                else:
+                    with os.scandir(repo.path) as entries:
+                        packages = sorted(
+                            entry.name for entry in entries if entry.is_dir()
+                        )
+                listing[repo.name] = (mtime, packages)
+                for package in packages:
+                    path = os.path.join(repo.path, package, 'APKBUILD')
+                    try:
+                        stat = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    apkbuilds[path] = (package, stat.st_mtime_ns)
+        return listing, apkbuilds
 
-    def _parse_apkbuild(self, path: Path) -> dict:
-        """Return a dict with partial metadata from the APKBUILD."""
-        # TODO: run with sudo user, for security purposes.
-        cmd = ['bash', '-c', SH_GET_APK_VARS.format(file=str(path))]
+    def _update_index(self, aports_dir):
+        """Bring the index of the aports dir up to date with the files.
+
+        Checkouts whose git HEAD has not moved since they were last indexed
+        are not scanned again.  Otherwise, only new APKBUILDs, and those
+        modified since they were last indexed, are parsed again (when next
+        needed).
+        """
+        revision = get_git_revision(aports_dir)
+        if revision is not None and revision == self.apkbuild_index.revision(
+            aports_dir
+        ):
+            return
+        listing, apkbuilds = self._find_apkbuilds(aports_dir)
+        self.apkbuild_index.update(aports_dir, revision, apkbuilds, listing)
+
+    def _find_apkbuild(self, name, aports_dir):
+        """Return the parsed APKBUILD in `aports_dir` for package `name`.
+
+        :return: A dict as returned by `_parse_apkbuild`, or None if no
+            APKBUILD builds or provides `name`.
+        """
+        self._update_index(aports_dir)
+        paths = self.apkbuild_index.packages(aports_dir, name)
+        if paths:
+            return self._get_apkbuild(aports_dir, paths[0])
+        # Not a package in its own right, so find the APKBUILD it is a
+        # subpackage of, which means knowing every APKBUILD's subpackages.
+        unparsed = self.apkbuild_index.unparsed(aports_dir)
+        self._index_apkbuilds(aports_dir, unparsed)
+        path = self.apkbuild_index.provider(aports_dir, name)
+        if path is None:
+            return None
+        return self._get_apkbuild(aports_dir, path)
+
+    def _get_apkbuild(self, aports_dir, path):
+        """Return the parsed APKBUILD at `path`, parsing it if necessary."""
+        apkbuild, error = self.apkbuild_index.get(aports_dir, path)
+        if apkbuild is None and error is None:
+            self._index_apkbuilds(aports_dir, [path])
+            apkbuild, error = self.apkbuild_index.get(aports_dir, path)
+        if error is not None:
+            raise exceptions.DownloadError(error)
+        return apkbuild
+
+    def _index_apkbuilds(self, aports_dir, paths):
+        """Parse the APKBUILDs at `paths` and store them in the index.
+
+        APKBUILDs that fail to parse are stored along with the error, so
+        that they do not prevent other packages from being found.
+        """
+
+        def parse(paths):
+            # Evaluate every APKBUILD in the same shell, so each costs a
+            # fork rather than a whole new bash process.
+            results = []
+            with self._shell_slots, ApkbuildShell() as shell:
+                for path in paths:
+                    try:
+                        apkbuild = self._parse_apkbuild(Path(path), shell)
+                        results.append((apkbuild, None))
+                    except exceptions.DownloadError as e:
+                        results.append((None, str(e)))
+            return dict(zip(paths, results))
+
+        if not paths:
+            return
+        # Each shell runs in its own process, so threads are enough to keep
+        # all the CPUs busy.
+        workers = min(self.apkbuild_workers, len(paths))
+        if workers > 1:
+            with ThreadPoolExecutor(workers) as pool:
+                chunks = [paths[i::workers] for i in range(workers)]
+                parsed = {}
+                for result in pool.map(parse, chunks):
+                    parsed.update(result)
+        else:
+            parsed = parse(paths)
+        self.apkbuild_index.store(aports_dir, parsed)
+
+    def _parse_apkbuild(self, path: Path, shell=None) -> dict:
+        """Return a dict with partial metadata from the APKBUILD.
+
+        :param shell: The `ApkbuildShell` to evaluate the APKBUILD in.  By
+            default, one is started just for this APKBUILD.
+        """
+        if shell is None:
+            with self._shell_slots, ApkbuildShell() as shell:
+                return self._parse_apkbuild(path, shell)
         try:
-            # This must run with a CWD of where the APKBUILD is located,
-            # since it can use relative paths to source other files.
-            output = subprocess.run(  # noqa: S603
-                cmd,
-                cwd=path.parent,
-                capture_output=True,
-                check=True,
-            )
-            if output.stderr:
-                raise subprocess.SubprocessError(output.stderr)
+            output = shell.evaluate(path)
         except subprocess.SubprocessError as e:
             raise exceptions.DownloadError(str(e))
-        parsed = output.stdout.decode('utf-8').splitlines()
+        parsed = output.splitlines()
         # Prepend patch sources with the full path.
         all_sources = parsed[0].split()
         sources = []
@@ -158,67 +293,119 @@ class AlpineFinder(finder.SourceFinder):
 
     def _find(self):
         # Main entrypoint from the parent class.
-        path = self._find_apkbuild_path(self.name)
-        if path is None:
-            raise exceptions.SourceNotFound()
-        apkbuild = self._parse_apkbuild(path)
-        version = f"{apkbuild['pkgver']}-{apkbuild['pkgrel']}"
+        def find(aports_dir):
+            try:
+                return self._find_apkbuild(self.name, aports_dir), None
+            except exceptions.DownloadError as e:
+                return None, e
+
+        if len(self.aports_dirs) > 1:
+            with ThreadPoolExecutor(len(self.aports_dirs)) as pool:
+                results = list(pool.map(find, self.aports_dirs))
+        else:
+            results = [find(aports_dir) for aports_dir in self.aports_dirs]
+
+        errors = []
+        for aports_dir, (apkbuild, error) in zip(self.aports_dirs, results):
+            if error is not None:
+                errors.append(error)
+                continue
+            if apkbuild is None:
+                continue
+            version = f"{apkbuild['pkgver']}-{apkbuild['pkgrel']}"
+            if version == self._expected_version():
+                return AlpineDiscoveredSource(
+                    apkbuild['source'],
+                    sha512sums=apkbuild['sha512sums'],
+                    aports_dir=aports_dir,
+                    timeout=self.timeout,
+                    session=self.session,
+                )
+        # Only complain about broken APKBUILDs if nothing else matched.
+        if errors:
+            raise errors[0]
+        raise exceptions.SourceNotFound()
+
+    def _expected_version(self):
         # See if there's an 'r' in the release part of the version, and remove
         # it.
         base_version, release = self.version.rsplit('-', 1)
         if release.startswith('r'):
-            expect_version = f"{base_version}-{release[1:]}"
-        else:
-            expect_version = self.version
-        if version == expect_version:
-            return AlpineDiscoveredSource(
-                apkbuild['source'],
-                sha512sums=apkbuild['sha512sums'],
-                timeout=self.timeout,
-            )
-        raise exceptions.SourceNotFound()
+            return f"{base_version}-{release[1:]}"
+        return self.version
 
 
 class AlpineDiscoveredSource(finder.DiscoveredSource):
-    """A discovered Alpine source package."""
+    """A discovered Alpine source package.
 
-    def __init__(self, urls: Iterable[str], sha512sums=None, **kwargs):
+    :param aports_dir: The aports checkout the package was found in.
+    """
+
+    def __init__(
+        self,
+        urls: Iterable[str],
+        sha512sums=None,
+        aports_dir=None,
+        **kwargs,
+    ):
         self.sha512sums = sha512sums or {}
+        self.aports_dir = aports_dir
         super().__init__(urls, **kwargs)
 
-    def populate_archive(self, temp_dir, tar):
+    def sources(self):
+        """Return a list of (file name, URL) for each source file."""
         # The file name is the last segment of the URL path, unless the source
         # is the special format containing a ::, in which case the part
         # preceding the :: is the file name.
-        names = []
-        urls = []
+        sources = []
         for url in self.urls:
             if '::' in url:
                 name, url = url.split('::', 1)
             else:
                 name = url.rsplit('/', 1)[-1]
-            names.append(name)
-            urls.append(url)
-
-        for name, url in zip(names, urls):
-            if url.startswith('file:'):
-                _, srcfile = url.split('file://', 1)
-                arcfile_name = Path(temp_dir) / name
-                copyfile(srcfile, arcfile_name)
-            elif url.startswith('ftp://'):
-                # Requests cannot do FTP, fall back to urllib.
-                arcfile_name = self.download_ftp_file(temp_dir, name, url)
-            else:
-                arcfile_name = self.download_file(temp_dir, name, url)
-            if name in self.sha512sums:
-                self.verify_sha512sum(arcfile_name, self.sha512sums[name])
-            else:
+            sources.append((name, url))
+        return sources
+
+    def member_names(self):
+        return [name for name, _ in self.sources()]
+
+    def known_digests(self, target_name, url):
+        if target_name in self.sha512sums:
+            return {'sha512': self.sha512sums[target_name]}
+        return {}
+
+    def populate_archive(self, temp_dir, tar):
+        sources = self.sources()
+        arcfile_names = self.download_files(
+            temp_dir, sources, download=self.fetch_file
+        )
+        for (name, _), arcfile_name in zip(sources, arcfile_names):
+            if name not in self.sha512sums:
                 warnings.warn(
                     f'No checksum for source file {name}, cannot verify',
                     stacklevel=1,
                 )
             tar.add(arcfile_name, arcname=name, filter=self.reset_tarinfo)
 
+    def fetch_file(self, target_dir, target_name, url):
+        """Fetch a source file from a local path or an FTP or HTTP URL.
+
+        The file is verified against its sha512sum, if it has one.  Files
+        downloaded over HTTP are verified as they are downloaded.
+        """
+        if url.startswith('file:'):
+            _, srcfile = url.split('file://', 1)
+            arcfile_name = Path(target_dir) / target_name
+            copyfile(srcfile, arcfile_name)
+        elif url.startswith('ftp://'):
+            # Requests cannot do FTP, fall back to urllib.
+            arcfile_name = self.download_ftp_file(target_dir, target_name, url)
+        else:
+            return self.download_file(target_dir, target_name, url)
+        if target_name in self.sha512sums:
+            self.verify_sha512sum(arcfile_name, self.sha512sums[target_name])
+        return arcfile_name
+
     def verify_sha512sum(self, filename, sha512sum):
         """Verify that the contents of filename match the provided sha512sum.
 
@@ -248,3 +435,348 @@ class AlpineDiscoveredSource(finder.DiscoveredSource):
 
     def __repr__(self) -> str:
         return "\n".join(self.urls)
+
+
+class ApkbuildShell:
+    """A bash process that evaluates APKBUILDs.
+
+    Each APKBUILD is sourced in its own subshell, so they cannot interfere
+    with each other, but without the cost of starting a new bash process
+    for each one.  If the process dies, or an APKBUILD takes longer than
+    `timeout` seconds, it is restarted for the next APKBUILD.
+    """
+
+    def __init__(self, timeout=APKBUILD_TIMEOUT):
+        self.timeout = timeout
+        self._proc = None
+        self._buffer = b''
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _start(self):
+        # TODO: run with sudo user, for security purposes.
+        self._proc = subprocess.Popen(  # noqa: S603
+            ['bash', '-c', SH_GET_APK_VARS],  # noqa: S607
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            # So that a hung APKBUILD's subshell can be killed with it.
+            start_new_session=True,
+        )
+        self._buffer = b''
+
+    def close(self, kill=False):
+        """Stop the bash process, if it is running.
+
+        :param kill: Kill it and any APKBUILD it is evaluating, rather than
+            waiting for it to finish.
+        """
+        if self._proc is None:
+            return
+        proc, self._proc = self._proc, None
+        if kill:
+            try:
+                os.killpg(proc.pid, signal.SIGKILL)
+            except ProcessLookupError:  # pragma: no cover
+                pass
+        try:
+            proc.stdin.close()
+        except BrokenPipeError:
+            pass
+        proc.stdout.close()
+        proc.wait()
+
+    def _read_field(self, path, deadline):
+        while (end := self._buffer.find(b'\0')) < 0:
+            # read1 only reads what is in the pipe, and never leaves any
+            # behind in its buffer, so select can tell when there is more.
+            remaining = max(deadline - time.monotonic(), 0)
+            if not select.select([self._proc.stdout], [], [], remaining)[0]:
+                self.close(kill=True)
+                raise subprocess.TimeoutExpired(path, self.timeout)
+            chunk = self._proc.stdout.read1(0x10000)
+            if not chunk:
+                self.close()
+                raise subprocess.SubprocessError(
+                    "APKBUILD shell exited unexpectedly"
+                )
+            self._buffer += chunk
+        field, self._buffer = self._buffer[:end], self._buffer[end + 1 :]
+        return field.decode('utf-8')
+
+    def evaluate(self, path):
+        """Source the APKBUILD at `path`, returning the vars we need.
+
+        :return: The values of `source`, `subpackages`, `provides`,
+            `pkgver`, `pkgrel` and `sha512sums`, one per line.
+        :raises: subprocess.SubprocessError if the APKBUILD wrote anything
+            to stderr, exited with an error, or timed out.
+        """
+        # The shell changes directory before sourcing the APKBUILD.
+        path = os.path.abspath(path)
+        if '\n' in path:
+            raise subprocess.SubprocessError(f"Invalid APKBUILD path {path!r}")
+        if self._proc is None:
+            self._start()
+        try:
+            self._proc.stdin.write(f"{path}\n".encode('utf-8'))
+            self._proc.stdin.flush()
+        except BrokenPipeError:
+            self.close()
+            raise subprocess.SubprocessError(
+                "APKBUILD shell exited unexpectedly"
+            )
+        deadline = time.monotonic() + self.timeout
+        status = self._read_field(path, deadline)
+        output = self._read_field(path, deadline)
+        errors = self._read_field(path, deadline)
+        if errors:
+            raise subprocess.SubprocessError(errors)
+        if status != '0':
+            raise subprocess.CalledProcessError(int(status), path, output)
+        return output
+
+
+def get_git_revision(path):
+    """Return the commit checked out at `path`.
+
+    :return: The commit ID, or None if `path` is not the top of a git
+        checkout (or git is not available).
+    """
+    if not (Path(path) / '.git').exists():
+        return None
+    try:
+        output = subprocess.run(  # noqa: S603
+            ['git', '-C', str(path), 'rev-parse', 'HEAD'],  # noqa: S607
+            capture_output=True,
+            check=True,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return output.stdout.decode('utf-8').strip()
+
+
+_INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkouts (
+    aports_dir TEXT PRIMARY KEY,
+    revision TEXT
+);
+CREATE TABLE IF NOT EXISTS listings (
+    aports_dir TEXT NOT NULL,
+    repo TEXT NOT NULL,
+    mtime INTEGER NOT NULL,
+    packages TEXT NOT NULL,
+    PRIMARY KEY (aports_dir, repo)
+);
+CREATE TABLE IF NOT EXISTS apkbuilds (
+    aports_dir TEXT NOT NULL,
+    path TEXT NOT NULL,
+    package TEXT NOT NULL,
+    mtime INTEGER NOT NULL,
+    metadata TEXT,
+    error TEXT,
+    PRIMARY KEY (aports_dir, path)
+);
+CREATE INDEX IF NOT EXISTS apkbuilds_aports_dir_package
+    ON apkbuilds (aports_dir, package);
+CREATE TABLE IF NOT EXISTS names (
+    aports_dir TEXT NOT NULL,
+    name TEXT NOT NULL,
+    path TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS names_aports_dir_name ON names (aports_dir, name);
+CREATE INDEX IF NOT EXISTS names_aports_dir_path ON names (aports_dir, path);
+"""
+
+
+class ApkbuildIndex:
+    """An index of parsed APKBUILDs, keyed by aports directory.
+
+    Each APKBUILD is recorded with its modification time, and with its
+    metadata (as returned by `AlpineFinder._parse_apkbuild`) once it has
+    been parsed.  The subpackages and versioned provides of every parsed
+    APKBUILD are indexed so that they can be looked up directly.
+
+    :param path: The SQLite database to keep the index in.  Defaults to an
+        in-memory database, otherwise the index persists across processes
+        and may be shared between them.
+
+    The index is safe to share between threads.
+    """
+
+    def __init__(self, path=':memory:'):
+        self.path = str(path)
+        # NOTE(nic): an in-memory database only exists for the connection
+        #  that made it, so share a single connection between threads and
+        #  serialize access to it ourselves.
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            self.path, timeout=AlpineFinder.timeout, check_same_thread=False
+        )
+        with self._lock, self._conn:
+            self._conn.executescript(_INDEX_SCHEMA)
+
+    def _execute(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def revision(self, aports_dir):
+        """Return the git revision `aports_dir` was last indexed at."""
+        rows = self._execute(
+            'SELECT revision FROM checkouts WHERE aports_dir = ?',
+            (aports_dir,),
+        )
+        return rows[0][0] if rows else None
+
+    def listing(self, aports_dir):
+        """Return the listing of the repo directories in `aports_dir`.
+
+        :return: A dict mapping each repo directory's name to a tuple of
+            its modification time and the package names in it.
+        """
+        rows = self._execute(
+            'SELECT repo, mtime, packages FROM listings WHERE aports_dir = ?',
+            (aports_dir,),
+        )
+        return {
+            repo: (mtime, json.loads(packages))
+            for repo, mtime, packages in rows
+        }
+
+    def update(self, aports_dir, revision, apkbuilds, listing=None):
+        """Update the APKBUILDs indexed for `aports_dir`.
+
+        APKBUILDs that have gone are dropped, and any whose modification
+        time has changed are marked as needing to be parsed again.
+
+        :param revision: The git revision of `aports_dir`, if any.
+        :param apkbuilds: A mapping of every APKBUILD's path to a tuple of
+            its package (directory) name and modification time.
+        :param listing: If given, replaces the listing of the repo
+            directories (see `listing`).
+        """
+        with self._lock, self._conn as conn:
+            if listing is not None:
+                conn.execute(
+                    'DELETE FROM listings WHERE aports_dir = ?', (aports_dir,)
+                )
+                conn.executemany(
+                    'INSERT INTO listings VALUES (?, ?, ?, ?)',
+                    (
+                        (aports_dir, repo, mtime, json.dumps(packages))
+                        for repo, (mtime, packages) in listing.items()
+                    ),
+                )
+            indexed = dict(
+                conn.execute(
+                    'SELECT path, mtime FROM apkbuilds WHERE aports_dir = ?',
+                    (aports_dir,),
+                )
+            )
+            stale = [
+                (aports_dir, path)
+                for path, mtime in indexed.items()
+                if apkbuilds.get(path, (None, None))[1] != mtime
+            ]
+            conn.executemany(
+                'DELETE FROM apkbuilds WHERE aports_dir = ? AND path = ?',
+                stale,
+            )
+            conn.executemany(
+                'DELETE FROM names WHERE aports_dir = ? AND path = ?', stale
+            )
+            conn.executemany(
+                'INSERT OR IGNORE INTO apkbuilds '
+                '(aports_dir, path, package, mtime) VALUES (?, ?, ?, ?)',
+                (
+                    (aports_dir, path, package, mtime)
+                    for path, (package, mtime) in apkbuilds.items()
+                ),
+            )
+            conn.execute(
+                'INSERT OR REPLACE INTO checkouts VALUES (?, ?)',
+                (aports_dir, revision),
+            )
+
+    def store(self, aports_dir, parsed):
+        """Store parsed APKBUILDs.
+
+        :param parsed: A mapping of APKBUILD paths to a tuple of their
+            metadata and the error raised parsing them; one of which is
+            None.
+        """
+        names = []
+        for path, (metadata, _) in parsed.items():
+            if metadata is None:
+                continue
+            for name in metadata['subpackages']:
+                names.append((aports_dir, name, path))
+            for prov in metadata['provides']:
+                if '=' not in prov:
+                    # A virtual package, ignore.
+                    continue
+                names.append((aports_dir, prov.split('=', 1)[0], path))
+        with self._lock, self._conn as conn:
+            conn.executemany(
+                'UPDATE apkbuilds SET metadata = ?, error = ? '
+                'WHERE aports_dir = ? AND path = ?',
+                (
+                    (
+                        None if metadata is None else json.dumps(metadata),
+                        error,
+                        aports_dir,
+                        path,
+                    )
+                    for path, (metadata, error) in parsed.items()
+                ),
+            )
+            conn.executemany(
+                'DELETE FROM names WHERE aports_dir = ? AND path = ?',
+                ((aports_dir, path) for path in parsed),
+            )
+            conn.executemany('INSERT INTO names VALUES (?, ?, ?)', names)
+
+    def packages(self, aports_dir, package):
+        """Return the paths of the APKBUILDs for `package`."""
+        rows = self._execute(
+            'SELECT path FROM apkbuilds WHERE aports_dir = ? AND package = ? '
+            'ORDER BY path',
+            (aports_dir, package),
+        )
+        return [path for (path,) in rows]
+
+    def unparsed(self, aports_dir):
+        """Return the paths of the APKBUILDs that need to be parsed."""
+        rows = self._execute(
+            'SELECT path FROM apkbuilds WHERE aports_dir = ? '
+            'AND metadata IS NULL AND error IS NULL ORDER BY path',
+            (aports_dir,),
+        )
+        return [path for (path,) in rows]
+
+    def provider(self, aports_dir, name):
+        """Return the path of the APKBUILD with subpackage `name`, if any."""
+        rows = self._execute(
+            'SELECT path FROM names WHERE aports_dir = ? AND name = ? '
+            'ORDER BY path LIMIT 1',
+            (aports_dir, name),
+        )
+        return rows[0][0] if rows else None
+
+    def get(self, aports_dir, path):
+        """Return the metadata of the APKBUILD at `path`, and its error.
+
+        Both are None if the APKBUILD has not been parsed (or indexed).
+        """
+        rows = self._execute(
+            'SELECT metadata, error FROM apkbuilds '
+            'WHERE aports_dir = ? AND path = ?',
+            (aports_dir, path),
+        )
+        if not rows:
+            return None, None
+        metadata, error = rows[0]
+        return (None if metadata is None else json.loads(metadata)), error
@@ -27,7 +27,15 @@ class CrateFinder(finder.SourceFinder):
 
     def _find(self):
         source_url = self.get_source_url()
-        return CrateDiscoveredSource([source_url], timeout=self.timeout)
+        return CrateDiscoveredSource(
+            [source_url], timeout=self.timeout, session=self.session
+        )
+
+    async def _afind(self):
+        source_url = await self.aget_source_url()
+        return CrateDiscoveredSource(
+            [source_url], timeout=self.timeout, session=self.session
+        )
 
     def _get_release_history(self):
         url = f"{CRATES_API}{self.name}/versions"
@@ -36,7 +44,18 @@ class CrateFinder(finder.SourceFinder):
             data = self.get_url(url, headers=headers).json()
         except exceptions.DownloadError:
             raise exceptions.SourceNotFound
+        return self._parse_release_history(data)
 
+    async def _aget_release_history(self):
+        url = f"{CRATES_API}{self.name}/versions"
+        headers = {'User-Agent': 'soufi'}
+        try:
+            data = (await self.aget_url(url, headers=headers)).json()
+        except exceptions.DownloadError:
+            raise exceptions.SourceNotFound
+        return self._parse_release_history(data)
+
+    def _parse_release_history(self, data):
         history = []
         for item in data.get('versions', []):
             if item.get('yanked'):
@@ -79,10 +98,26 @@ class CrateFinder(finder.SourceFinder):
             return url
         raise exceptions.SourceNotFound
 
+    async def aget_source_url(self):
+        """Asynchronous counterpart to `get_source_url()`."""
+        dl = await self.aget_index_dl()
+        url = f"{dl}/{self.name}/{self.name}-{self.version}.crate"
+        if await self.atest_url(url):
+            return url
+        raise exceptions.SourceNotFound
+
     def get_index_dl(self):
         """Return the 'dl' value from the config.json at the index root."""
         # 'dl' is the URL prefix from which all downloads are made.
         config = self.get_url(f"{self.index}config.json").json()
+        return self._parse_index_dl(config)
+
+    async def aget_index_dl(self):
+        """Asynchronous counterpart to `get_index_dl()`."""
+        config = (await self.aget_url(f"{self.index}config.json")).json()
+        return self._parse_index_dl(config)
+
+    def _parse_index_dl(self, config):
         try:
             return config["dl"]
         except KeyError:
@@ -1,10 +1,28 @@
 # Copyright (c) 2021 Cisco Systems, Inc. and its affiliates
 # All rights reserved.
 
+import contextlib
+import gzip
+import io
+import lzma
+import pathlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
 
 from soufi import exceptions, finder
 
 SNAPSHOT_API = "https://snapshot.debian.org/"
+DEFAULT_LOOKUP_WORKERS = 8  # concurrent file info requests per lookup
+
+# Openers for each supported compression of an index file, in order of
+# preference when a directory has more than one.
+_INDEX_OPENERS = {
+    '': lambda f: f,
+    '.gz': lambda f: gzip.GzipFile(fileobj=f),
+    '.xz': lambda f: lzma.LZMAFile(f),
+}
 
 
 class DebianFinder(finder.SourceFinder):
@@ -12,31 +30,95 @@ class DebianFinder(finder.SourceFinder):
 
     Uses the API documented at
     https://salsa.debian.org/snapshot-team/snapshot/blob/master/API
+
+    The information about each of a source's files is requested
+    concurrently, up to `max_lookup_workers` at a time.
+
+    Passing `debian_index` looks packages up in the archive's ``Packages``
+    and ``Sources`` files first, only falling back to the Snapshot API for
+    those that are not in them.  It may be a `DebianIndex`, or an iterable
+    of the paths and URLs to make one from.
     """
 
     distro = finder.Distro.debian.value
 
+    def __init__(
+        self,
+        *args,
+        max_lookup_workers=DEFAULT_LOOKUP_WORKERS,
+        debian_index=None,
+        **kwargs,
+    ):
+        self.max_lookup_workers = max_lookup_workers
+        super().__init__(*args, **kwargs)
+        if debian_index is not None and not isinstance(
+            debian_index, DebianIndex
+        ):
+            debian_index = DebianIndex(
+                debian_index, session=self.session, timeout=self.timeout
+            )
+        self.debian_index = debian_index
+
     def _find(self):
         source_info = self.get_source_info()
-        hashes = self.get_hashes(source_info)
-        urls = self.get_urls(hashes)
-        return DebianDiscoveredSource(urls, timeout=self.timeout)
+        urls = self.get_local_urls(source_info)
+        if not urls:
+            hashes = self.get_hashes(source_info)
+            urls = self.get_urls(hashes)
+        return DebianDiscoveredSource(
+            urls, timeout=self.timeout, session=self.session
+        )
 
     def get_source_info(self):
         """Return a dict of {name, version} of the source."""
+        if self.debian_index is not None:
+            source_info = self.debian_index.source_info(
+                self.name, self.version
+            )
+            if source_info is not None:
+                return source_info
+        versions = self._cache_get_or_create(
+            f"snapshot-binary-{self.name}", self.get_binary_versions
+        )
+        try:
+            name, version = versions[self.version]
+        except KeyError:
+            raise exceptions.SourceNotFound
+        return dict(name=name, version=version)
+
+    def get_binary_versions(self):
+        """Return a dict of the binary's versions to (source, version)."""
         # This API returns ALL versions of binary packages, you can't
-        # put a version in the API. Here, we grab the output and go
-        # spelunking.
+        # put a version in the API. Here, we grab the output and index it
+        # by version, so that the finder's cache can keep the index for
+        # lookups of other versions of the same binary.  The response
+        # itself can be huge (e.g. for libc6), so is not cached as well.
         url = f"{SNAPSHOT_API}mr/binary/{self.name}/"
-        try:
-            data = self.get_url(url).json()
-        except exceptions.DownloadError:
+        response = self.session.get(url, timeout=self.timeout)
+        if response.status_code != requests.codes.ok:
             raise exceptions.SourceNotFound
-        all_versions = data['result']
-        for info in all_versions:
-            if info['binary_version'] == self.version:
-                return dict(name=info['source'], version=info['version'])
-        raise exceptions.SourceNotFound
+        data = response.json()
+        versions = {}
+        for info in data['result']:
+            versions.setdefault(
+                info['binary_version'], (info['source'], info['version'])
+            )
+        return versions
+
+    def get_local_urls(self, source_info):
+        """Return (name, url) pairs of the source's files from the index.
+
+        :return: None if there is no `debian_index`, or the source is not
+            in it.
+        """
+        if self.debian_index is None:
+            return None
+        files = self.debian_index.source_files(
+            source_info['name'], source_info['version']
+        )
+        if files is None:
+            return None
+        return [(name, f"{SNAPSHOT_API}file/{sha1}") for name, sha1 in files]
 
     def get_hashes(self, source_info):
         # Return a list of file hashes as used by Snapshot.
@@ -54,18 +136,210 @@ class DebianFinder(finder.SourceFinder):
             raise exceptions.SourceNotFound
 
     def get_urls(self, hashes):
-        # Get file name and return (name, url) pairs
-        urls = []
-        for hash in hashes:
-            url = f"{SNAPSHOT_API}mr/file/{hash}/info"
-            data = self.get_url(url).json()
-            # The result data is a list. I am unsure what each element
-            # of the list can be, but it seems like taking the first
-            # returns a valid source file name, which is all we want.
-            result = data['result'][0]
-            name = result['name']
-            urls.append((name, f"{SNAPSHOT_API}file/{hash}"))
-        return urls
+        # Get file names and return (name, url) pairs, in the same order
+        # as the hashes.
+        hashes = list(hashes)
+        workers = min(self.max_lookup_workers, len(hashes))
+        if workers <= 1:
+            return [self.get_file_url(hash) for hash in hashes]
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(self.get_file_url, hashes))
+
+    def get_file_url(self, hash):
+        """Return the (name, url) pair of the file with the given hash."""
+        url = f"{SNAPSHOT_API}mr/file/{hash}/info"
+        data = self.get_url(url).json()
+        # The result data is a list. I am unsure what each element
+        # of the list can be, but it seems like taking the first
+        # returns a valid source file name, which is all we want.
+        result = data['result'][0]
+        name = result['name']
+        return name, f"{SNAPSHOT_API}file/{hash}"
+
+
+class DebianIndex:
+    """An in-memory index of a Debian archive's Packages and Sources files.
+
+    Binary packages are mapped to their sources by the ``Packages`` files,
+    and sources to the SHA-1 digests of their files (by which Snapshot
+    serves them) by the ``Sources`` files.
+
+    :param indexes: An iterable of the paths or URLs of ``Packages`` and
+        ``Sources`` files, which may be compressed with gzip or xz, or of
+        directories to find them in, such as a local mirror or
+        ``/var/lib/apt/lists``.  Files are told apart by their names
+        ending in ``Packages`` or ``Sources``, before any compression
+        suffix.
+    :param session: The requests session to download URLs with.  Defaults
+        to a new connection-pooling session that retries transient
+        failures, like the finders' own.
+    :param timeout: The timeout for downloading URLs, in seconds.
+
+    The files are read the first time the index is used, so the index is
+    best shared between finders.  It is safe to share between threads.
+    """
+
+    def __init__(self, indexes, session=None, timeout=finder.DEFAULT_TIMEOUT):
+        self.indexes = list(indexes)
+        if session is None:
+            session = finder.make_session()
+        self.session = session
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._binaries = None
+        self._sources = None
+
+    def source_info(self, name, version):
+        """Return a dict of {name, version} of a binary package's source.
+
+        :return: None if the binary package is not in the index.
+        """
+        self._load()
+        source = self._binaries.get((name, version))
+        if source is None:
+            return None
+        return dict(name=source[0], version=source[1])
+
+    def source_files(self, name, version):
+        """Return a list of the (name, sha1) of each of a source's files.
+
+        :return: None if the source is not in the index.
+        """
+        self._load()
+        return self._sources.get((name, version))
+
+    def _load(self):
+        with self._lock:
+            if self._binaries is not None:
+                return
+            binaries, sources = {}, {}
+            for index in self._index_files():
+                kind, _ = _index_kind(index)
+                with self._open(index) as f:
+                    if kind == 'Packages':
+                        _parse_packages(f, binaries)
+                    else:
+                        _parse_sources(f, sources)
+            self._binaries, self._sources = binaries, sources
+
+    def _index_files(self):
+        for index in self.indexes:
+            if _is_url(index) or not pathlib.Path(index).is_dir():
+                if _index_kind(index) is None:
+                    raise ValueError(
+                        f"{index} is not a Packages or Sources file"
+                    )
+                yield index
+                continue
+            # Only read one of the compressions of each file.
+            found = {}
+            for path in sorted(pathlib.Path(index).rglob('*')):
+                kind = _index_kind(path.name)
+                if kind is not None and path.is_file():
+                    _, suffix = kind
+                    name = str(path)[: -len(suffix) or None]
+                    found.setdefault(name, {})[suffix] = path
+            for compressions in found.values():
+                yield next(
+                    compressions[suffix]
+                    for suffix in _INDEX_OPENERS
+                    if suffix in compressions
+                )
+
+    @contextlib.contextmanager
+    def _open(self, index):
+        _, suffix = _index_kind(index)
+        with contextlib.ExitStack() as stack:
+            if _is_url(index):
+                response = stack.enter_context(
+                    self.session.get(index, stream=True, timeout=self.timeout)
+                )
+                try:
+                    response.raise_for_status()
+                except requests.exceptions.HTTPError as e:
+                    raise exceptions.DownloadError(e)
+                response.raw.decode_content = True
+                raw = response.raw
+            else:
+                raw = stack.enter_context(open(index, 'rb'))
+            yield stack.enter_context(
+                io.TextIOWrapper(
+                    _INDEX_OPENERS[suffix](raw),
+                    encoding='utf-8',
+                    errors='replace',
+                )
+            )
+
+
+def _is_url(index):
+    return str(index).startswith(('http://', 'https://'))
+
+
+def _index_kind(name):
+    """Return the kind and compression suffix of an index file name.
+
+    :return: None if the name is not of a Packages or Sources file.
+    """
+    name = str(name)
+    for suffix in ('.gz', '.xz'):
+        if name.endswith(suffix):
+            name = name[: -len(suffix)]
+            break
+    else:
+        suffix = ''
+    for kind in ('Packages', 'Sources'):
+        if name.endswith(kind):
+            return kind, suffix
+    return None
+
+
+def _paragraphs(lines, fields):
+    """Yield the named `fields` of each paragraph of a Debian control file.
+
+    Continuation lines of a field are joined to its value by newlines.
+    """
+    paragraph = {}
+    key = None
+    for line in lines:
+        if not line.strip():
+            if paragraph:
+                yield paragraph
+            paragraph = {}
+            key = None
+        elif line[0] in ' \t':
+            if key is not None:
+                paragraph[key] += '\n' + line.strip()
+        else:
+            key, _, value = line.partition(':')
+            if key in fields:
+                paragraph[key] = value.strip()
+            else:
+                key = None
+    if paragraph:
+        yield paragraph
+
+
+def _parse_packages(lines, binaries):
+    for fields in _paragraphs(lines, {'Package', 'Version', 'Source'}):
+        package, version = fields['Package'], fields['Version']
+        # Source is omitted if it is the same as the binary, and has the
+        # source's version in brackets if that differs.
+        source, _, source_version = fields.get('Source', package).partition(
+            ' '
+        )
+        source_version = source_version.strip('() ') or version
+        binaries.setdefault((package, version), (source, source_version))
+
+
+def _parse_sources(lines, sources):
+    for fields in _paragraphs(lines, {'Package', 'Version', 'Checksums-Sha1'}):
+        files = []
+        for line in fields.get('Checksums-Sha1', '').splitlines():
+            if line:
+                sha1, _, name = line.split()
+                files.append((name, sha1))
+        if files:
+            sources.setdefault((fields['Package'], fields['Version']), files)
 
 
 class DebianDiscoveredSource(finder.DiscoveredSource):
@@ -81,9 +355,18 @@ class DebianDiscoveredSource(finder.DiscoveredSource):
         super().__init__(_urls, **kwargs)
         self.names = names
 
+    def member_names(self):
+        return list(self.names)
+
+    def known_digests(self, target_name, url):
+        # Snapshot serves files by their SHA-1 digest.
+        return {'sha1': url.rsplit('/', 1)[-1]}
+
     def populate_archive(self, temp_dir, tar):
-        for name, url in zip(self.names, self.urls):
-            arcfile_name = self.download_file(temp_dir, name, url)
+        arcfile_names = self.download_files(
+            temp_dir, zip(self.names, self.urls)
+        )
+        for name, arcfile_name in zip(self.names, arcfile_names):
             tar.add(arcfile_name, arcname=name, filter=self.reset_tarinfo)
 
     def __repr__(self):
@@ -18,7 +18,15 @@ class GemFinder(finder.SourceFinder):
 
     def _find(self):
         source_url = self.get_source_url()
-        return GemDiscoveredSource([source_url], timeout=self.timeout)
+        return GemDiscoveredSource(
+            [source_url], timeout=self.timeout, session=self.session
+        )
+
+    async def _afind(self):
+        source_url = await self.aget_source_url()
+        return GemDiscoveredSource(
+            [source_url], timeout=self.timeout, session=self.session
+        )
 
     def _get_release_history(self):
         url = f'{GEM_VERSIONS_URL}{self.name}.json'
@@ -26,7 +34,17 @@ class GemFinder(finder.SourceFinder):
             data = self.get_url(url).json()
         except exceptions.DownloadError:
             raise exceptions.SourceNotFound
+        return self._parse_release_history(data)
+
+    async def _aget_release_history(self):
+        url = f'{GEM_VERSIONS_URL}{self.name}.json'
+        try:
+            data = (await self.aget_url(url)).json()
+        except exceptions.DownloadError:
+            raise exceptions.SourceNotFound
+        return self._parse_release_history(data)
 
+    def _parse_release_history(self, data):
         history = []
         for item in data:
             version = item.get('number')
@@ -55,6 +73,13 @@ class GemFinder(finder.SourceFinder):
             raise exceptions.SourceNotFound
         return url
 
+    async def aget_source_url(self):
+        """Asynchronous counterpart to `get_source_url()`."""
+        url = f"{GEM_DOWNLOADS}{self.name}-{self.version}.gem"
+        if not await self.atest_url(url):
+            raise exceptions.SourceNotFound
+        return url
+
 
 class GemDiscoveredSource(finder.DiscoveredSource):
     """A discovered Gem package."""
@@ -33,7 +33,18 @@ class GolangFinder(finder.SourceFinder):
         # Main entrypoint from the parent class.
         if self.test_url(self.original_url):
             return GolangDiscoveredSource(
-                [self.original_url], timeout=self.timeout
+                [self.original_url],
+                timeout=self.timeout,
+                session=self.session,
+            )
+        raise exceptions.SourceNotFound()
+
+    async def _afind(self):
+        if await self.atest_url(self.original_url):
+            return GolangDiscoveredSource(
+                [self.original_url],
+                timeout=self.timeout,
+                session=self.session,
             )
         raise exceptions.SourceNotFound()
 
@@ -43,9 +54,22 @@ class GolangFinder(finder.SourceFinder):
             response = self.get_url(url)
         except exceptions.DownloadError:
             raise exceptions.SourceNotFound
+        history = self._parse_version_list(response.text)
+        return self._order_history(history, self._get_latest_version())
+
+    async def _aget_release_history(self):
+        url = f"{self.goproxy}{self.name.lower()}/@v/list"
+        try:
+            response = await self.aget_url(url)
+        except exceptions.DownloadError:
+            raise exceptions.SourceNotFound
+        history = self._parse_version_list(response.text)
+        latest_version = await self._aget_latest_version()
+        return self._order_history(history, latest_version)
 
+    def _parse_version_list(self, text):
         history = []
-        for line in response.text.splitlines():
+        for line in text.splitlines():
             version = line.strip()
             if not version:
                 continue
@@ -53,7 +77,9 @@ class GolangFinder(finder.SourceFinder):
 
         if history == []:
             raise exceptions.SourceNotFound
-        latest_version = self._get_latest_version()
+        return history
+
+    def _order_history(self, history, latest_version):
         if latest_version and history[0]['version'] == latest_version:
             history.reverse()
         return history
@@ -64,6 +90,17 @@ class GolangFinder(finder.SourceFinder):
             data = self.get_url(url).json()
         except exceptions.DownloadError:
             return None
+        return self._parse_latest_version(data)
+
+    async def _aget_latest_version(self):
+        url = f"{self.goproxy}{self.name.lower()}/@latest"
+        try:
+            data = (await self.aget_url(url)).json()
+        except exceptions.DownloadError:
+            return None
+        return self._parse_latest_version(data)
+
+    def _parse_latest_version(self, data):
         if not isinstance(data, dict):
             return None
         return data.get('Version') or data.get('version')
@@ -26,27 +26,48 @@ class JavaFinder(finder.SourceFinder):
 
     def _find(self):
         source_url = self.get_source_url()
-        return JavaDiscoveredSource([source_url], timeout=self.timeout)
+        return JavaDiscoveredSource(
+            [source_url], timeout=self.timeout, session=self.session
+        )
+
+    async def _afind(self):
+        source_url = await self.aget_source_url()
+        return JavaDiscoveredSource(
+            [source_url], timeout=self.timeout, session=self.session
+        )
 
     def _get_release_history(self):
+        params = self._release_history_params()
+        try:
+            data = self.get_url(MAVEN_SEARCH_URL, params=params).json()
+        except exceptions.DownloadError:
+            raise exceptions.SourceNotFound
+        return self._parse_release_history(data)
+
+    async def _aget_release_history(self):
+        params = self._release_history_params()
+        try:
+            response = await self.aget_url(MAVEN_SEARCH_URL, params=params)
+        except exceptions.DownloadError:
+            raise exceptions.SourceNotFound
+        return self._parse_release_history(response.json())
+
+    def _release_history_params(self):
         # Build query - if group_id is provided, filter by it to avoid
         # matching different artifacts with the same name.
         if self.group_id:
             query = f'g:{self.group_id} AND a:{self.name} l:sources'
         else:
             query = f'a:{self.name} l:sources'
-        params = dict(
+        return dict(
             q=query,
             rows=200,
             core='gav',
             wt='json',
             sort='timestamp asc',
         )
-        try:
-            data = self.get_url(MAVEN_SEARCH_URL, params=params).json()
-        except exceptions.DownloadError:
-            raise exceptions.SourceNotFound
 
+    def _parse_release_history(self, data):
         docs = data.get('response', {}).get('docs', [])
         history = []
         seen = set()
@@ -91,22 +112,41 @@ class JavaFinder(finder.SourceFinder):
         except exceptions.DownloadError:
             raise exceptions.SourceNotFound
 
+        found = self.test_url(
+            MAVEN_REPO_URL,
+            params=self._repo_params(data),
+        )
+        if not found:
+            raise exceptions.SourceNotFound
+        return found.url
+
+    async def aget_source_url(self):
+        """Asynchronous counterpart to `get_source_url()`."""
+        params = dict(q=f'a:{self.name} v:{self.version} l:sources', rows=1)
+        try:
+            response = await self.aget_url(MAVEN_SEARCH_URL, params=params)
+        except exceptions.DownloadError:
+            raise exceptions.SourceNotFound
+
+        found = await self.atest_url(
+            MAVEN_REPO_URL,
+            params=self._repo_params(response.json()),
+        )
+        if not found:
+            raise exceptions.SourceNotFound
+        # httpx has its own URL type.
+        return str(found.url)
+
+    def _repo_params(self, data):
         # Transform the `group` attribute and use it to put together a
         # resource URL from the other data we have.  If it resolves, return
         # it, otherwise the previous search was no good.
         [record] = data['response']['docs']
         group = record['g'].replace('.', '/')
-        params = dict(
+        return dict(
             filepath=f'{group}/{self.name}/{self.version}/'
             f'{self.name}-{self.version}-sources.jar'
         )
-        found = self.test_url(
-            MAVEN_REPO_URL,
-            params=params,
-        )
-        if not found:
-            raise exceptions.SourceNotFound
-        return found.url
 
 
 class JavaDiscoveredSource(finder.DiscoveredSource):
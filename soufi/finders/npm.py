@@ -17,7 +17,15 @@ class NPMFinder(finder.SourceFinder):
 
     def _find(self):
         source_url = self.get_source_url()
-        return NPMDiscoveredSource([source_url], timeout=self.timeout)
+        return NPMDiscoveredSource(
+            [source_url], timeout=self.timeout, session=self.session
+        )
+
+    async def _afind(self):
+        source_url = await self.aget_source_url()
+        return NPMDiscoveredSource(
+            [source_url], timeout=self.timeout, session=self.session
+        )
 
     def _get_release_history(self):
         url = f"{NPM_REGISTRY}{self.name}"
@@ -25,7 +33,17 @@ class NPMFinder(finder.SourceFinder):
             data = self.get_url(url).json()
         except exceptions.DownloadError:
             raise exceptions.SourceNotFound
+        return self._parse_release_history(data)
+
+    async def _aget_release_history(self):
+        url = f"{NPM_REGISTRY}{self.name}"
+        try:
+            data = (await self.aget_url(url)).json()
+        except exceptions.DownloadError:
+            raise exceptions.SourceNotFound
+        return self._parse_release_history(data)
 
+    def _parse_release_history(self, data):
         versions = data.get('versions', {})
         times = data.get('time', {})
         history = []
@@ -69,6 +87,15 @@ class NPMFinder(finder.SourceFinder):
             raise exceptions.SourceNotFound
         return data['dist']['tarball']
 
+    async def aget_source_url(self):
+        """Asynchronous counterpart to `get_source_url()`."""
+        url = f"{NPM_REGISTRY}{self.name}/{self.version}"
+        try:
+            data = (await self.aget_url(url)).json()
+        except exceptions.DownloadError:
+            raise exceptions.SourceNotFound
+        return data['dist']['tarball']
+
 
 class NPMDiscoveredSource(finder.DiscoveredSource):
     """A discovered NPM source package."""
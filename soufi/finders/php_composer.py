@@ -23,6 +23,16 @@ class PHPComposer(finder.SourceFinder):
         return PHPComposerDiscoveredSource(
             [source_url],
             timeout=self.timeout,
+            session=self.session,
+            archive_extension=f".{extension}",
+        )
+
+    async def _afind(self):
+        source_url, extension = await self.aget_source_url()
+        return PHPComposerDiscoveredSource(
+            [source_url],
+            timeout=self.timeout,
+            session=self.session,
             archive_extension=f".{extension}",
         )
 
@@ -45,10 +55,20 @@ class PHPComposer(finder.SourceFinder):
             to use.
         """
         url = f"{DEFAULT_INDEX}p2/{self.name}.json"
-        resp = requests.get(url, timeout=self.timeout)
+        resp = self.session.get(url, timeout=self.timeout)
+        if resp.status_code != requests.codes.ok:
+            raise exceptions.SourceNotFound
+        return self._parse_source_url(url, resp)
+
+    async def aget_source_url(self):
+        """Asynchronous counterpart to `get_source_url()`."""
+        url = f"{DEFAULT_INDEX}p2/{self.name}.json"
+        resp = await self.async_client.get(url, timeout=self.timeout)
         if resp.status_code != requests.codes.ok:
             raise exceptions.SourceNotFound
+        return self._parse_source_url(url, resp)
 
+    def _parse_source_url(self, url, resp):
         try:
             versions = resp.json()["packages"][self.name]
             for version in versions:
@@ -59,7 +79,7 @@ class PHPComposer(finder.SourceFinder):
                     return version["dist"]["url"], version["dist"]["type"]
         except Exception:
             raise exceptions.DownloadError(
-                "Malformed JSON response from {url}"
+                f"Malformed JSON response from {url}"
             )
 
         raise exceptions.SourceNotFound
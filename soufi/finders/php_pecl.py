@@ -3,7 +3,6 @@
 
 
 import defusedxml.lxml
-import requests
 
 from soufi import exceptions, finder
 
@@ -20,7 +19,15 @@ class PHPPECL(finder.SourceFinder):
 
     def _find(self):
         source_url = self.get_source_url()
-        return PHPPECLDiscoveredSource([source_url], timeout=self.timeout)
+        return PHPPECLDiscoveredSource(
+            [source_url], timeout=self.timeout, session=self.session
+        )
+
+    async def _afind(self):
+        source_url = await self.aget_source_url()
+        return PHPPECLDiscoveredSource(
+            [source_url], timeout=self.timeout, session=self.session
+        )
 
     def get_source_url(self):
         """Examine the index to find the source URL for the package.
@@ -31,13 +38,23 @@ class PHPPECL(finder.SourceFinder):
         url = f"{DEFAULT_INDEX}rest/r/{self.name}/{self.version}.xml"
         # The returned XML document contains a <g> element with the URL.
         try:
-            with requests.get(url, stream=True, timeout=30) as r:
+            with self.session.get(url, stream=True, timeout=self.timeout) as r:
                 r.raw.decode_content = True
                 xml = defusedxml.lxml.parse(r.raw)
             return xml.find('.//{*}g').text
         except Exception:
             raise exceptions.SourceNotFound
 
+    async def aget_source_url(self):
+        """Asynchronous counterpart to `get_source_url()`."""
+        url = f"{DEFAULT_INDEX}rest/r/{self.name}/{self.version}.xml"
+        try:
+            response = await self.async_client.get(url, timeout=self.timeout)
+            xml = defusedxml.lxml.fromstring(response.content)
+            return xml.find('.//{*}g').text
+        except Exception:
+            raise exceptions.SourceNotFound
+
 
 class PHPPECLDiscoveredSource(finder.DiscoveredSource):
     """A discovered PHP PECL package."""
@@ -26,7 +26,15 @@ class PythonFinder(finder.SourceFinder):
 
     def _find(self):
         source_url = self.get_source_url()
-        return PythonDiscoveredSource([source_url], timeout=self.timeout)
+        return PythonDiscoveredSource(
+            [source_url], timeout=self.timeout, session=self.session
+        )
+
+    async def _afind(self):
+        source_url = await self.aget_source_url()
+        return PythonDiscoveredSource(
+            [source_url], timeout=self.timeout, session=self.session
+        )
 
     def _get_release_history(self):
         url = f"{self.index}{self.name}/json"
@@ -34,7 +42,17 @@ class PythonFinder(finder.SourceFinder):
             data = self.get_url(url).json()
         except exceptions.DownloadError:
             raise exceptions.SourceNotFound
+        return self._parse_release_history(data)
+
+    async def _aget_release_history(self):
+        url = f"{self.index}{self.name}/json"
+        try:
+            data = (await self.aget_url(url)).json()
+        except exceptions.DownloadError:
+            raise exceptions.SourceNotFound
+        return self._parse_release_history(data)
 
+    def _parse_release_history(self, data):
         history = []
         for version, release_data in data.get('releases', {}).items():
             published_at = None
@@ -74,6 +92,17 @@ class PythonFinder(finder.SourceFinder):
             pass
         return self._get_devpi_source_url()
 
+    async def aget_source_url(self):
+        """Asynchronous counterpart to `get_source_url()`."""
+        try:
+            return await self.aget_pypi_source_url()
+        except (KeyError, exceptions.SourceNotFound):
+            if self.index == DEFAULT_INDEX:
+                # The default is pypi, no point trying devpi.
+                raise
+            pass
+        return await self._aget_devpi_source_url()
+
     def get_pypi_source_url(self):
         """Get URLs for packages that are in a pypi server."""
         url = f"{self.index}{self.name}/{self.version}/json"
@@ -81,6 +110,18 @@ class PythonFinder(finder.SourceFinder):
             data = self.get_url(url).json()
         except exceptions.DownloadError:
             raise exceptions.SourceNotFound
+        return self._parse_pypi_source_url(data)
+
+    async def aget_pypi_source_url(self):
+        """Asynchronous counterpart to `get_pypi_source_url()`."""
+        url = f"{self.index}{self.name}/{self.version}/json"
+        try:
+            data = (await self.aget_url(url)).json()
+        except exceptions.DownloadError:
+            raise exceptions.SourceNotFound
+        return self._parse_pypi_source_url(data)
+
+    def _parse_pypi_source_url(self, data):
         if 'releases' in data:
             releases = data['releases']
             for version, release_data in releases.items():
@@ -113,6 +154,17 @@ class PythonFinder(finder.SourceFinder):
         href = result['+links'][0]['href']
         return href
 
+    async def _aget_devpi_source_url(self):
+        url = f"{self.index}{self.name}/{self.version}"
+        headers = {'Accept': 'application/json'}
+        try:
+            data = (await self.aget_url(url, headers=headers)).json()
+        except exceptions.DownloadError:
+            raise exceptions.SourceNotFound
+        result = data['result']
+        href = result['+links'][0]['href']
+        return href
+
 
 class PythonDiscoveredSource(finder.DiscoveredSource):
     """A discovered Python sdist package."""
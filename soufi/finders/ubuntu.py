@@ -12,6 +12,8 @@ class UbuntuFinder(finder.SourceFinder):
     """Find Ubuntu source files."""
 
     distro = finder.Distro.ubuntu.value
+    # See the note on get_archive below.
+    thread_safe = False
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -21,7 +23,9 @@ class UbuntuFinder(finder.SourceFinder):
         build = self.get_build()
         source = self.get_source_from_build(build)
         urls = tuple(sorted(source.sourceFileUrls()))
-        return UbuntuDiscoveredSource(urls, timeout=self.timeout)
+        return UbuntuDiscoveredSource(
+            urls, timeout=self.timeout, session=self.session
+        )
 
     # NOTE(nic): launchpadlib is not thread-safe, and its objects cannot be
     #  pickled, which means we cannot use self._cache here, as it assumes both.
@@ -70,10 +74,9 @@ class UbuntuDiscoveredSource(finder.DiscoveredSource):
     """A discovered Ubuntu source package."""
 
     def populate_archive(self, temp_dir, tar):
-        # The file name is the last segment of the URL path.
-        names = [url.rsplit('/', 1)[-1] for url in self.urls]
-        for name, url in zip(names, self.urls):
-            arcfile_name = self.download_file(temp_dir, name, url)
+        names = self.member_names()
+        arcfile_names = self.download_files(temp_dir, zip(names, self.urls))
+        for name, arcfile_name in zip(names, arcfile_names):
             tar.add(arcfile_name, arcname=name, filter=self.reset_tarinfo)
 
     def __repr__(self):
@@ -2,16 +2,21 @@
 # All rights reserved.
 
 import abc
+import collections
 import gzip
+import multiprocessing
 import pathlib
 import pickle
+import sqlite3
 import sys
 import textwrap
+import threading
 import warnings
-from multiprocessing import Process, Queue
-from types import SimpleNamespace
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
 
 import defusedxml.lxml
+import lxml.etree
 import repomd
 import requests
 from dogpile.cache.backends.null import NullBackend
@@ -36,13 +41,46 @@ class YumFinder(finder.SourceFinder, metaclass=abc.ABCMeta):
            binary package names do not match.  The version is also ignored
            in this step, for the same reasons.  Then backtrack and attempt
            to lookup that package in the source repos.
+
+    Parsed repo metadata may optionally be persisted across processes by
+    passing `repomd_index`, either as a `RepomdIndex` or as the path of the
+    SQLite database to use for one.
+
+    Repo metadata is parsed in worker processes by default (see
+    `RepomdPool`); a pool may be shared by passing `repomd_pool`, otherwise
+    the module-wide default pool is used.  Passing `isolate_repomd=False`
+    parses metadata in-process instead.
+
+    Repos are loaded one at a time by default.  Passing `prefetch_repos`
+    loads up to that many repos concurrently, ahead of the one being
+    searched; repos are still searched in the order they are generated.
     """
 
-    def __init__(self, *args, source_repos=None, binary_repos=None, **kwargs):
+    def __init__(
+        self,
+        *args,
+        source_repos=None,
+        binary_repos=None,
+        repomd_index=None,
+        isolate_repomd=True,
+        repomd_pool=None,
+        prefetch_repos=0,
+        **kwargs,
+    ):
         self.source_repos = source_repos
         self.binary_repos = binary_repos
+        self.isolate_repomd = isolate_repomd
+        self._repomd_pool = repomd_pool
+        self.prefetch_repos = prefetch_repos
+        if repomd_index is not None and not isinstance(
+            repomd_index, RepomdIndex
+        ):
+            repomd_index = RepomdIndex(repomd_index)
+        self.repomd_index = repomd_index
         super().__init__(*args, **kwargs)
-        if isinstance(self._cache.backend, NullBackend):
+        if repomd_index is None and isinstance(
+            self._cache.backend, NullBackend
+        ):
             warnings.warn(
                 "Use of the Null cache with the DNF/Yum finder is highly "
                 "ill-advised.  Please see the documentation.",
@@ -76,7 +114,9 @@ class YumFinder(finder.SourceFinder, metaclass=abc.ABCMeta):
 
     def _find(self):
         source_url = self.get_source_url()
-        return YumDiscoveredSource([source_url], timeout=self.timeout)
+        return YumDiscoveredSource(
+            [source_url], timeout=self.timeout, session=self.session
+        )
 
     def get_source_url(self):
         """Lookup the URL for the SRPM corresponding to the package name.
@@ -116,12 +156,7 @@ class YumFinder(finder.SourceFinder, metaclass=abc.ABCMeta):
         if version is None:
             version = self.version
         locations = set()
-        for repo_url in self.generate_source_repos():
-            baseurl, repo = self._cache.get_or_create(
-                f"repo-{repo_url}",
-                do_task,
-                creator_args=([get_repomd, repo_url], {}),
-            )
+        for baseurl, repo in self._iter_repos(self.generate_source_repos()):
             for package in repo.get(name, []):
                 # If the package version in the repomd is our version,
                 # it's easy.  Note that we want to match epoch-full and
@@ -144,12 +179,8 @@ class YumFinder(finder.SourceFinder, metaclass=abc.ABCMeta):
 
     def _walk_binary_repos(self, name):
         packages = set()
-        for repo_url in self.generate_binary_repos():
-            _, repo = self._cache.get_or_create(
-                f"repo-{repo_url}",
-                do_task,
-                creator_args=([get_repomd, repo_url], {}),
-            )
+        binary_repos = self.generate_binary_repos()
+        for _, repo in self._iter_repos(binary_repos, binary=True):
             for package in repo.get(name, []):
                 # If we have a binary package matching our version, but
                 # with a different name than the corresponding source
@@ -170,6 +201,75 @@ class YumFinder(finder.SourceFinder, metaclass=abc.ABCMeta):
             return None, None
         return package
 
+    def _iter_repos(self, repo_urls, binary=False):
+        """Yield the base URL and package mapping of each repo, in order."""
+        if not self.prefetch_repos:
+            for repo_url in repo_urls:
+                yield self._get_repo(repo_url, binary)
+            return
+
+        # NOTE(nic): the walkers usually bail out early, so don't hang
+        #  around waiting on repos that are still loading once they do.
+        #  Whatever finishes will still land in the cache for next time.
+        pool = ThreadPoolExecutor(max_workers=self.prefetch_repos)
+        pending = collections.deque()
+        try:
+            for repo_url in repo_urls:
+                pending.append(pool.submit(self._get_repo, repo_url, binary))
+                if len(pending) >= self.prefetch_repos:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            # Python 3.8's shutdown() cannot cancel futures itself.
+            for future in pending:
+                future.cancel()
+            pool.shutdown(wait=False)
+
+    def _get_repo(self, repo_url, binary=False):
+        """Return the base URL and package mapping of a repo.
+
+        The mapping may be a `Repo`, or a view onto the `RepomdIndex`;
+        either way, it is keyed by package name.  Binary repos are only
+        ever used to find source RPMs, so unless they come from the index,
+        they are loaded as `BinaryPackage` records.
+        """
+        if self.repomd_index is not None:
+            return self._get_indexed_repo(repo_url)
+        prefix = 'binary-repo' if binary else 'repo'
+        return self._cache.get_or_create(
+            f"{prefix}-{repo_url}",
+            self._load_repo,
+            creator_args=([repo_url, binary], {}),
+        )
+
+    @property
+    def repomd_pool(self):
+        if self._repomd_pool is None:
+            return default_repomd_pool()
+        return self._repomd_pool
+
+    def _load_repo(self, repo_url, binary=False):
+        if self.isolate_repomd:
+            return self.repomd_pool.apply(get_repomd, repo_url, binary)
+        return get_repomd(repo_url, binary, self.session)
+
+    def _get_indexed_repo(self, repo_url):
+        if not repo_url.endswith('/'):
+            repo_url += '/'
+        # NOTE(nic): the repomd.xml is tiny compared to the primary metadata
+        #  it describes, so revalidating the index against it is cheap.  The
+        #  result is cached like anything else, so with a real cache
+        #  configured it will only be re-fetched once the TTL expires.
+        checksum = self._cache_get_or_create(
+            f"repomd-checksum-{repo_url}",
+            lambda: get_primary_checksum(repo_url, self.session, self.timeout),
+        )
+        if self.repomd_index.checksum(repo_url) != checksum:
+            baseurl, repo = self._load_repo(repo_url)
+            self.repomd_index.store(baseurl, checksum, repo)
+        return repo_url, self.repomd_index.repo(repo_url)
+
     def _nevra_or_none(self, package):
         if package.sourcerpm == '':
             # It's here, but has no sources defined!  Bummer...
@@ -227,60 +327,180 @@ class YumDiscoveredSource(finder.DiscoveredSource):
 #  and makes them less-than-ideal for use inside long-running processes.
 #
 #  To deal with the dearth of effective memory management, we will run
-#  all repomd lookups in subprocesses, that will return any/all "needles"
-#  found in the "haystacks" we provide.  This will let the OS
-#  efficiently reclaim all the pages used upon completion.
-def do_task(target, *args):
-    """Run the target callable in a subprocess and return its response."""
-    queue = Queue()
-    process = Process(target=target, args=(queue,) + args)
-    try:
-        process.start()
-    except RuntimeError as e:
-        if 'not using fork' in str(e):
-            sys.exit(
-                textwrap.dedent(
-                    """
-                FATAL: Running this finder directly from the global scope is
-                not supported on this platform.  To use this finder, call it
-                instead from the main module, e.g.:
-
-                   if __name__ == '__main__':
-                       soufi.finder.factory(*args, **kwargs).find()
-
-                Aborting."""
+#  all repomd lookups in worker processes, that will return any/all
+#  "needles" found in the "haystacks" we provide.  Workers are retired
+#  after a handful of jobs, which will let the OS efficiently reclaim all
+#  the pages they used.
+#
+#  Now that `load_repomd` stream-parses the primary metadata, its peak
+#  memory use no longer grows with the size of the repo, so finders may
+#  opt out of this with `isolate_repomd=False`.
+DEFAULT_POOL_PROCESSES = 4
+DEFAULT_TASKS_PER_CHILD = 8
+# We don't want to wait *forever*, but jobs can take several minutes to
+# complete, so wait a relatively long time
+DEFAULT_TASK_TIMEOUT = 600
+
+
+class _Job:
+    """A job running in a `RepomdPool`, and how it ended."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        # (result, exception), set by the pool's callbacks.  These run
+        # before the `AsyncResult` itself is marked ready, so the outcome
+        # is kept here rather than read back from it.
+        self.outcome = None
+        self.torn_down = False
+
+    def succeed(self, result):
+        self.outcome = (result, None)
+        self.done.set()
+
+    def fail(self, error):
+        self.outcome = (None, error)
+        self.done.set()
+
+    def tear_down(self):
+        self.torn_down = True
+        self.done.set()
+
+
+class RepomdPool:
+    """A long-lived pool of worker processes for loading repo metadata.
+
+    The underlying `multiprocessing.Pool` is started on first use.  Each
+    worker is replaced after `maxtasksperchild` jobs, and any job that
+    takes longer than `timeout` seconds causes the whole pool to be torn
+    down, since that is the only way to get rid of a hung worker; the next
+    job starts a fresh one.  Any other jobs still running in a torn-down
+    pool fail straight away with a `DownloadError`.
+    """
+
+    def __init__(
+        self,
+        processes=DEFAULT_POOL_PROCESSES,
+        maxtasksperchild=DEFAULT_TASKS_PER_CHILD,
+        timeout=DEFAULT_TASK_TIMEOUT,
+    ):
+        self.processes = processes
+        self.maxtasksperchild = maxtasksperchild
+        self.timeout = timeout
+        self._pool = None
+        # The `_Job`s running in the current pool.
+        self._jobs = set()
+        self._lock = threading.Lock()
+
+    def _get_pool(self, job):
+        with self._lock:
+            if self._pool is None:
+                self._pool = self._start_pool()
+            self._jobs.add(job)
+            return self._pool
+
+    def _start_pool(self):
+        try:
+            return multiprocessing.Pool(
+                self.processes, maxtasksperchild=self.maxtasksperchild
+            )
+        except RuntimeError as e:
+            if 'not using fork' in str(e):
+                sys.exit(
+                    textwrap.dedent(
+                        """
+                    FATAL: Running this finder directly from the global scope
+                    is not supported on this platform.  To use this finder,
+                    call it instead from the main module, e.g.:
+
+                       if __name__ == '__main__':
+                           soufi.finder.factory(*args, **kwargs).find()
+
+                    Aborting."""
+                    )
                 )
+            raise
+
+    def apply(self, func, *args):
+        """Run `func(*args)` in a worker process and return its result.
+
+        Exceptions raised by `func` are re-raised here.
+
+        :raises: exceptions.DownloadError if the job times out.
+        """
+        job = _Job()
+        pool = self._get_pool(job)
+        try:
+            pool.apply_async(
+                func, args, callback=job.succeed, error_callback=job.fail
             )
-        raise
-    # We don't want to wait *forever*, but jobs can take several minutes to
-    # complete, so wait a relatively long time
-    response = queue.get(timeout=600)
-    if process.is_alive():
-        process.terminate()
-    # re-raise exceptions thrown in child processes; this should keep them
-    # from getting cached
-    if response and isinstance(response[0], Exception):
-        raise response[0]
-    return response
+            job.done.wait(self.timeout)
+        finally:
+            with self._lock:
+                self._jobs.discard(job)
+        if job.outcome is not None:
+            result, error = job.outcome
+            if error is not None:
+                raise error
+            return result
+        if job.torn_down:
+            raise exceptions.DownloadError(
+                f"Worker pool was torn down while running {func.__name__}"
+            )
+        self._discard(pool)
+        raise exceptions.DownloadError(
+            f"Timed out after {self.timeout}s running {func.__name__}"
+        )
+
+    def _discard(self, pool):
+        with self._lock:
+            jobs = set()
+            if self._pool is pool:
+                self._pool = None
+                jobs, self._jobs = self._jobs, set()
+        pool.terminate()
+        # Fail the other jobs that were running in it.
+        for job in jobs:
+            job.tear_down()
+
+    def terminate(self):
+        """Stop all worker processes, abandoning any jobs in progress."""
+        with self._lock:
+            pool = self._pool
+        if pool is not None:
+            self._discard(pool)
+
+
+_default_pool = None
+_default_pool_lock = threading.Lock()
+
+
+def default_repomd_pool():
+    """Return the `RepomdPool` shared by finders that were not given one."""
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = RepomdPool()
+        return _default_pool
 
 
 # NOTE(nic): stolen almost verbatim from repomd.load, except this one:
 #  - has timeouts
-#  - uses requests instead of urllib to do the heavy lifting
+#  - uses a requests session instead of urllib to do the heavy lifting
 #  - uses `lxml.parse` and file objects instead of `lxml.fromstring`
-#  - returns a plain dict instead of a Repo object
-def load_repomd(url):
+#  - stream-parses the primary metadata one package at a time, instead of
+#    building the whole (potentially huge) tree in memory
+#  - returns our own compact `Repo` instead of a repomd.Repo object
+def load_repomd(url, binary=False, session=None):
+    if session is None:
+        # Both documents live on the same host, so share a connection.
+        with finder.make_session() as session:
+            return load_repomd(url, binary, session)
     timeout = YumFinder.timeout
     baseurl = requests.utils.parse_url(url)
     path = pathlib.PurePosixPath(baseurl.path)
 
     # first we must get the repomd.xml file
-    repomd_path = path / 'repodata' / 'repomd.xml'
-    repomd_url = baseurl._replace(path=str(repomd_path))
-
-    with requests.get(repomd_url, stream=True, timeout=timeout) as r:
-        r.raw.decode_content = True
-        repomd_xml = defusedxml.lxml.parse(r.raw)
+    repomd_xml = fetch_repomd_xml(url, session, timeout)
 
     # determine the location of *primary.xml.gz from the repomd.xml
     primary_element = repomd_xml.find(
@@ -289,57 +509,250 @@ def load_repomd(url):
     primary_path = path / primary_element.get('href')
     primary_url = baseurl._replace(path=str(primary_path))
 
-    # download and consume *-primary.xml into a dict object for fast lookups.
+    # download and consume *-primary.xml into a Repo object for fast lookups.
     # We will use repomd.Package objects rather than reimplement them,
     # but only as an intermediate step (see `serialize_package`, below)
-    repo = {}
-    with requests.get(primary_url, stream=True, timeout=timeout) as r:
+    record = BinaryPackage if binary else Package
+    with session.get(primary_url, stream=True, timeout=timeout) as r:
         r.raw.decode_content = True
         with gzip.GzipFile(fileobj=r.raw) as uncompressed:
-            for element in defusedxml.lxml.parse(uncompressed).getroot():
-                package = repomd.Package(element)
-                repo.setdefault(package.name, [])
-                repo[package.name].append(serialize_package(package))
-    return repo
+            return Repo(iter_primary_packages(uncompressed, record))
+
+
+def iter_primary_packages(source, record=None):
+    """Stream-parse primary metadata, yielding serialized packages.
+
+    Each <package> element is discarded as soon as it has been serialized,
+    along with any preceding siblings, so memory use stays flat no matter
+    how large the document is.
 
+    :param source: a file object containing uncompressed primary XML.
+    :param record: the type to serialize packages as (see
+        `serialize_package`); defaults to `Package`.
+    """
+    if record is None:
+        record = Package
+    # NOTE(nic): defusedxml has no streaming API, so disable the features
+    #  it would otherwise protect us from directly.
+    parser = lxml.etree.iterparse(
+        source,
+        tag=f"{{{repomd._ns['common']}}}package",
+        resolve_entities=False,
+        no_network=True,
+    )
+    for _, element in parser:
+        yield serialize_package(repomd.Package(element), record)
+        element.clear()
+        while element.getprevious() is not None:
+            del element.getparent()[0]
+
+
+def fetch_repomd_xml(url, session, timeout):
+    """Download and parse the repomd.xml file of the repo at `url`."""
+    baseurl = requests.utils.parse_url(url)
+    path = pathlib.PurePosixPath(baseurl.path)
+    repomd_path = path / 'repodata' / 'repomd.xml'
+    repomd_url = baseurl._replace(path=str(repomd_path))
+    with session.get(repomd_url, stream=True, timeout=timeout) as r:
+        r.raw.decode_content = True
+        return defusedxml.lxml.parse(r.raw)
 
-def get_repomd(queue, url):
+
+def get_primary_checksum(url, session, timeout):
+    """Return the checksum of the primary metadata of the repo at `url`.
+
+    :raises: exceptions.DownloadError if the repomd.xml does not have one.
+    """
+    checksum = fetch_repomd_xml(url, session, timeout).findtext(
+        'repo:data[@type="primary"]/repo:checksum', namespaces=repomd._ns
+    )
+    if not checksum:
+        raise exceptions.DownloadError(f"No primary checksum in {url}")
+    return checksum
+
+
+def get_repomd(url, binary=False, session=None):
+    """Load the repo at `url`, returning its base URL and `Repo`.
+
+    :param session: The requests session to download the metadata with.
+        If not given, as in worker processes, a new one is made and closed
+        again afterwards.
+    """
     if not url.endswith('/'):
         url += '/'
     try:
-        repo = load_repomd(url)
+        return url, load_repomd(url, binary, session)
     except Exception as e:
-        # Try and send exceptions back to the caller, just like anything
-        # else.  It's up to the receiver to inspect and re-raise.  If the
-        # exception cannot be serialized, send back a generic Exception.
+        # Exceptions raised in worker processes are sent back to the caller,
+        # so make sure they can survive the trip.  If the exception cannot
+        # be serialized, send back a generic Exception.
         try:
             pickle.dumps(e)
         except Exception:
-            e = Exception(
+            raise Exception(
                 f"Could not serialize {e.__class__.__name__}, "
                 f"re-raising as plain Exception with msg: {str(e)}"
-            )
-
-        queue.put((e,), timeout=YumFinder.timeout)
-        return
-    queue.put((url, repo))
+            ) from None
+        raise
 
 
 # NOTE(nic): repomd.Package object properties do XPath lookups into the
 #  ElementTree and other similar tricks on the backend, which makes them
 #  unsuitable for the IPC-based workflow we're trying to use, so we'll
-#  convert them into simple objects with identical field names so that they
+#  convert them into simple records with identical field names so that they
 #  can be easily pickled and passed around.  The upside is that we only need
 #  to carry over what we need to do package lookups, reducing the space
 #  requirements by at least two orders of magnitude.  The downside is that we
 #  only get what we've carried over, but in practice that's the opposite of
 #  a problem.
-def serialize_package(package):
-    return SimpleNamespace(
-        name=str(package.name),
-        version=str(package.version),
-        vr=str(package.vr),
-        evr=str(package.evr),
-        location=str(package.location),
-        sourcerpm=str(package.sourcerpm),
+#
+#  Records are tuples, so they don't carry a per-object dict of field names
+#  around, and their strings are interned: a source RPM filename is shared
+#  by every binary package built from it, and pickle only writes out each
+#  distinct string object once.
+class Package(NamedTuple):
+    """A package from a repo's primary metadata."""
+
+    name: str
+    version: str
+    vr: str
+    evr: str
+    location: str
+    sourcerpm: str
+
+
+class BinaryPackage(NamedTuple):
+    """Just enough of a binary package to find its source RPM."""
+
+    name: str
+    vr: str
+    evr: str
+    sourcerpm: str
+
+
+def serialize_package(package, record=Package):
+    return record(
+        *(sys.intern(str(getattr(package, field))) for field in record._fields)
     )
+
+
+class Repo:
+    """The packages in a repo, grouped by name.
+
+    This supports just enough of the dict protocol to be used as a mapping
+    of package names to packages.
+    """
+
+    __slots__ = ('_packages',)
+
+    def __init__(self, packages=()):
+        by_name = {}
+        for package in packages:
+            by_name.setdefault(package.name, []).append(package)
+        self._packages = {k: tuple(v) for k, v in by_name.items()}
+
+    def __iter__(self):
+        for packages in self._packages.values():
+            yield from packages
+
+    def get(self, name, default=None):
+        return self._packages.get(name, default)
+
+
+_INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS repos (
+    url TEXT PRIMARY KEY,
+    checksum TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS packages (
+    url TEXT NOT NULL,
+    name TEXT NOT NULL,
+    version TEXT NOT NULL,
+    vr TEXT NOT NULL,
+    evr TEXT NOT NULL,
+    location TEXT NOT NULL,
+    sourcerpm TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS packages_url_name ON packages (url, name);
+"""
+
+
+class RepomdIndex:
+    """A persistent, on-disk index of parsed repo metadata.
+
+    Only the fields of `Package` records are stored, in an
+    SQLite database keyed by repo URL and the checksum of the repo's
+    primary metadata.  This lets lookups survive process restarts without
+    downloading and parsing the primary metadata again, until such time as
+    the repo publishes new metadata.
+
+    The index is safe to share between threads and processes.
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+        # SQLite connections may not be shared across threads, so keep one
+        # per thread.
+        self._local = threading.local()
+        with self._connection() as conn:
+            conn.executescript(_INDEX_SCHEMA)
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=YumFinder.timeout)
+            self._local.conn = conn
+        return conn
+
+    def checksum(self, url):
+        """Return the checksum the repo at `url` was indexed with, if any."""
+        row = (
+            self._connection()
+            .execute('SELECT checksum FROM repos WHERE url = ?', (url,))
+            .fetchone()
+        )
+        return None if row is None else row[0]
+
+    def store(self, url, checksum, repo):
+        """Replace the indexed packages of the repo at `url`.
+
+        :param repo: a `Repo` of `Package` records, as returned by
+            `load_repomd`.
+        """
+        rows = ((url, *package) for package in repo)
+        with self._connection() as conn:
+            conn.execute('DELETE FROM packages WHERE url = ?', (url,))
+            conn.executemany(
+                'INSERT INTO packages VALUES (?, ?, ?, ?, ?, ?, ?)', rows
+            )
+            conn.execute(
+                'INSERT OR REPLACE INTO repos VALUES (?, ?)', (url, checksum)
+            )
+
+    def get(self, url, name):
+        """Return the `Package` records named `name` in the repo at `url`."""
+        rows = self._connection().execute(
+            f"SELECT {', '.join(Package._fields)} FROM packages "  # noqa: S608
+            "WHERE url = ? AND name = ? ORDER BY rowid",
+            (url, name),
+        )
+        return [Package(*row) for row in rows]
+
+    def repo(self, url):
+        """Return a read-only, dict-like view of the repo at `url`."""
+        return IndexedRepo(self, url)
+
+
+class IndexedRepo:
+    """A read-only view of a single repo in a `RepomdIndex`.
+
+    This supports the same lookups as the `Repo` returned by
+    `load_repomd`.
+    """
+
+    def __init__(self, index, url):
+        self.index = index
+        self.url = url
+
+    def get(self, name, default=None):
+        return self.index.get(self.url, name) or default
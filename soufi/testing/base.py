@@ -1,11 +1,14 @@
 # Copyright (c) 2021-2023 Cisco Systems, Inc. and its affiliates
 # All rights reserved.
 
+import asyncio
+import inspect
 import itertools
 from importlib import import_module
 from unittest import mock
-from unittest.mock import MagicMock
+from unittest.mock import AsyncMock, MagicMock
 
+import httpx
 import requests
 import testtools
 
@@ -53,7 +56,8 @@ class TestCase(testtools.TestCase):
     ) -> MagicMock:
         """Patch `obj.attribute` with `value`.
 
-        If `value` is unspecified, a new `MagicMock` will be created and
+        If `value` is unspecified, a new `MagicMock` (or `AsyncMock`, if the
+        replaced object is a coroutine function) will be created and
         patched-in instead. Its ``__name__`` attribute will be set to
         `attribute` or the ``__name__`` of the replaced object if `attribute`
         is not given.
@@ -75,7 +79,10 @@ class TestCase(testtools.TestCase):
                 # Prevent footgunning.
                 raise AttributeError(f"{attribute} does not exist on {obj}")
         if value is mock.sentinel.unset:
-            value = MagicMock(__name__=attribute)
+            if inspect.iscoroutinefunction(getattr(obj, attribute)):
+                value = AsyncMock(__name__=attribute)
+            else:
+                value = MagicMock(__name__=attribute)
         super().patch(obj, attribute, value)
         return value
 
@@ -97,7 +104,7 @@ class TestCase(testtools.TestCase):
     def patch_get_with_response(
         self, response_code, data=None, json=None, as_text=False
     ):
-        """Patch `requests.get` with the provided values.
+        """Patch `requests.Session.get` with the provided values.
 
         :param response_code: A requests.codes value, to mimic an HTTP status
         :param data: A string-like object to mimic Response.content
@@ -112,10 +119,10 @@ class TestCase(testtools.TestCase):
         else:
             fake_response.return_value.content = data
         fake_response.return_value.json.return_value = json
-        return self.patch(requests, 'get', fake_response)
+        return self.patch(requests.Session, 'get', fake_response)
 
     def patch_head_with_response(self, response_code):
-        """Patch `requests.head` with the provided values.
+        """Patch `requests.Session.head` with the provided values.
 
         HEAD requests have an empty message body, so no data is accepted.
 
@@ -124,4 +131,41 @@ class TestCase(testtools.TestCase):
         """
         fake_response = mock.MagicMock()
         fake_response.return_value.status_code = response_code
-        return self.patch(requests, 'head', fake_response)
+        return self.patch(requests.Session, 'head', fake_response)
+
+    def patch_async_client(
+        self,
+        finder,
+        response_code=httpx.codes.OK,
+        content=None,
+        json=None,
+        responder=None,
+    ):
+        """Give `finder` an `httpx.AsyncClient` that answers locally.
+
+        Every request is answered with the provided values, unless
+        `responder` is given, in which case it is called with each
+        `httpx.Request` and must return an `httpx.Response`.
+
+        :param finder: The SourceFinder to patch
+        :param response_code: An httpx.codes value, to mimic an HTTP status
+        :param content: A bytes-like object to mimic Response.content
+        :param json: A dict or list, to mimic what Response.json() would return
+        :param responder: Optional callable to make responses
+        :return: A MagicMock wrapping the responder, to inspect the requests
+            that were made.
+        """
+        if responder is None:
+            responder = lambda request: httpx.Response(
+                response_code, content=content, json=json
+            )
+        handler = mock.MagicMock(side_effect=responder)
+        client = httpx.AsyncClient(
+            transport=httpx.MockTransport(handler), follow_redirects=True
+        )
+        self.patch(finder, '_async_client', client)
+        return handler
+
+    def run_async(self, coro):
+        """Run a coroutine to completion and return its result."""
+        return asyncio.run(coro)
@@ -2,16 +2,23 @@
 # All rights reserved.
 
 import os
+import subprocess
 import tarfile
 import tempfile
+import threading
+import time
 import urllib
 import warnings
+from concurrent.futures import ThreadPoolExecutor
 from hashlib import sha512
 from io import BytesIO
 from pathlib import Path
+from unittest import mock
 
 import fixtures
+import requests
 import testtools
+from testtools import ExpectedException
 from testtools.matchers import Equals
 from testtools.matchers._basic import SameMembers
 
@@ -144,6 +151,453 @@ class TestAlpineFinder(base.TestCase):
             SameMembers(['ftp://ftp.nluug.nl/pub/gnu/gdbm/gdbm-1.13.tar.gz']),
         )
 
+    def make_aports(self):
+        return str(Path(self.useFixture(fixtures.TempDir()).path).resolve())
+
+    def make_apkbuild(self, aports_dir, name, subpackages='', pkgver='1.0'):
+        path = Path(aports_dir) / 'main' / name
+        path.mkdir(parents=True, exist_ok=True)
+        (path / 'APKBUILD').write_text(
+            f'pkgver={pkgver}\npkgrel=0\nsubpackages="{subpackages}"\n'
+            f'source="https://example.com/{name}-$pkgver.tar.gz"\n'
+        )
+        return path / 'APKBUILD'
+
+    def make_indexing_finder(self, aports_dir, **kwargs):
+        finder = alpine.AlpineFinder(
+            aports_dir=aports_dir, s_type=SourceType.os, **kwargs
+        )
+        parse = self.patch(
+            finder, '_parse_apkbuild', mock.Mock(wraps=finder._parse_apkbuild)
+        )
+        return finder, parse
+
+    def test_subpackage_lookups_parse_each_apkbuild_once(self):
+        aports_dir = self.make_aports()
+        self.make_apkbuild(aports_dir, 'foo', 'foo-dev foo-doc')
+        self.make_apkbuild(aports_dir, 'bar', 'bar-libs:libs')
+        finder, parse = self.make_indexing_finder(aports_dir)
+        finder.find('foo-doc', '1.0-0')
+        finder.find('bar-libs', '1.0-0')
+        finder.find('bar', '1.0-0')
+        self.assertEqual(2, parse.call_count)
+
+    def test_package_lookups_only_parse_that_apkbuild(self):
+        aports_dir = self.make_aports()
+        self.make_apkbuild(aports_dir, 'foo')
+        self.make_apkbuild(aports_dir, 'bar')
+        finder, parse = self.make_indexing_finder(aports_dir)
+        finder.find('foo', '1.0-0')
+        parse.assert_called_once_with(
+            Path(aports_dir, 'main/foo/APKBUILD'), mock.ANY
+        )
+
+    def test_reparses_modified_apkbuilds(self):
+        aports_dir = self.make_aports()
+        path = self.make_apkbuild(aports_dir, 'foo', 'foo-dev')
+        finder, parse = self.make_indexing_finder(aports_dir)
+        finder.find('foo-dev', '1.0-0')
+        self.make_apkbuild(aports_dir, 'foo', 'foo-dev', pkgver='2.0')
+        os.utime(path, ns=(0, 0))
+        source = finder.find('foo-dev', '2.0-0')
+        self.assertEqual(
+            ['https://example.com/foo-2.0.tar.gz'], list(source.urls)
+        )
+        self.assertEqual(2, parse.call_count)
+
+    def test_forgets_removed_apkbuilds(self):
+        aports_dir = self.make_aports()
+        path = self.make_apkbuild(aports_dir, 'foo', 'foo-dev')
+        finder, _ = self.make_indexing_finder(aports_dir)
+        finder.find('foo-dev', '1.0-0')
+        path.unlink()
+        with testtools.ExpectedException(exceptions.SourceNotFound):
+            finder.find('foo-dev', '1.0-0')
+
+    def test_persists_index(self):
+        aports_dir = self.make_aports()
+        self.make_apkbuild(aports_dir, 'foo', 'foo-dev')
+        index = Path(self.make_aports()) / 'index.db'
+        finder, _ = self.make_indexing_finder(aports_dir, apkbuild_index=index)
+        finder.find('foo-dev', '1.0-0')
+
+        finder, parse = self.make_indexing_finder(
+            aports_dir, apkbuild_index=index
+        )
+        finder.find('foo-dev', '1.0-0')
+        self.assertIsInstance(finder.apkbuild_index, alpine.ApkbuildIndex)
+        parse.assert_not_called()
+
+    def test_does_not_rescan_unmoved_git_checkout(self):
+        aports_dir = self.make_aports()
+        self.make_apkbuild(aports_dir, 'foo')
+        self.patch(alpine, 'get_git_revision').return_value = 'abc123'
+        finder, _ = self.make_indexing_finder(aports_dir)
+        find_apkbuilds = self.patch(
+            finder,
+            '_find_apkbuilds',
+            mock.Mock(wraps=finder._find_apkbuilds),
+        )
+        finder.find('foo', '1.0-0')
+        finder.find('foo', '1.0-0')
+        find_apkbuilds.assert_called_once_with(aports_dir)
+
+    def test_evaluates_apkbuilds_concurrently(self):
+        aports_dir = self.make_aports()
+        for i in range(10):
+            self.make_apkbuild(aports_dir, f"foo{i}", f"foo{i}-dev")
+        executor = self.patch(
+            alpine,
+            'ThreadPoolExecutor',
+            mock.Mock(wraps=ThreadPoolExecutor),
+        )
+        finder, parse = self.make_indexing_finder(
+            aports_dir, apkbuild_workers=4
+        )
+        for i in range(10):
+            source = finder.find(f"foo{i}-dev", '1.0-0')
+            self.assertEqual(
+                [f"https://example.com/foo{i}-1.0.tar.gz"], list(source.urls)
+            )
+        executor.assert_called_once_with(4)
+        self.assertEqual(10, parse.call_count)
+
+    def test_evaluates_apkbuilds_serially_with_one_worker(self):
+        aports_dir = self.make_aports()
+        self.make_apkbuild(aports_dir, 'foo', 'foo-dev')
+        self.make_apkbuild(aports_dir, 'bar', 'bar-dev')
+        executor = self.patch(alpine, 'ThreadPoolExecutor')
+        finder, _ = self.make_indexing_finder(aports_dir, apkbuild_workers=1)
+        finder.find('bar-dev', '1.0-0')
+        executor.assert_not_called()
+
+    def test_parse_apkbuild_starts_its_own_shell(self):
+        finder = self.make_finder()
+        apkbuild = finder._parse_apkbuild(
+            self.aports_dir / 'main' / 'dbus' / 'APKBUILD'
+        )
+        self.assertEqual('1.12.20', apkbuild['pkgver'])
+        self.assertEqual('2', apkbuild['pkgrel'])
+        self.assertIn('dbus-dev', apkbuild['subpackages'])
+
+    def test_apkbuild_workers_defaults_to_cpu_count(self):
+        self.patch(os, 'cpu_count').return_value = 7
+        finder, _ = self.make_indexing_finder(self.make_aports())
+        self.assertEqual(7, finder.apkbuild_workers)
+
+    def test_only_lists_changed_repo_dirs(self):
+        aports_dir = self.make_aports()
+        self.make_apkbuild(aports_dir, 'foo')
+        community = Path(aports_dir) / 'community'
+        (community / 'bar').mkdir(parents=True)
+        (community / 'bar' / 'APKBUILD').write_text('pkgver=1.0\npkgrel=0\n')
+        os.utime(community, ns=(0, 0))
+        finder, _ = self.make_indexing_finder(aports_dir)
+        finder.find('bar', '1.0-0')
+
+        scandir = self.patch(os, 'scandir', mock.Mock(wraps=os.scandir))
+        (community / 'baz').mkdir()
+        (community / 'baz' / 'APKBUILD').write_text('pkgver=2.0\npkgrel=0\n')
+        finder.find('baz', '2.0-0')
+        self.assertEqual(
+            [mock.call(aports_dir), mock.call(str(community))],
+            scandir.call_args_list,
+        )
+
+    def test_reuses_persisted_listing(self):
+        aports_dir = self.make_aports()
+        self.make_apkbuild(aports_dir, 'foo')
+        index = Path(self.make_aports()) / 'index.db'
+        finder, _ = self.make_indexing_finder(aports_dir, apkbuild_index=index)
+        finder.find('foo', '1.0-0')
+
+        scandir = self.patch(os, 'scandir', mock.Mock(wraps=os.scandir))
+        finder, _ = self.make_indexing_finder(aports_dir, apkbuild_index=index)
+        finder.find('foo', '1.0-0')
+        scandir.assert_called_once_with(aports_dir)
+
+    def test_ignores_things_that_are_not_packages(self):
+        aports_dir = self.make_aports()
+        self.make_apkbuild(aports_dir, 'foo')
+        (Path(aports_dir) / '.git' / 'foo').mkdir(parents=True)
+        (Path(aports_dir) / '.git' / 'foo' / 'APKBUILD').write_text('')
+        (Path(aports_dir) / 'README').write_text('')
+        (Path(aports_dir) / 'main' / 'README').write_text('')
+        (Path(aports_dir) / 'main' / 'empty').mkdir()
+        finder, _ = self.make_indexing_finder(aports_dir)
+        finder.find('foo', '1.0-0')
+        listing, apkbuilds = finder._find_apkbuilds(aports_dir)
+        self.assertEqual(['main'], list(listing))
+        self.assertEqual(['empty', 'foo'], listing['main'][1])
+        self.assertEqual(
+            [os.path.join(aports_dir, 'main', 'foo', 'APKBUILD')],
+            list(apkbuilds),
+        )
+
+    def make_branches(self):
+        branches = [self.make_aports() for _ in range(3)]
+        for branch, pkgver in zip(branches, ('1.0', '2.0', '2.0')):
+            self.make_apkbuild(branch, 'foo', 'foo-dev', pkgver=pkgver)
+        return branches
+
+    def test_searches_several_branches_concurrently(self):
+        branches = self.make_branches()
+        executor = self.patch(
+            alpine,
+            'ThreadPoolExecutor',
+            mock.Mock(wraps=ThreadPoolExecutor),
+        )
+        finder, parse = self.make_indexing_finder(branches, apkbuild_workers=1)
+        self.assertEqual(branches, finder.aports_dirs)
+        source = finder.find('foo-dev', '1.0-r0')
+        self.assertEqual(branches[0], source.aports_dir)
+        executor.assert_called_once_with(3)
+        # The first branch in the list wins when several match.
+        source = finder.find('foo-dev', '2.0-r0')
+        self.assertEqual(branches[1], source.aports_dir)
+        source = finder.find('foo', '2.0-r0')
+        self.assertEqual(branches[1], source.aports_dir)
+        # Each branch's APKBUILD was only evaluated once.
+        self.assertEqual(3, parse.call_count)
+
+    def test_resolves_aports_dirs(self):
+        aports_dir = self.make_aports()
+        self.make_apkbuild(aports_dir, 'foo')
+        link = Path(self.make_aports()) / 'link'
+        link.symlink_to(aports_dir)
+        finder, _ = self.make_indexing_finder([link / 'main' / '..'])
+        self.assertEqual([aports_dir], finder.aports_dirs)
+        source = finder.find('foo', '1.0-r0')
+        self.assertEqual(aports_dir, source.aports_dir)
+
+    def test_branches_share_apkbuild_workers(self):
+        branches = [self.make_aports() for _ in range(3)]
+        for branch in branches:
+            for i in range(4):
+                self.make_apkbuild(branch, f"foo{i}", f"foo{i}-dev")
+        lock = threading.Lock()
+        running = []
+        most = []
+
+        class CountingShell(alpine.ApkbuildShell):
+            def __enter__(self):
+                with lock:
+                    running.append(self)
+                    most.append(len(running))
+                # Give the other threads a chance to start shells.
+                time.sleep(0.05)
+                return super().__enter__()
+
+            def __exit__(self, *exc_info):
+                with lock:
+                    running.remove(self)
+                return super().__exit__(*exc_info)
+
+        self.patch(alpine, 'ApkbuildShell', CountingShell)
+        finder, parse = self.make_indexing_finder(branches, apkbuild_workers=2)
+        source = finder.find('foo3-dev', '1.0-r0')
+        self.assertEqual(branches[0], source.aports_dir)
+        self.assertEqual(12, parse.call_count)
+        self.assertEqual(2, max(most))
+
+    def test_raises_when_no_branch_matches(self):
+        finder, _ = self.make_indexing_finder(self.make_branches())
+        with testtools.ExpectedException(exceptions.SourceNotFound):
+            finder.find('foo', '3.0-r0')
+        with testtools.ExpectedException(exceptions.SourceNotFound):
+            finder.find('bar', '1.0-r0')
+
+    def test_bad_apkbuild_in_one_branch_does_not_hide_others(self):
+        branches = self.make_branches()
+        (Path(branches[0]) / 'main' / 'foo' / 'APKBUILD').write_text(
+            'echo broken >&2\n'
+        )
+        finder, _ = self.make_indexing_finder(branches)
+        source = finder.find('foo', '2.0-r0')
+        self.assertEqual(branches[1], source.aports_dir)
+        with testtools.ExpectedException(exceptions.DownloadError, '.*broken'):
+            finder.find('foo', '3.0-r0')
+
+    def test_skips_bad_apkbuilds_when_searching_subpackages(self):
+        aports_dir = self.make_aports()
+        self.make_apkbuild(aports_dir, 'foo', 'foo-dev')
+        bad = Path(aports_dir) / 'main' / 'bad'
+        bad.mkdir()
+        (bad / 'APKBUILD').write_text('echo broken >&2\n')
+        finder, parse = self.make_indexing_finder(aports_dir)
+        finder.find('foo-dev', '1.0-0')
+        # The error is remembered, not parsed again.
+        for _ in range(2):
+            with testtools.ExpectedException(
+                exceptions.DownloadError, '.*broken'
+            ):
+                finder.find('bad', '1.0-0')
+        self.assertEqual(2, parse.call_count)
+
+
+class TestApkbuildShell(base.TestCase):
+    def make_apkbuild(self, content):
+        path = Path(self.useFixture(fixtures.TempDir()).path) / 'APKBUILD'
+        path.write_text(content)
+        return path
+
+    def make_shell(self):
+        shell = alpine.ApkbuildShell()
+        self.addCleanup(shell.close)
+        return shell
+
+    def test_evaluates_many_apkbuilds_in_one_process(self):
+        first = self.make_apkbuild(
+            'pkgver=1.0\npkgrel=2\nsubpackages="foo-dev"\nsource="a b"\n'
+        )
+        # Relative paths are sourced from the APKBUILD's directory, stdout
+        # is ignored, and nothing leaks from the previous APKBUILD.
+        second = self.make_apkbuild('pkgver=3.0\n. ./common.sh\necho hi\n')
+        (second.parent / 'common.sh').write_text('pkgrel=4\n')
+        shell = self.make_shell()
+        self.assertEqual('a b\nfoo-dev\n\n1.0\n2\n\n', shell.evaluate(first))
+        pid = shell._proc.pid
+        self.assertEqual('\n\n\n3.0\n4\n\n', shell.evaluate(second))
+        self.assertEqual(pid, shell._proc.pid)
+
+    def test_evaluates_relative_paths(self):
+        path = self.make_apkbuild('pkgver=1\n')
+        self.useFixture(fixtures.MonkeyPatch('os.getcwd', lambda: '/'))
+        shell = self.make_shell()
+        self.assertEqual(
+            '\n\n\n1\n\n\n', shell.evaluate(os.path.relpath(path, '/'))
+        )
+
+    def test_raises_on_stderr(self):
+        path = self.make_apkbuild('echo oops >&2\n')
+        shell = self.make_shell()
+        with testtools.ExpectedException(subprocess.SubprocessError, 'oops'):
+            shell.evaluate(path)
+        # The shell is still usable.
+        self.assertEqual(
+            '\n\n\n1\n\n\n',
+            shell.evaluate(self.make_apkbuild('pkgver=1\n')),
+        )
+
+    def test_raises_on_error_exit(self):
+        path = self.make_apkbuild('exit 3\n')
+        with testtools.ExpectedException(
+            subprocess.CalledProcessError, '.*exit status 3'
+        ):
+            self.make_shell().evaluate(path)
+
+    def test_apkbuilds_cannot_read_stdin(self):
+        path = self.make_apkbuild('read -r pkgver\npkgrel=1\n')
+        shell = self.make_shell()
+        self.assertEqual('\n\n\n\n1\n\n', shell.evaluate(path))
+        self.assertEqual('\n\n\n\n1\n\n', shell.evaluate(path))
+
+    def test_restarts_after_timeout(self):
+        shell = alpine.ApkbuildShell(timeout=0.5)
+        self.addCleanup(shell.close)
+        with testtools.ExpectedException(subprocess.TimeoutExpired):
+            shell.evaluate(self.make_apkbuild('sleep 60\n'))
+        self.assertIsNone(shell._proc)
+        self.assertEqual(
+            '\n\n\n1\n\n\n',
+            shell.evaluate(self.make_apkbuild('pkgver=1\n')),
+        )
+
+    def test_rejects_paths_with_newlines(self):
+        with testtools.ExpectedException(
+            subprocess.SubprocessError, 'Invalid APKBUILD path'
+        ):
+            self.make_shell().evaluate('foo\nbar')
+
+    def test_restarts_after_shell_exits(self):
+        path = self.make_apkbuild('pkgver=1\n')
+        shell = self.make_shell()
+        shell.evaluate(path)
+        # Swap in a pipe that has been closed, as if the shell had exited.
+        read_fd, write_fd = os.pipe()
+        os.close(write_fd)
+        shell._proc.stdout.close()
+        shell._proc.stdout = open(read_fd, 'rb')
+        with testtools.ExpectedException(
+            subprocess.SubprocessError, 'APKBUILD shell exited unexpectedly'
+        ):
+            shell.evaluate(path)
+        self.assertIsNone(shell._proc)
+        self.assertEqual('\n\n\n1\n\n\n', shell.evaluate(path))
+
+    def test_restarts_after_broken_pipe(self):
+        path = self.make_apkbuild('pkgver=1\n')
+        shell = self.make_shell()
+        shell.evaluate(path)
+        proc = shell._proc
+        proc.stdin.close()
+        proc.wait()
+        proc.stdin = mock.Mock(
+            **{
+                'write.side_effect': BrokenPipeError,
+                'close.side_effect': BrokenPipeError,
+            }
+        )
+        with testtools.ExpectedException(
+            subprocess.SubprocessError, 'APKBUILD shell exited unexpectedly'
+        ):
+            shell.evaluate(path)
+        self.assertEqual('\n\n\n1\n\n\n', shell.evaluate(path))
+
+    def test_close_without_starting(self):
+        shell = alpine.ApkbuildShell()
+        with shell:
+            pass
+        self.assertIsNone(shell._proc)
+
+
+class TestGetGitRevision(base.TestCase):
+    def test_returns_none_when_not_a_checkout(self):
+        tmpdir = self.useFixture(fixtures.TempDir()).path
+        self.assertIsNone(alpine.get_git_revision(tmpdir))
+
+    def test_returns_head(self):
+        tmpdir = self.useFixture(fixtures.TempDir()).path
+        os.mkdir(Path(tmpdir) / '.git')
+        run = self.patch(subprocess, 'run')
+        run.return_value.stdout = b'abc123\n'
+        self.assertEqual('abc123', alpine.get_git_revision(tmpdir))
+        run.assert_called_once_with(
+            ['git', '-C', tmpdir, 'rev-parse', 'HEAD'],
+            capture_output=True,
+            check=True,
+        )
+
+    def test_returns_none_when_git_fails(self):
+        tmpdir = self.useFixture(fixtures.TempDir()).path
+        os.mkdir(Path(tmpdir) / '.git')
+        self.assertIsNone(alpine.get_git_revision(tmpdir))
+
+
+class TestApkbuildIndex(base.TestCase):
+    def test_get_returns_nothing_for_unknown_apkbuild(self):
+        index = alpine.ApkbuildIndex()
+        self.assertEqual(
+            (None, None),
+            index.get(self.factory.make_string(), self.factory.make_string()),
+        )
+
+    def test_provider_ignores_virtual_provides(self):
+        index = alpine.ApkbuildIndex()
+        metadata = dict(subpackages=['foo-dev'], provides=['foo-x=1', 'bar'])
+        index.update('aports', None, {'path': ('foo', 1)})
+        index.store('aports', {'path': (metadata, None)})
+        self.assertEqual('path', index.provider('aports', 'foo-dev'))
+        self.assertEqual('path', index.provider('aports', 'foo-x'))
+        self.assertIsNone(index.provider('aports', 'bar'))
+        self.assertEqual(metadata, index.get('aports', 'path')[0])
+
+    def test_revision(self):
+        index = alpine.ApkbuildIndex()
+        self.assertIsNone(index.revision('aports'))
+        index.update('aports', 'abc123', {})
+        self.assertEqual('abc123', index.revision('aports'))
+
 
 class TestAlpineDiscoveredSource(base.TestCase):
     def make_discovered_source(self, urls=None):
@@ -175,6 +629,20 @@ class TestAlpineDiscoveredSource(base.TestCase):
         expected = "\n".join(urls)
         self.assertEqual(expected, repr(ads))
 
+    def test_member_names(self):
+        name = self.factory.make_string('name')
+        url = self.factory.make_url()
+        ads = alpine.AlpineDiscoveredSource([f"{name}::{url}", url])
+        self.assertEqual([name, url.rsplit('/', 1)[-1]], ads.member_names())
+
+    def test_known_digests(self):
+        name = self.factory.make_string('name')
+        sha512 = self.factory.make_string('sha512')
+        url = self.factory.make_url()
+        ads = alpine.AlpineDiscoveredSource([url], sha512sums={name: sha512})
+        self.assertEqual({'sha512': sha512}, ads.known_digests(name, url))
+        self.assertEqual({}, ads.known_digests('other', url))
+
     def test_populate_archive(self):
         tmpdir = self.useFixture(fixtures.TempDir()).path
         content = self.factory.make_bytes('content')
@@ -231,15 +699,12 @@ class TestAlpineDiscoveredSource(base.TestCase):
         content = self.factory.make_bytes('content')
         fake_file = self.make_file_with_content(tmpdir, content)
 
-        # Patch out download_file to return the fake file:
-        url = self.factory.make_url()
-        pathname = os.path.basename(url)
-        sha512sum = {pathname: 'invalid'}
+        url = "file://" + str(fake_file)
+        sha512sum = {os.path.basename(url): 'invalid'}
         ads = alpine.AlpineDiscoveredSource([url], sha512sums=sha512sum)
-        download_file = self.patch(ads, 'download_file')
-        download_file.return_value = Path(fake_file)
 
         # Make the tar file and populate it:
+        tmpdir = self.useFixture(fixtures.TempDir()).path
         _, tar_file_name = tempfile.mkstemp(dir=tmpdir)
         with tarfile.open(name=tar_file_name, mode='w') as tar:
             exc = self.assertRaises(
@@ -247,6 +712,27 @@ class TestAlpineDiscoveredSource(base.TestCase):
             )
             self.assertIsNone(exc.status_code)
 
+    def test_populate_archive_verifies_http_downloads_inline(self):
+        tmpdir = self.useFixture(fixtures.TempDir()).path
+        response = requests.Response()
+        response.status_code = requests.codes.ok
+        response.raw = BytesIO(self.factory.make_bytes('content'))
+        self.patch(requests.Session, 'get').return_value = response
+        verify_sha512sum = self.patch(
+            alpine.AlpineDiscoveredSource, 'verify_sha512sum'
+        )
+
+        url = self.factory.make_url()
+        sha512sum = {os.path.basename(url): sha512(b'other').hexdigest()}
+        ads = alpine.AlpineDiscoveredSource([url], sha512sums=sha512sum)
+        _, tar_file_name = tempfile.mkstemp(dir=tmpdir)
+        with tarfile.open(name=tar_file_name, mode='w') as tar:
+            with ExpectedException(
+                exceptions.DownloadError, '.*sha512 digest'
+            ):
+                ads.populate_archive(tmpdir, tar)
+        verify_sha512sum.assert_not_called()
+
     def test_populate_archive_with_file_scheme(self):
         tmpdir = self.useFixture(fixtures.TempDir()).path
         content = self.factory.make_bytes('content')
@@ -3,6 +3,7 @@
 
 from unittest import mock
 
+import httpx
 import requests
 
 from soufi import exceptions
@@ -136,6 +137,79 @@ class TestCrateFinder(base.TestCase):
             finder.get_release_history,
         )
 
+    def test_aget_source_url(self):
+        finder = self.make_finder()
+        index_dl = self.factory.make_url().lower()
+
+        def responder(request):
+            if request.url.path.endswith('config.json'):
+                return httpx.Response(200, json=dict(dl=index_dl))
+            return httpx.Response(200)
+
+        handler = self.patch_async_client(finder, responder=responder)
+        found_url = self.run_async(finder.aget_source_url())
+        expected_url = (
+            f"{index_dl}/{finder.name}/{finder.name}-{finder.version}.crate"
+        )
+        self.assertEqual(expected_url, found_url)
+        self.assertEqual('HEAD', handler.call_args.args[0].method)
+
+    def test_aget_source_url_not_found(self):
+        finder = self.make_finder()
+        self.patch(
+            finder, 'aget_index_dl'
+        ).return_value = self.factory.make_url()
+        self.patch_async_client(finder, response_code=404)
+        self.assertRaises(
+            exceptions.SourceNotFound,
+            self.run_async,
+            finder.aget_source_url(),
+        )
+
+    def test_aget_index_dl_raises_for_corrupt_index(self):
+        finder = self.make_finder()
+        self.patch_async_client(finder, json={})
+        self.assertRaises(
+            exceptions.DownloadError,
+            self.run_async,
+            finder.aget_index_dl(),
+        )
+
+    def test_afind(self):
+        url = self.factory.make_url()
+        finder = self.make_finder()
+        self.patch(finder, 'aget_source_url').return_value = url
+
+        disc_source = self.run_async(finder.afind())
+        self.assertIsInstance(disc_source, crate.CrateDiscoveredSource)
+        self.assertEqual([url], disc_source.urls)
+
+    def test_aget_release_history(self):
+        finder = self.make_finder(name=self.factory.make_string())
+        data = {
+            'versions': [
+                {'num': '2.0.0', 'created_at': '2025-01-01T00:00:00Z'},
+                {'num': '1.0.0', 'created_at': '2024-01-01T00:00:00Z'},
+            ]
+        }
+        handler = self.patch_async_client(finder, json=data)
+
+        history = self.run_async(finder.aget_release_history())
+        self.assertEqual(
+            ['1.0.0', '2.0.0'], [item['version'] for item in history]
+        )
+        request = handler.call_args.args[0]
+        self.assertEqual('soufi', request.headers['User-Agent'])
+
+    def test_aget_release_history_raises_when_request_fails(self):
+        finder = self.make_finder(name=self.factory.make_string())
+        self.patch_async_client(finder, response_code=400)
+        self.assertRaises(
+            exceptions.SourceNotFound,
+            self.run_async,
+            finder.aget_release_history(),
+        )
+
 
 class TestCrateDiscoveredSource(base.TestCase):
     def make_discovered_source(self, url=None):
@@ -1,15 +1,20 @@
 # Copyright (c) 2021-2023 Cisco Systems, Inc. and its affiliates
 # All rights reserved.
 
+import gzip
+import lzma
 import pathlib
 import tarfile
 import tempfile
+import threading
+import time
+from io import BytesIO
 from unittest import mock
 
 import fixtures
 import requests
 import testtools
-from testtools.matchers import Equals
+from testtools.matchers import Equals, HasLength
 from testtools.matchers._basic import SameMembers
 
 from soufi import exceptions
@@ -81,6 +86,52 @@ class TestDebianFinder(base.TestCase):
         with testtools.ExpectedException(exceptions.SourceNotFound):
             df.get_source_info()
 
+    def test_get_source_info_caches_versions(self):
+        name = self.factory.make_string('name')
+        versions = [self.factory.make_string('version') for _ in range(3)]
+        data = dict(
+            result=[
+                {
+                    'binary_version': version,
+                    'source': f"source-{version}",
+                    'version': f"{version}-src",
+                    'name': name,
+                }
+                for version in versions
+            ]
+        )
+        get = self.patch_get_with_response(requests.codes.ok, json=data)
+        df = debian.DebianFinder(
+            name, cache_backend='dogpile.cache.memory', s_type=SourceType.os
+        )
+
+        for version in reversed(versions):
+            df.version = version
+            self.assertEqual(
+                dict(name=f"source-{version}", version=f"{version}-src"),
+                df.get_source_info(),
+            )
+        df.version = self.factory.make_string('version')
+        with testtools.ExpectedException(exceptions.SourceNotFound):
+            df.get_source_info()
+        get.assert_called_once()
+        # Only the versions are cached, not the response they came from.
+        self.assertEqual(
+            [f"soufi/snapshot-binary-{name}"],
+            list(df._cache.backend._cache),
+        )
+
+    def test_get_binary_versions_keeps_first_match(self):
+        df = self.make_finder()
+        data = dict(
+            result=[
+                {'binary_version': '1', 'source': 'a', 'version': '1'},
+                {'binary_version': '1', 'source': 'b', 'version': '1'},
+            ]
+        )
+        self.patch_get_with_response(requests.codes.ok, json=data)
+        self.assertEqual({'1': ('a', '1')}, df.get_binary_versions())
+
     def test_get_hashes(self):
         df = self.make_finder()
         hashes = [self.factory.make_digest() for _ in range(4)]
@@ -127,7 +178,65 @@ class TestDebianFinder(base.TestCase):
             )
             for hash in hashes
         ]
-        self.assertEqual(calls, get.call_args_list)
+        self.assertThat(get.call_args_list, SameMembers(calls))
+
+    def patch_file_info(self, names):
+        """Patch get_url to give each hash in `names` its file name.
+
+        :return: A list of the peak numbers of concurrent requests.
+        """
+        lock = threading.Lock()
+        active = []
+        peak = []
+
+        def get_url(finder, url, **kwargs):
+            hash = url.rsplit('/', 2)[-2]
+            with lock:
+                active.append(hash)
+                peak.append(len(active))
+            # Give any other request a chance to start.
+            time.sleep(0.01)
+            with lock:
+                active.remove(hash)
+            response = mock.MagicMock()
+            response.json.return_value = dict(result=[dict(name=names[hash])])
+            return response
+
+        self.patch(debian.DebianFinder, 'get_url', get_url)
+        return peak
+
+    def test_get_urls_concurrently_in_order(self):
+        hashes = [self.factory.make_digest() for _ in range(5)]
+        names = {hash: self.factory.make_string() for hash in hashes}
+        peak = self.patch_file_info(names)
+
+        df = debian.DebianFinder(
+            self.factory.make_string(),
+            self.factory.make_string(),
+            SourceType.os,
+            max_lookup_workers=3,
+        )
+        self.assertEqual(
+            [
+                (names[hash], f"{debian.SNAPSHOT_API}file/{hash}")
+                for hash in hashes
+            ],
+            df.get_urls(iter(hashes)),
+        )
+        self.assertEqual(3, max(peak))
+
+    def test_get_urls_serially(self):
+        hashes = [self.factory.make_digest() for _ in range(3)]
+        peak = self.patch_file_info({hash: 'name' for hash in hashes})
+
+        df = debian.DebianFinder(
+            self.factory.make_string(),
+            self.factory.make_string(),
+            SourceType.os,
+            max_lookup_workers=1,
+        )
+        self.assertEqual(3, len(df.get_urls(hashes)))
+        self.assertEqual([1, 1, 1], peak)
 
     def test_get_urls_raises_for_requests_error(self):
         df = self.make_finder()
@@ -157,6 +266,236 @@ class TestDebianFinder(base.TestCase):
         self.assertEqual(urls, disc_source.urls)
         self.assertEqual(names, disc_source.names)
 
+    def make_index(self, tmpdir):
+        """Write a Packages and Sources file to `tmpdir`.
+
+        :return: The DebianIndex of them, the source file (name, sha1)s,
+            and the binary package's (name, version).
+        """
+        name = self.factory.make_string('name')
+        version = self.factory.make_string('version')
+        files = [
+            (self.factory.make_string('file'), self.factory.make_digest())
+            for _ in range(2)
+        ]
+        write_index(
+            tmpdir,
+            'Packages',
+            f"Package: {name}\nVersion: {version}\nSource: source\n",
+        )
+        write_index(
+            tmpdir,
+            'Sources',
+            "Package: source\n"
+            f"Version: {version}\n"
+            "Checksums-Sha1:\n"
+            + "".join(f" {sha1} 123 {file}\n" for file, sha1 in files),
+        )
+        return debian.DebianIndex([tmpdir]), files, (name, version)
+
+    def test_find_with_debian_index(self):
+        tmpdir = self.useFixture(fixtures.TempDir()).path
+        index, files, (name, version) = self.make_index(tmpdir)
+        get = self.patch(requests.Session, 'get')
+
+        df = debian.DebianFinder(
+            name, version, SourceType.os, debian_index=index
+        )
+        disc_source = df.find()
+
+        self.assertEqual(tuple(file for file, _ in files), disc_source.names)
+        self.assertEqual(
+            tuple(f"{debian.SNAPSHOT_API}file/{sha1}" for _, sha1 in files),
+            disc_source.urls,
+        )
+        get.assert_not_called()
+
+    def test_find_falls_back_to_snapshot(self):
+        tmpdir = self.useFixture(fixtures.TempDir()).path
+        index, _, (name, _) = self.make_index(tmpdir)
+        version = self.factory.make_string('version')
+        source_info = self.make_source_info()
+        get_hashes = self.patch(debian.DebianFinder, 'get_hashes')
+        get_urls = self.patch(debian.DebianFinder, 'get_urls')
+        get_urls.return_value = [(self.factory.make_string(), 'url')]
+        data = dict(
+            result=[
+                {
+                    'binary_version': version,
+                    'source': source_info['name'],
+                    'version': source_info['version'],
+                },
+            ]
+        )
+        self.patch_get_with_response(requests.codes.ok, json=data)
+
+        df = debian.DebianFinder(
+            name, version, SourceType.os, debian_index=index
+        )
+        disc_source = df.find()
+
+        get_hashes.assert_called_once_with(source_info)
+        self.assertEqual(('url',), disc_source.urls)
+
+    def test_debian_index_from_paths(self):
+        tmpdir = self.useFixture(fixtures.TempDir()).path
+        df = debian.DebianFinder(
+            self.factory.make_string(),
+            self.factory.make_string(),
+            SourceType.os,
+            debian_index=[tmpdir],
+        )
+        self.assertIsInstance(df.debian_index, debian.DebianIndex)
+        self.assertEqual([tmpdir], df.debian_index.indexes)
+        self.assertIs(df.session, df.debian_index.session)
+
+
+def write_index(directory, name, content, compression=''):
+    """Write a Packages or Sources file, optionally compressed."""
+    path = pathlib.Path(directory, f"{name}{compression}")
+    opener = {'': open, '.gz': gzip.open, '.xz': lzma.open}[compression]
+    with opener(path, 'wt', encoding='utf-8') as f:
+        f.write(content)
+    return path
+
+
+class TestDebianIndex(base.TestCase):
+    PACKAGES = """\
+Package: libfoo1
+Source: foo
+Version: 1.0-1
+Description: The foo library
+ It has a long description,
+ over several lines.
+
+Package: foo-utils
+Source: foo (1:1.0-1)
+Version: 1.0-1+b1
+
+Package: bar
+Version: 2.0-1
+"""
+
+    SOURCES = """\
+Package: foo
+Version: 1:1.0-1
+Files:
+ d41d8cd98f00b204e9800998ecf8427e 123 foo_1.0-1.dsc
+Checksums-Sha1:
+ 1111111111111111111111111111111111111111 123 foo_1.0-1.dsc
+ 2222222222222222222222222222222222222222 456 foo_1.0.orig.tar.gz
+
+Package: nochecksums
+Version: 1.0
+"""
+
+    def setUp(self):
+        super().setUp()
+        self.tmpdir = self.useFixture(fixtures.TempDir()).path
+
+    def test_source_info(self):
+        packages = write_index(self.tmpdir, 'Packages', self.PACKAGES, '.xz')
+        index = debian.DebianIndex([packages])
+        self.expectThat(
+            index.source_info('libfoo1', '1.0-1'),
+            Equals(dict(name='foo', version='1.0-1')),
+        )
+        self.expectThat(
+            index.source_info('foo-utils', '1.0-1+b1'),
+            Equals(dict(name='foo', version='1:1.0-1')),
+        )
+        self.expectThat(
+            index.source_info('bar', '2.0-1'),
+            Equals(dict(name='bar', version='2.0-1')),
+        )
+        self.expectThat(index.source_info('bar', '2.0-2'), Equals(None))
+
+    def test_source_files(self):
+        sources = write_index(self.tmpdir, 'Sources', self.SOURCES, '.gz')
+        index = debian.DebianIndex([str(sources)])
+        self.expectThat(
+            index.source_files('foo', '1:1.0-1'),
+            Equals(
+                [
+                    ('foo_1.0-1.dsc', '1' * 40),
+                    ('foo_1.0.orig.tar.gz', '2' * 40),
+                ]
+            ),
+        )
+        self.expectThat(index.source_files('nochecksums', '1.0'), Equals(None))
+
+    def test_finds_files_in_directories(self):
+        # As in /var/lib/apt/lists, and with a compressed copy of one file
+        # that is not read again.
+        prefix = 'deb.debian.org_debian_dists_stable_main_'
+        packages = pathlib.Path(self.tmpdir, 'binary')
+        packages.mkdir()
+        write_index(packages, f'{prefix}binary-amd64_Packages', self.PACKAGES)
+        write_index(packages, 'Packages', self.PACKAGES, '.gz')
+        write_index(packages, 'Packages', 'garbage', '.xz')
+        write_index(self.tmpdir, 'Sources', self.SOURCES, '.xz')
+        write_index(self.tmpdir, 'Release', 'garbage')
+
+        index = debian.DebianIndex([self.tmpdir])
+        self.assertThat(
+            list(index._index_files()),
+            SameMembers(
+                [
+                    packages / f'{prefix}binary-amd64_Packages',
+                    packages / 'Packages.gz',
+                    pathlib.Path(self.tmpdir, 'Sources.xz'),
+                ]
+            ),
+        )
+        self.expectThat(
+            index.source_info('libfoo1', '1.0-1'),
+            Equals(dict(name='foo', version='1.0-1')),
+        )
+        self.expectThat(index.source_files('foo', '1:1.0-1'), HasLength(2))
+
+    def test_rejects_other_files(self):
+        path = write_index(self.tmpdir, 'Release', 'garbage')
+        index = debian.DebianIndex([path])
+        with testtools.ExpectedException(ValueError, '.*Packages or Sources'):
+            index.source_info('foo', '1.0')
+
+    def test_reads_files_once(self):
+        packages = write_index(self.tmpdir, 'Packages', self.PACKAGES)
+        index = debian.DebianIndex([packages])
+        index.source_info('bar', '2.0-1')
+        packages.unlink()
+        self.assertIsNotNone(index.source_info('bar', '2.0-1'))
+
+    def test_downloads_urls(self):
+        url = f"{self.factory.make_url()}/Packages.xz"
+        response = requests.Response()
+        response.status_code = requests.codes.ok
+        response.raw = BytesIO(lzma.compress(self.PACKAGES.encode()))
+        session = requests.Session()
+        get = self.patch(session, 'get')
+        get.return_value = response
+
+        index = debian.DebianIndex([url], session=session, timeout=5)
+        self.assertIsNotNone(index.source_info('bar', '2.0-1'))
+        get.assert_called_once_with(url, stream=True, timeout=5)
+        self.assertTrue(response.raw.closed)
+
+    def test_default_session(self):
+        session = requests.Session()
+        self.patch(debian.finder, 'make_session').return_value = session
+        index = debian.DebianIndex([self.factory.make_url()])
+        self.assertIs(session, index.session)
+
+    def test_raises_on_http_errors(self):
+        response = requests.Response()
+        response.status_code = requests.codes.not_found
+        response.raw = BytesIO(b'')
+        self.patch(requests.Session, 'get').return_value = response
+
+        index = debian.DebianIndex([f"{self.factory.make_url()}/Sources"])
+        with testtools.ExpectedException(exceptions.DownloadError):
+            index.source_files('foo', '1.0')
+
 
 class TestDebianDiscoveredSource(base.TestCase):
     def make_debian_discovered_source(self, url_count=3):
@@ -169,6 +508,20 @@ class TestDebianDiscoveredSource(base.TestCase):
         expected = "\n".join([f"{name}: {url}" for name, url in url_pairs])
         self.assertEqual(expected, repr(dds))
 
+    def test_member_names(self):
+        url_pairs, dds = self.make_debian_discovered_source()
+        self.assertEqual([name for name, _ in url_pairs], dds.member_names())
+
+    def test_known_digests(self):
+        sha1 = self.factory.make_string('sha1')
+        _, dds = self.make_debian_discovered_source()
+        self.assertEqual(
+            {'sha1': sha1},
+            dds.known_digests(
+                self.factory.make_string(), f"{debian.SNAPSHOT_API}file/{sha1}"
+            ),
+        )
+
     def test_populate_archive(self):
         tmpdir = self.useFixture(fixtures.TempDir()).path
 
@@ -76,6 +76,52 @@ class TestGemFinder(base.TestCase):
             finder.get_release_history,
         )
 
+    def test_aget_source_url(self):
+        finder = self.make_finder()
+        url = f'{gem.GEM_DOWNLOADS}{finder.name}-{finder.version}.gem'
+
+        handler = self.patch_async_client(finder)
+        found_url = self.run_async(finder.aget_source_url())
+        self.assertEqual(found_url, url)
+        self.assertEqual(url, str(handler.call_args.args[0].url))
+
+    def test_aget_source_url_not_found(self):
+        finder = self.make_finder()
+        self.patch_async_client(finder, response_code=404)
+        with testtools.ExpectedException(exceptions.SourceNotFound):
+            self.run_async(finder.aget_source_url())
+
+    def test_afind(self):
+        url = self.factory.make_url()
+        finder = self.make_finder()
+        self.patch(finder, 'aget_source_url').return_value = url
+
+        disc_source = self.run_async(finder.afind())
+        self.assertIsInstance(disc_source, gem.GemDiscoveredSource)
+        self.assertEqual([url], disc_source.urls)
+
+    def test_aget_release_history(self):
+        finder = self.make_finder(name=self.factory.make_string())
+        data = [
+            {'number': '2.0.0', 'created_at': '2025-01-01T00:00:00Z'},
+            {'number': '1.0.0', 'created_at': '2024-01-01T00:00:00Z'},
+        ]
+        self.patch_async_client(finder, json=data)
+
+        history = self.run_async(finder.aget_release_history())
+        self.assertEqual(
+            ['1.0.0', '2.0.0'], [item['version'] for item in history]
+        )
+
+    def test_aget_release_history_raises_when_request_fails(self):
+        finder = self.make_finder(name=self.factory.make_string())
+        self.patch_async_client(finder, response_code=400)
+        self.assertRaises(
+            exceptions.SourceNotFound,
+            self.run_async,
+            finder.aget_release_history(),
+        )
+
 
 class TestGemDiscoveredSource(base.TestCase):
     def make_discovered_source(self, url=None):
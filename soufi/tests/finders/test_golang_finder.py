@@ -3,6 +3,7 @@
 
 from unittest import mock
 
+import httpx
 import requests
 from testtools.matchers._basic import SameMembers
 
@@ -72,7 +73,7 @@ class TestGolangFinder(base.TestCase):
 
     def test_get_release_history_reverses_when_latest_first(self):
         finder = self.make_finder()
-        get = self.patch(requests, 'get')
+        get = self.patch(requests.Session, 'get')
 
         def fake_get(url, *args, **kwargs):
             response = mock.MagicMock()
@@ -108,7 +109,7 @@ class TestGolangFinder(base.TestCase):
 
     def test_get_release_history_handles_latest_download_error(self):
         finder = self.make_finder()
-        get = self.patch(requests, 'get')
+        get = self.patch(requests.Session, 'get')
 
         def fake_get(url, *args, **kwargs):
             response = mock.MagicMock()
@@ -131,6 +132,63 @@ class TestGolangFinder(base.TestCase):
         get_url.side_effect = exceptions.DownloadError("boom")
         self.assertIs(None, finder._get_latest_version())
 
+    def test_afind(self):
+        finder = self.make_finder()
+        handler = self.patch_async_client(finder)
+        source = self.run_async(finder.afind())
+        expected = [
+            f"{golang.PUBLIC_PROXY}{finder.name.lower()}"
+            f"/@v/{finder.version}.zip"
+        ]
+        self.assertThat(source.urls, SameMembers(expected))
+        request = handler.call_args.args[0]
+        self.assertEqual('HEAD', request.method)
+        self.assertEqual(expected[0], str(request.url))
+
+    def test_afind_raises_when_module_not_found(self):
+        finder = self.make_finder()
+        self.patch_async_client(finder, response_code=404)
+        self.assertRaises(
+            exceptions.SourceNotFound, self.run_async, finder.afind()
+        )
+
+    def test_aget_release_history_reverses_when_latest_first(self):
+        finder = self.make_finder()
+
+        def responder(request):
+            if request.url.path.endswith('/@v/list'):
+                return httpx.Response(200, text="v1.1.0\nv1.0.0\n")
+            return httpx.Response(200, json={'Version': 'v1.1.0'})
+
+        self.patch_async_client(finder, responder=responder)
+        history = self.run_async(finder.aget_release_history())
+        self.assertEqual(
+            ['v1.0.0', 'v1.1.0'], [item['version'] for item in history]
+        )
+
+    def test_aget_release_history_handles_latest_download_error(self):
+        finder = self.make_finder()
+
+        def responder(request):
+            if request.url.path.endswith('/@v/list'):
+                return httpx.Response(200, text="v1.0.0\nv1.1.0\n")
+            return httpx.Response(404)
+
+        self.patch_async_client(finder, responder=responder)
+        history = self.run_async(finder.aget_release_history())
+        self.assertEqual(
+            ['v1.0.0', 'v1.1.0'], [item['version'] for item in history]
+        )
+
+    def test_aget_release_history_raises_when_request_fails(self):
+        finder = self.make_finder()
+        self.patch_async_client(finder, response_code=400)
+        self.assertRaises(
+            exceptions.SourceNotFound,
+            self.run_async,
+            finder.aget_release_history(),
+        )
+
 
 class TestGolangDiscoveredSource(base.TestCase):
     def make_discovered_source(self, url=None):
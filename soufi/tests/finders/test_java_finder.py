@@ -1,6 +1,7 @@
 # Copyright (c) 2021-2023 Cisco Systems, Inc. and its affiliates
 # All rights reserved.
 
+import httpx
 import requests
 import testtools
 
@@ -65,7 +66,7 @@ class TestJavaFinder(base.TestCase):
         group = self.factory.make_string()
         data = dict(response=dict(docs=[dict(g=group)]))
         self.patch_get_with_response(requests.codes.ok, json=data)
-        head = self.patch(requests, 'head')
+        head = self.patch(requests.Session, 'head')
         head.side_effect = requests.exceptions.Timeout
         finder = self.make_finder()
         with testtools.ExpectedException(exceptions.SourceNotFound):
@@ -157,6 +158,83 @@ class TestJavaFinder(base.TestCase):
         self.assertIn(f'g:{group_id}', query)
         self.assertIn(f'a:{name}', query)
 
+    def test_aget_source_url(self):
+        finder = self.make_finder()
+        group = self.factory.make_string()
+        data = dict(response=dict(docs=[dict(g=group)]))
+
+        def responder(request):
+            if request.method == 'GET':
+                return httpx.Response(200, json=data)
+            return httpx.Response(200)
+
+        handler = self.patch_async_client(finder, responder=responder)
+        found_url = self.run_async(finder.aget_source_url())
+        [search, head] = [c.args[0] for c in handler.call_args_list]
+        self.assertEqual(str(head.url), found_url)
+        self.assertEqual(
+            java.MAVEN_SEARCH_URL, str(search.url.copy_with(query=None))
+        )
+        self.assertEqual(
+            f'{group}/{finder.name}/{finder.version}/'
+            f'{finder.name}-{finder.version}-sources.jar',
+            head.url.params['filepath'],
+        )
+
+    def test_aget_source_url_raises_when_get_response_fails(self):
+        finder = self.make_finder()
+        self.patch_async_client(finder, response_code=400)
+        with testtools.ExpectedException(exceptions.SourceNotFound):
+            self.run_async(finder.aget_source_url())
+
+    def test_aget_source_url_raises_when_head_response_fails(self):
+        finder = self.make_finder()
+        data = dict(response=dict(docs=[dict(g=self.factory.make_string())]))
+
+        def responder(request):
+            if request.method == 'GET':
+                return httpx.Response(200, json=data)
+            return httpx.Response(404)
+
+        self.patch_async_client(finder, responder=responder)
+        with testtools.ExpectedException(exceptions.SourceNotFound):
+            self.run_async(finder.aget_source_url())
+
+    def test_afind(self):
+        url = self.factory.make_url()
+        finder = self.make_finder()
+        self.patch(finder, 'aget_source_url').return_value = url
+
+        disc_source = self.run_async(finder.afind())
+        self.assertIsInstance(disc_source, java.JavaDiscoveredSource)
+        self.assertEqual([url], disc_source.urls)
+
+    def test_aget_release_history(self):
+        finder = self.make_finder(name=self.factory.make_string())
+        data = {
+            'response': {
+                'docs': [
+                    {'v': '2.0.0', 'timestamp': 2000},
+                    {'v': '1.0.0', 'timestamp': 1000},
+                ]
+            }
+        }
+        self.patch_async_client(finder, json=data)
+
+        history = self.run_async(finder.aget_release_history())
+        self.assertEqual(
+            ['1.0.0', '2.0.0'], [item['version'] for item in history]
+        )
+
+    def test_aget_release_history_raises_when_request_fails(self):
+        finder = self.make_finder(name=self.factory.make_string())
+        self.patch_async_client(finder, response_code=400)
+        self.assertRaises(
+            exceptions.SourceNotFound,
+            self.run_async,
+            finder.aget_release_history(),
+        )
+
 
 class TestNPMDiscoveredSource(base.TestCase):
     def make_discovered_source(self, url=None):
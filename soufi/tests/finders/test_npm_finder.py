@@ -97,6 +97,59 @@ class TestNPMFinder(base.TestCase):
             finder.get_release_history,
         )
 
+    def test_aget_source_url(self):
+        finder = self.make_finder()
+        url = self.factory.make_url()
+        data = dict(dist=dict(tarball=url))
+
+        handler = self.patch_async_client(finder, json=data)
+        found_url = self.run_async(finder.aget_source_url())
+        self.assertEqual(found_url, url)
+        self.assertEqual(
+            f"https://registry.npmjs.org/{finder.name}/{finder.version}",
+            str(handler.call_args.args[0].url),
+        )
+
+    def test_aget_source_url_raises_when_response_fails(self):
+        finder = self.make_finder()
+        self.patch_async_client(finder, response_code=404)
+        with testtools.ExpectedException(exceptions.SourceNotFound):
+            self.run_async(finder.aget_source_url())
+
+    def test_afind(self):
+        url = self.factory.make_url()
+        finder = self.make_finder()
+        self.patch(finder, 'aget_source_url').return_value = url
+
+        disc_source = self.run_async(finder.afind())
+        self.assertIsInstance(disc_source, npm.NPMDiscoveredSource)
+        self.assertEqual([url], disc_source.urls)
+
+    def test_aget_release_history(self):
+        finder = self.make_finder(name=self.factory.make_string())
+        data = {
+            'versions': {'1.0.0': {}, '2.0.0': {}},
+            'time': {
+                '1.0.0': '2024-01-01T00:00:00.000Z',
+                '2.0.0': '2024-02-01T00:00:00.000Z',
+            },
+        }
+        self.patch_async_client(finder, json=data)
+
+        history = self.run_async(finder.aget_release_history())
+        self.assertEqual(
+            ['1.0.0', '2.0.0'], [item['version'] for item in history]
+        )
+
+    def test_aget_release_history_raises_when_request_fails(self):
+        finder = self.make_finder(name=self.factory.make_string())
+        self.patch_async_client(finder, response_code=400)
+        self.assertRaises(
+            exceptions.SourceNotFound,
+            self.run_async,
+            finder.aget_release_history(),
+        )
+
 
 class TestNPMDiscoveredSource(base.TestCase):
     def make_discovered_source(self, url=None):
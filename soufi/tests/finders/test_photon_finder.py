@@ -61,7 +61,7 @@ class TestPhotonFinder(BasePhotonTest):
         top_data = self.make_top_page_content(top_repos)
         page1 = self.make_top_page_content(repos[:3])
         page2 = self.make_top_page_content(repos[3:])
-        get = self.patch(requests, 'get')
+        get = self.patch(requests.Session, 'get')
         # Set up responses for the top index, and the packages indexes for each
         # item in repos.
         get.side_effect = (
@@ -96,7 +96,7 @@ class TestPhotonFinder(BasePhotonTest):
         finder = self.make_finder()
         top_data = self.make_top_page_content(['1.0/', '2.0/'])
         data = self.make_top_page_content(['1_srpms_x86_64/'])
-        get = self.patch(requests, 'get')
+        get = self.patch(requests.Session, 'get')
         # The first index page listed is actually no good
         get.side_effect = (
             self.make_response(top_data, requests.codes.ok),
@@ -130,7 +130,7 @@ class TestPhotonFinder(BasePhotonTest):
         page1 = self.make_top_page_content(repos[:3])
         page2 = self.make_top_page_content(repos[3:])
         self.patch(finder, 'test_url').return_value = True
-        get = self.patch(requests, 'get')
+        get = self.patch(requests.Session, 'get')
         # Set up responses for the top index, and the packages indexes for each
         # item in repos.
         get.side_effect = (
@@ -164,7 +164,7 @@ class TestPhotonFinder(BasePhotonTest):
         top_data = self.make_top_page_content(['6.0/', '9.0/'])
         data = self.make_top_page_content(['1_base_x86_64'])
         self.patch(finder, 'test_url').return_value = True
-        get = self.patch(requests, 'get')
+        get = self.patch(requests.Session, 'get')
         # The first index page listed is actually no good
         get.side_effect = (
             self.make_response(top_data, requests.codes.ok),
@@ -188,7 +188,7 @@ class TestPhotonFinder(BasePhotonTest):
         top_data = self.make_top_page_content(['6.0/', '9.0/'])
         data = self.make_top_page_content(['1_base_x86_64'])
         # All repos in the top content are available
-        get = self.patch(requests, 'get')
+        get = self.patch(requests.Session, 'get')
         get.side_effect = (
             self.make_response(top_data, requests.codes.ok),
             self.make_response(data, requests.codes.ok),
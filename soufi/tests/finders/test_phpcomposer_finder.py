@@ -83,6 +83,46 @@ class TestPHPPECLFinder(base.TestCase):
         self.assertEqual([url], disc_source.urls)
         self.assertEqual(f".{atype}", disc_source.archive_extension)
 
+    def test_aget_source_url(self):
+        finder = self.make_finder("monolog/monolog", "2.3.5")
+        with open(self.testing / "monolog.json", "rb") as fp:
+            data = json.load(fp)
+        handler = self.patch_async_client(finder, json=data)
+
+        found_url, found_type = self.run_async(finder.aget_source_url())
+        self.assertEqual(
+            "https://api.github.com/repos/Seldaek/monolog/zipball/"
+            "fd4380d6fc37626e2f799f29d91195040137eba9",
+            found_url,
+        )
+        self.assertEqual("zip", found_type)
+        self.assertEqual(
+            f"{php_composer.DEFAULT_INDEX}p2/{finder.name}.json",
+            str(handler.call_args.args[0].url),
+        )
+
+    def test_aget_source_url_source_not_found(self):
+        finder = self.make_finder()
+        self.patch_async_client(finder, response_code=404)
+        self.assertRaises(
+            exceptions.SourceNotFound,
+            self.run_async,
+            finder.aget_source_url(),
+        )
+
+    def test_afind(self):
+        finder = self.make_finder()
+        url = self.factory.make_url()
+        atype = self.factory.random_choice(["zip", "tgz", "tar.gz"])
+        self.patch(finder, "aget_source_url").return_value = url, atype
+
+        disc_source = self.run_async(finder.afind())
+        self.assertIsInstance(
+            disc_source, php_composer.PHPComposerDiscoveredSource
+        )
+        self.assertEqual([url], disc_source.urls)
+        self.assertEqual(f".{atype}", disc_source.archive_extension)
+
 
 class TestPHPPECLDiscoveredSource(base.TestCase):
     def make_discovered_source(self, url=None, atype=None):
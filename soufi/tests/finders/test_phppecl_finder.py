@@ -61,6 +61,41 @@ class TestPHPPECLFinder(base.TestCase):
         self.assertIsInstance(disc_source, php_pecl.PHPPECLDiscoveredSource)
         self.assertEqual([url], disc_source.urls)
 
+    def test_aget_source_url(self):
+        # The test data uses this package at this version.
+        finder = self.make_finder("ncurses", "1.0.2")
+        content = (self.testing / "ncurses_1.0.2.xml").read_bytes()
+        handler = self.patch_async_client(finder, content=content)
+
+        found_url = self.run_async(finder.aget_source_url())
+        expected_url = (
+            f"{php_pecl.DEFAULT_INDEX}get/{finder.name}-{finder.version}"
+        )
+        self.assertEqual(expected_url, found_url)
+        self.assertEqual(
+            f"{php_pecl.DEFAULT_INDEX}rest/r/"
+            f"{finder.name}/{finder.version}.xml",
+            str(handler.call_args.args[0].url),
+        )
+
+    def test_aget_source_url_source_not_found(self):
+        finder = self.make_finder()
+        self.patch_async_client(finder, response_code=404)
+        self.assertRaises(
+            exceptions.SourceNotFound,
+            self.run_async,
+            finder.aget_source_url(),
+        )
+
+    def test_afind(self):
+        finder = self.make_finder()
+        url = self.factory.make_url()
+        self.patch(finder, "aget_source_url").return_value = url
+
+        disc_source = self.run_async(finder.afind())
+        self.assertIsInstance(disc_source, php_pecl.PHPPECLDiscoveredSource)
+        self.assertEqual([url], disc_source.urls)
+
 
 class TestPHPPECLDiscoveredSource(base.TestCase):
     def make_discovered_source(self, url=None):
@@ -3,6 +3,7 @@
 
 from unittest import mock
 
+import httpx
 import requests
 import testtools
 
@@ -144,6 +145,59 @@ class TestPythonFinder(base.TestCase):
             finder.get_release_history,
         )
 
+    def test_aget_source_url(self):
+        finder = self.make_finder()
+        url = self.factory.make_url()
+        data = self.make_data(finder.version, url)
+
+        handler = self.patch_async_client(finder, json=data)
+        found_url = self.run_async(finder.aget_source_url())
+        self.assertEqual(found_url, url)
+        call = self.get_requests_call_for_scenario(finder)
+        self.assertIn(
+            httpx.URL(call.args[0]),
+            [c.args[0].url for c in handler.call_args_list],
+        )
+
+    def test_aget_source_url_raises_when_response_fails(self):
+        finder = self.make_finder()
+        self.patch_async_client(finder, response_code=404)
+        with testtools.ExpectedException(exceptions.SourceNotFound):
+            self.run_async(finder.aget_source_url())
+
+    def test_afind(self):
+        url = self.factory.make_url()
+        finder = self.make_finder()
+        self.patch(finder, 'aget_source_url').return_value = url
+
+        disc_source = self.run_async(finder.afind())
+        self.assertIsInstance(disc_source, python.PythonDiscoveredSource)
+        self.assertEqual([url], disc_source.urls)
+
+    def test_aget_release_history(self):
+        finder = self.make_finder(name=self.factory.make_string())
+        data = {
+            'releases': {
+                '2.0.0': [{'upload_time_iso_8601': '2025-01-02T00:00:00Z'}],
+                '1.0.0': [{'upload_time_iso_8601': '2024-01-02T00:00:00Z'}],
+            }
+        }
+        self.patch_async_client(finder, json=data)
+
+        history = self.run_async(finder.aget_release_history())
+        self.assertEqual(
+            ['1.0.0', '2.0.0'], [item['version'] for item in history]
+        )
+
+    def test_aget_release_history_raises_when_request_fails(self):
+        finder = self.make_finder(name=self.factory.make_string())
+        self.patch_async_client(finder, response_code=400)
+        self.assertRaises(
+            exceptions.SourceNotFound,
+            self.run_async,
+            finder.aget_release_history(),
+        )
+
 
 class TestPythonDiscoveredSource(base.TestCase):
     def make_discovered_source(self, url=None):
@@ -1,14 +1,22 @@
 # Copyright (c) 2021-2023 Cisco Systems, Inc. and its affiliates
 # All rights reserved.
 
+import gzip
 import io
+import multiprocessing
+import os
+import pickle
 import string
+import threading
+import time
 from itertools import repeat
 from unittest import mock
 
+import fixtures
 import repomd
 import requests
-from testtools.matchers import Equals, SameMembers
+import testtools
+from testtools.matchers import Equals, Is, SameMembers
 
 import soufi.exceptions
 from soufi.finder import SourceType
@@ -196,8 +204,8 @@ class TestYumFinder(BaseYumTest):
         bin = [self.factory.make_url(), self.factory.make_url()]
         finder = self.make_finder(source_repos=src, binary_repos=bin)
         package = self.FakePackage(vr=finder.version)
-        do_task = self.patch(yum, 'do_task')
-        do_task.return_value = (baseurl, {finder.name: [package]})
+        apply = self.patch(yum.RepomdPool, 'apply')
+        apply.return_value = (baseurl, {finder.name: [package]})
         self.patch(finder, 'test_url').return_value = False
         url = finder._walk_source_repos(finder.name)
         self.assertEqual(baseurl + package.location, url)
@@ -208,8 +216,8 @@ class TestYumFinder(BaseYumTest):
         bin = [self.factory.make_url()]
         finder = self.make_finder(source_repos=src, binary_repos=bin)
         package = self.FakePackage()
-        do_task = self.patch(yum, 'do_task')
-        do_task.return_value = (baseurl, {finder.name: [package]})
+        apply = self.patch(yum.RepomdPool, 'apply')
+        apply.return_value = (baseurl, {finder.name: [package]})
         self.patch(finder, 'test_url').return_value = True
         url = finder._walk_source_repos(finder.name)
         self.assertEqual(baseurl + package.location, url)
@@ -220,8 +228,8 @@ class TestYumFinder(BaseYumTest):
         bin = [self.factory.make_url()]
         finder = self.make_finder(source_repos=src, binary_repos=bin)
         package = self.FakePackage()
-        do_task = self.patch(yum, 'do_task')
-        do_task.return_value = (baseurl, {finder.name: [package]})
+        apply = self.patch(yum.RepomdPool, 'apply')
+        apply.return_value = (baseurl, {finder.name: [package]})
         self.patch(finder, 'test_url').return_value = False
         url = finder._walk_source_repos(finder.name)
         self.assertIsNone(url)
@@ -235,8 +243,8 @@ class TestYumFinder(BaseYumTest):
         r = self.factory.randint(0, 100)
         srcrpm = self.make_package(n=n, v=v, r=r)
         package = self.FakePackage(vr=finder.version, sourcerpm=srcrpm)
-        do_task = self.patch(yum, 'do_task')
-        do_task.return_value = (None, {finder.name: [package]})
+        apply = self.patch(yum.RepomdPool, 'apply')
+        apply.return_value = (None, {finder.name: [package]})
         name, version = finder._walk_binary_repos(finder.name)
         self.expectThat(name, Equals(n))
         self.expectThat(version, Equals(f"{v}-{r}"))
@@ -246,8 +254,8 @@ class TestYumFinder(BaseYumTest):
         bin = [self.factory.make_url()]
         finder = self.make_finder(source_repos=src, binary_repos=bin)
         package = self.FakePackage(vr=finder.version, sourcerpm='')
-        do_task = self.patch(yum, 'do_task')
-        do_task.return_value = (None, {finder.name: [package]})
+        apply = self.patch(yum.RepomdPool, 'apply')
+        apply.return_value = (None, {finder.name: [package]})
         name, version = finder._walk_binary_repos(finder.name)
         self.assertIsNone(name)
         self.assertIsNone(version)
@@ -258,8 +266,8 @@ class TestYumFinder(BaseYumTest):
         finder = self.make_finder(source_repos=src, binary_repos=bin)
         package1 = self.FakePackage()
         package2 = self.FakePackage()
-        do_task = self.patch(yum, 'do_task')
-        do_task.return_value = (None, {finder.name: [package1, package2]})
+        apply = self.patch(yum.RepomdPool, 'apply')
+        apply.return_value = (None, {finder.name: [package1, package2]})
         name, version = finder._walk_binary_repos(finder.name)
         self.assertIsNone(name)
         self.assertIsNone(version)
@@ -273,12 +281,270 @@ class TestYumFinder(BaseYumTest):
         r = self.factory.randint(0, 100)
         srcrpm = self.make_package(n=n, v=v, r=r)
         package = self.FakePackage(sourcerpm=srcrpm)
-        do_task = self.patch(yum, 'do_task')
-        do_task.return_value = (None, {finder.name: [package]})
+        apply = self.patch(yum.RepomdPool, 'apply')
+        apply.return_value = (None, {finder.name: [package]})
         name, version = finder._walk_binary_repos(finder.name)
         self.expectThat(name, Equals(n))
         self.expectThat(version, Equals(f"{v}-{r}"))
 
+    def make_index(self):
+        tmpdir = self.useFixture(fixtures.TempDir()).path
+        return yum.RepomdIndex(os.path.join(tmpdir, 'repomd.db'))
+
+    def test_repomd_index_from_path(self):
+        tmpdir = self.useFixture(fixtures.TempDir()).path
+        path = os.path.join(tmpdir, 'repomd.db')
+        finder = self.make_finder(repomd_index=path)
+        self.assertIsInstance(finder.repomd_index, yum.RepomdIndex)
+        self.assertEqual(path, finder.repomd_index.path)
+
+    def test_repomd_index_instance(self):
+        index = self.make_index()
+        finder = self.make_finder(repomd_index=index)
+        self.assertIs(index, finder.repomd_index)
+
+    def test__walk_binary_repos_prefetching(self):
+        bin = [self.factory.make_url() for _ in range(3)]
+        finder = self.make_finder(binary_repos=bin, prefetch_repos=2)
+        n = self.factory.make_string()
+        v = self.factory.make_semver()
+        srcrpm = self.make_package(n=n, v=v, r=1)
+        package = self.FakePackage(vr=finder.version, sourcerpm=srcrpm)
+        apply = self.patch(yum.RepomdPool, 'apply')
+        apply.side_effect = lambda target, url, binary: (
+            url,
+            {finder.name: [package]} if url == bin[1] else {},
+        )
+        self.assertEqual((n, f"{v}-1"), finder._walk_binary_repos(finder.name))
+
+    def test__iter_repos_serially(self):
+        urls = [self.factory.make_url() for _ in range(3)]
+        finder = self.make_finder()
+        get_repo = self.patch(finder, '_get_repo')
+        get_repo.side_effect = lambda url, binary: (url, {})
+        self.assertEqual(
+            [(url, {}) for url in urls], list(finder._iter_repos(urls))
+        )
+
+    def test__iter_repos_prefetches_in_order(self):
+        urls = [self.factory.make_url() for _ in range(4)]
+        finder = self.make_finder(prefetch_repos=2)
+        second_started = threading.Event()
+
+        def get_repo(url, binary):
+            if url == urls[0]:
+                # Only completes if the next repo is loading concurrently
+                self.assertTrue(second_started.wait(timeout=10))
+            elif url == urls[1]:
+                second_started.set()
+            return url, {}
+
+        self.patch(finder, '_get_repo').side_effect = get_repo
+        self.assertEqual(
+            [(url, {}) for url in urls], list(finder._iter_repos(urls))
+        )
+
+    def test__iter_repos_stops_loading_when_closed(self):
+        urls = [self.factory.make_url() for _ in range(4)]
+        finder = self.make_finder(prefetch_repos=2)
+        get_repo = self.patch(finder, '_get_repo')
+        get_repo.side_effect = lambda url, binary: (url, {})
+        repos = finder._iter_repos(urls)
+        self.assertEqual((urls[0], {}), next(repos))
+        repos.close()
+        self.assertNotIn(mock.call(urls[2], False), get_repo.call_args_list)
+
+    def test__iter_repos_prefetch_reraises(self):
+        urls = [self.factory.make_url() for _ in range(2)]
+        finder = self.make_finder(prefetch_repos=2)
+
+        def get_repo(url, binary):
+            if url == urls[1]:
+                raise RuntimeError
+            return url, {}
+
+        self.patch(finder, '_get_repo').side_effect = get_repo
+        repos = finder._iter_repos(urls)
+        self.assertEqual((urls[0], {}), next(repos))
+        self.assertRaises(RuntimeError, next, repos)
+
+    def test__load_repo_in_subprocess(self):
+        repo_url = self.factory.make_url()
+        finder = self.make_finder()
+        apply = self.patch(yum.RepomdPool, 'apply')
+        self.assertIs(apply.return_value, finder._load_repo(repo_url))
+        apply.assert_called_once_with(yum.get_repomd, repo_url, False)
+
+    def test__get_repo_binary(self):
+        repo_url = self.factory.make_url()
+        finder = self.make_finder(cache_backend='dogpile.cache.memory')
+        apply = self.patch(yum.RepomdPool, 'apply')
+        apply.side_effect = lambda target, url, binary: (url, binary)
+        # Binary and full loads of the same repo are cached separately
+        self.assertEqual((repo_url, True), finder._get_repo(repo_url, True))
+        self.assertEqual((repo_url, False), finder._get_repo(repo_url))
+        self.assertEqual((repo_url, True), finder._get_repo(repo_url, True))
+        self.assertEqual(2, apply.call_count)
+
+    def test__load_repo_in_process(self):
+        repo_url = self.factory.make_url()
+        finder = self.make_finder(isolate_repomd=False)
+        apply = self.patch(yum.RepomdPool, 'apply')
+        load_repomd = self.patch(yum, 'load_repomd')
+        self.assertEqual(
+            (repo_url + '/', load_repomd.return_value),
+            finder._load_repo(repo_url),
+        )
+        load_repomd.assert_called_once_with(
+            repo_url + '/', False, finder.session
+        )
+        apply.assert_not_called()
+
+    def test__get_repo_indexes_on_miss(self):
+        repo_url = self.factory.make_url()
+        finder = self.make_finder(repomd_index=self.make_index())
+        checksum = self.factory.make_string('checksum')
+        self.patch(yum, 'get_primary_checksum').return_value = checksum
+        package = yum.Package(
+            finder.name, *(self.factory.make_string() for _ in range(5))
+        )
+        apply = self.patch(yum.RepomdPool, 'apply')
+        apply.return_value = (repo_url + '/', yum.Repo([package]))
+
+        # Binary repos are loaded in full when they're going to be indexed
+        baseurl, repo = finder._get_repo(repo_url, binary=True)
+
+        apply.assert_called_once_with(yum.get_repomd, repo_url + '/', False)
+        self.assertEqual(repo_url + '/', baseurl)
+        self.assertEqual(
+            checksum, finder.repomd_index.checksum(repo_url + '/')
+        )
+        self.assertEqual([package], repo.get(finder.name))
+
+    def test__get_repo_uses_index_on_hit(self):
+        repo_url = self.factory.make_url() + '/'
+        index = self.make_index()
+        checksum = self.factory.make_string('checksum')
+        index.store(repo_url, checksum, yum.Repo())
+        finder = self.make_finder(repomd_index=index)
+        get_checksum = self.patch(yum, 'get_primary_checksum')
+        get_checksum.return_value = checksum
+        apply = self.patch(yum.RepomdPool, 'apply')
+
+        baseurl, repo = finder._get_repo(repo_url)
+
+        apply.assert_not_called()
+        get_checksum.assert_called_once_with(
+            repo_url, finder.session, finder.timeout
+        )
+        self.assertEqual(repo_url, baseurl)
+        self.assertEqual([], repo.get(finder.name, []))
+
+    def test__get_repo_reindexes_on_new_checksum(self):
+        repo_url = self.factory.make_url() + '/'
+        index = self.make_index()
+        index.store(repo_url, self.factory.make_string('old'), yum.Repo())
+        finder = self.make_finder(repomd_index=index)
+        checksum = self.factory.make_string('new')
+        self.patch(yum, 'get_primary_checksum').return_value = checksum
+        apply = self.patch(yum.RepomdPool, 'apply')
+        apply.return_value = (repo_url, yum.Repo())
+
+        finder._get_repo(repo_url)
+
+        apply.assert_called_once_with(yum.get_repomd, repo_url, False)
+        self.assertEqual(checksum, index.checksum(repo_url))
+
+
+class TestRepomdIndex(base.TestCase):
+    def make_index(self):
+        tmpdir = self.useFixture(fixtures.TempDir()).path
+        return yum.RepomdIndex(os.path.join(tmpdir, 'repomd.db'))
+
+    def make_package(self, name=None, sourcerpm=None):
+        if name is None:
+            name = self.factory.make_string('name')
+        if sourcerpm is None:
+            sourcerpm = self.factory.make_string('sourcerpm')
+        return yum.Package(
+            name,
+            *(
+                self.factory.make_string(field)
+                for field in 'v vr evr l'.split()
+            ),
+            sourcerpm,
+        )
+
+    def test_checksum_unknown_repo(self):
+        index = self.make_index()
+        self.assertIsNone(index.checksum(self.factory.make_url()))
+
+    def test_store_and_get(self):
+        index = self.make_index()
+        url = self.factory.make_url()
+        checksum = self.factory.make_string('checksum')
+        name = self.factory.make_string('name')
+        packages = [self.make_package(name), self.make_package(name)]
+        other = self.make_package()
+        index.store(url, checksum, yum.Repo([*packages, other]))
+        self.assertEqual(checksum, index.checksum(url))
+        # Packages come back in the order they were stored
+        self.assertEqual(packages, index.get(url, name))
+        self.assertEqual([other], index.get(url, other.name))
+        self.assertEqual([], index.get(self.factory.make_url(), name))
+
+    def test_store_replaces_previous_packages(self):
+        index = self.make_index()
+        url = self.factory.make_url()
+        old = self.make_package()
+        new = self.make_package(old.name)
+        index.store(url, self.factory.make_string(), yum.Repo([old]))
+        checksum = self.factory.make_string()
+        index.store(url, checksum, yum.Repo([new]))
+        self.assertEqual(checksum, index.checksum(url))
+        self.assertEqual([new], index.get(url, old.name))
+
+    def test_persists_across_instances(self):
+        index = self.make_index()
+        url = self.factory.make_url()
+        package = self.make_package()
+        index.store(url, 'checksum', yum.Repo([package]))
+        reopened = yum.RepomdIndex(index.path)
+        self.assertEqual('checksum', reopened.checksum(url))
+        self.assertEqual([package], reopened.get(url, package.name))
+
+    def test_repo_view(self):
+        index = self.make_index()
+        url = self.factory.make_url()
+        package = self.make_package()
+        index.store(url, 'checksum', yum.Repo([package]))
+        repo = index.repo(url)
+        self.assertEqual([package], repo.get(package.name))
+        self.assertIsNone(repo.get(self.factory.make_string()))
+        self.assertEqual([], repo.get(self.factory.make_string(), []))
+
+
+class TestRepo(base.TestCase):
+    def make_package(self, name, sourcerpm=''):
+        return yum.BinaryPackage(name, '1-1', '1-1', sourcerpm)
+
+    def test_groups_packages_by_name(self):
+        foo1 = self.make_package('foo')
+        bar = self.make_package('bar')
+        foo2 = self.make_package('foo')
+        repo = yum.Repo([foo1, bar, foo2])
+        self.expectThat(repo.get('foo'), Equals((foo1, foo2)))
+        self.expectThat(repo.get('bar'), Equals((bar,)))
+        self.expectThat(repo.get('baz'), Is(None))
+        self.expectThat(repo.get('baz', []), Equals([]))
+        self.expectThat(list(repo), Equals([foo1, foo2, bar]))
+
+    def test_pickles(self):
+        repo = yum.Repo([self.make_package('foo', 'foo-1-1.src.rpm')])
+        unpickled = pickle.loads(pickle.dumps(repo))  # noqa: S301
+        self.expectThat(list(unpickled), Equals(list(repo)))
+        self.expectThat(unpickled.get('foo'), Equals(repo.get('foo')))
+
 
 class TestYumFinderClassHelpers(BaseYumTest):
     def test__nevra_or_none_returns_nevra(self):
@@ -333,121 +599,358 @@ class TestYumFinderClassHelpers(BaseYumTest):
 
     def test__test_url_timeout(self):
         url = self.factory.make_url()
-        self.patch(requests, 'head').side_effect = requests.exceptions.Timeout
+        self.patch(
+            requests.Session, 'head'
+        ).side_effect = requests.exceptions.Timeout
         finder = self.make_finder()
         self.assertFalse(finder.test_url(url))
 
 
 class TestYumFinderHelpers(BaseYumTest):
-    def setUp(self):
-        self.queue = mock.MagicMock()
-        super().setUp()
+    def make_primary_xml(self, *packages):
+        """Make primary metadata for the given (name, e, v, r) tuples."""
+        elements = ''.join(
+            f"""
+            <package type="rpm">
+              <name>{name}</name>
+              <arch>x86_64</arch>
+              <version epoch="{e}" ver="{v}" rel="{r}"/>
+              <location href="Packages/{name}-{v}-{r}.x86_64.rpm"/>
+              <format>
+                <rpm:sourcerpm>{name}-{v}-{r}.src.rpm</rpm:sourcerpm>
+              </format>
+            </package>"""
+            for name, e, v, r in packages
+        )
+        return (
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<metadata xmlns="http://linux.duke.edu/metadata/common" '
+            'xmlns:rpm="http://linux.duke.edu/metadata/rpm">'
+            f"{elements}</metadata>"
+        ).encode()
+
+    def make_response(self, content):
+        response = mock.MagicMock()
+        response.raw = io.BytesIO(content)
+        response.__enter__.return_value = response
+        return response
+
+    def patch_repo(self, *packages):
+        repomd_xml = (
+            b'<repomd xmlns="http://linux.duke.edu/metadata/repo">'
+            b'<data type="primary"><checksum type="sha256">abc</checksum>'
+            b'<location href="repodata/abc-primary.xml.gz"/></data>'
+            b'</repomd>'
+        )
+        primary = gzip.compress(self.make_primary_xml(*packages))
+        get = self.patch(requests.Session, 'get')
+        get.side_effect = [
+            self.make_response(repomd_xml),
+            self.make_response(primary),
+        ]
+        return get
+
+    def test_load_repomd(self):
+        url = self.factory.make_url() + '/'
+        get = self.patch_repo(
+            ('foo', '0', '1.0', '1'),
+            ('foo', '2', '1.1', '1'),
+            ('bar', 0, 2, 3),
+        )
+        repo = yum.load_repomd(url)
+        self.assertEqual(
+            [
+                yum.Package(
+                    name='foo',
+                    version='1.0',
+                    vr='1.0-1',
+                    evr='1.0-1',
+                    location='Packages/foo-1.0-1.x86_64.rpm',
+                    sourcerpm='foo-1.0-1.src.rpm',
+                ),
+                yum.Package(
+                    name='foo',
+                    version='1.1',
+                    vr='1.1-1',
+                    evr='2:1.1-1',
+                    location='Packages/foo-1.1-1.x86_64.rpm',
+                    sourcerpm='foo-1.1-1.src.rpm',
+                ),
+                yum.Package(
+                    name='bar',
+                    version='2',
+                    vr='2-3',
+                    evr='2-3',
+                    location='Packages/bar-2-3.x86_64.rpm',
+                    sourcerpm='bar-2-3.src.rpm',
+                ),
+            ],
+            list(repo),
+        )
+        self.assertEqual(
+            [
+                mock.call(
+                    requests.utils.parse_url(url + 'repodata/repomd.xml'),
+                    stream=True,
+                    timeout=30,
+                ),
+                mock.call(
+                    requests.utils.parse_url(
+                        url + 'repodata/abc-primary.xml.gz'
+                    ),
+                    stream=True,
+                    timeout=30,
+                ),
+            ],
+            get.call_args_list,
+        )
+
+    def test_load_repomd_binary(self):
+        url = self.factory.make_url() + '/'
+        self.patch_repo(('foo', '0', '1.0', '1'))
+        repo = yum.load_repomd(url, binary=True)
+        self.assertEqual(
+            [yum.BinaryPackage('foo', '1.0-1', '1.0-1', 'foo-1.0-1.src.rpm')],
+            list(repo),
+        )
+
+    def test_load_repomd_closes_its_session(self):
+        self.patch_repo(('foo', '0', '1.0', '1'))
+        close = self.patch(requests.Session, 'close')
+        yum.load_repomd(self.factory.make_url() + '/')
+        close.assert_called_once_with()
+
+    def test_load_repomd_with_session(self):
+        self.patch_repo(('foo', '0', '1.0', '1'))
+        session = requests.Session()
+        make_session = self.patch(yum.finder, 'make_session')
+        close = self.patch(session, 'close')
+        repo = yum.load_repomd(self.factory.make_url() + '/', False, session)
+        self.assertEqual(['foo'], [package.name for package in repo])
+        make_session.assert_not_called()
+        close.assert_not_called()
+
+    def test_iter_primary_packages_does_not_expand_entities(self):
+        xml = self.make_primary_xml(('&boom;', 0, 1, 1)).replace(
+            b'<metadata',
+            b'<!DOCTYPE metadata [<!ENTITY boom "bang">]><metadata',
+        )
+        [package] = yum.iter_primary_packages(io.BytesIO(xml))
+        self.assertNotIn('bang', package.name)
 
     def test_get_repomd(self):
-        # Mock up a successful repomd fetch
         url = self.factory.make_url()
-        self.patch(requests, 'get')
-        lxml = self.patch(repomd.defusedxml.lxml, 'parse')
-        package = mock.MagicMock()
-        lxml.return_value.getroot.return_value = [package]
-
-        yum.get_repomd(self.queue, url)
-        # Mocking out all the various and sundry Package properties would be
-        # tedious, and we don't really care about anything past the package
-        # name anyhow
-        self.queue.put.assert_called_once_with(
-            (url + "/", {package.findtext.return_value: [mock.ANY]})
-        )
+        self.patch_repo(('foo', 0, 1, 1))
+        baseurl, repo = yum.get_repomd(url)
+        self.assertEqual(url + "/", baseurl)
+        self.assertEqual(['foo'], [package.name for package in repo])
 
     def test_get_repomd_http_error(self):
         # Mock up a failure to fetch the repomd
         url = self.factory.make_url()
-        load = self.patch(requests, 'get')
+        load = self.patch(requests.Session, 'get')
         load.side_effect = requests.exceptions.HTTPError()
         lxml = self.patch(repomd.defusedxml.lxml, 'parse')
 
         # Ensure that get_repomd won't fill the cache with garbage
-        yum.get_repomd(self.queue, url)
+        err = self.assertRaises(
+            requests.exceptions.HTTPError, yum.get_repomd, url
+        )
         lxml.assert_not_called()
-        self.queue.put.assert_called_once_with((load.side_effect,), timeout=30)
+        self.assertIs(load.side_effect, err)
 
     def test_get_repomd_unserializable_http_error(self):
         # Ibid, but initializing the exception with a live file pointer will
         # make it refuse to serialize
         url = self.factory.make_url()
         fp = io.BufferedReader(io.StringIO())
-        load = self.patch(requests, 'get')
+        load = self.patch(requests.Session, 'get')
         load.side_effect = requests.exceptions.RequestException(fp)
         lxml = self.patch(repomd.defusedxml.lxml, 'parse')
 
         # Ensure that we get a re-raised plain Exception
-        yum.get_repomd(self.queue, url)
+        with testtools.ExpectedException(
+            Exception, '.*re-raising as plain Exception'
+        ):
+            yum.get_repomd(url)
         lxml.assert_not_called()
-        self.queue.put.assert_called_once_with((mock.ANY,), timeout=30)
-        self.assertIn(
-            're-raising as plain Exception', str(self.queue.put.call_args)
+
+    def test_get_primary_checksum(self):
+        url = self.factory.make_url()
+        checksum = self.factory.make_string('checksum')
+        get = self.patch(requests.Session, 'get')
+        lxml = self.patch(repomd.defusedxml.lxml, 'parse')
+        lxml.return_value.findtext.return_value = checksum
+        session = requests.Session()
+        self.assertEqual(
+            checksum, yum.get_primary_checksum(url + '/', session, 30)
+        )
+        get.assert_called_once_with(
+            requests.utils.parse_url(url + '/repodata/repomd.xml'),
+            stream=True,
+            timeout=30,
+        )
+
+    def test_get_primary_checksum_missing(self):
+        url = self.factory.make_url()
+        self.patch(requests.Session, 'get')
+        lxml = self.patch(repomd.defusedxml.lxml, 'parse')
+        lxml.return_value.findtext.return_value = None
+        self.assertRaises(
+            soufi.exceptions.DownloadError,
+            yum.get_primary_checksum,
+            url,
+            requests.Session(),
+            30,
         )
 
-    def test_do_task(self):
-        # Mock up a process that does not exit upon return
+
+class TestRepomdPool(base.TestCase):
+    def make_pool(self, processes=1, **kwargs):
+        pool = yum.RepomdPool(processes=processes, **kwargs)
+        self.addCleanup(pool.terminate)
+        return pool
+
+    def test_apply(self):
+        pool = self.make_pool()
         data = self.factory.make_string('response')
-        queue = self.patch(yum, 'Queue')
-        queue.return_value.get.return_value = data
-        process = self.patch(yum, 'Process')
-        process.return_value.is_alive.return_value = True
-
-        # Ensure that the process gets shot in the head
-        response = yum.do_task('a', 'b', 'c')
-        self.assertEqual(data, response)
-        process.return_value.terminate.assert_called_once_with()
-
-    def test_do_task_empty_response(self):
-        # Mock up a process that yields an "empty-but-successful" response
-        queue = self.patch(yum, 'Queue')
-        queue.return_value.get.return_value = []
-        process = self.patch(yum, 'Process')
-        process.return_value.is_alive.return_value = False
-
-        # Ensure that the process gets shot in the head
-        response = yum.do_task('d', 'e', 'f')
-        self.assertEqual([], response)
-        process.return_value.terminate.assert_not_called()
-
-    def test_do_task_reraises_exceptions(self):
-        # Actually run a job via do_task and ensure that the resulting
+        self.assertEqual(data.upper(), pool.apply(str.upper, data))
+
+    def test_apply_reuses_pool(self):
+        pool = self.make_pool()
+        pool.apply(str.upper, 'a')
+        workers = pool._pool
+        pool.apply(str.upper, 'b')
+        self.assertIs(workers, pool._pool)
+
+    def test_apply_reraises_exceptions(self):
+        # Actually run a job in the pool and ensure that the resulting
         # exception is intact
+        pool = self.make_pool()
         data = self.factory.make_string('response')
-        err = self.assertRaises(RuntimeError, yum.do_task, kaboom, data)
+        err = self.assertRaises(RuntimeError, pool.apply, kaboom, data)
         self.assertEqual(data, str(err))
 
-    def test_do_task_handles_spawn_errors_on_silly_platforms(self):
-        # This simulates calling `process.start()` from the global scope on
+    def test_apply_uses_outcome_from_callbacks(self):
+        # The pool runs the callbacks before marking the AsyncResult as
+        # ready, so the outcome must not be read back from it.
+        pool = self.make_pool()
+        pool.apply(str.upper, 'a')
+
+        def apply_async(func, args, callback, error_callback):
+            try:
+                callback(func(*args))
+            except RuntimeError as e:
+                error_callback(e)
+            return mock.MagicMock(**{'ready.return_value': False})
+
+        self.patch(pool._pool, 'apply_async', apply_async)
+        self.assertEqual('B', pool.apply(str.upper, 'b'))
+        err = self.assertRaises(RuntimeError, pool.apply, kaboom, 'c')
+        self.assertEqual('c', str(err))
+
+    def test_apply_timeout_terminates_pool(self):
+        pool = self.make_pool(timeout=0.1)
+        pool.apply(str.upper, 'a')
+        workers = pool._pool
+        terminate = self.patch(workers, 'terminate')
+        self.patch(workers, 'apply_async')
+        with testtools.ExpectedException(
+            soufi.exceptions.DownloadError, 'Timed out after 0.1s'
+        ):
+            pool.apply(time.sleep, 10)
+        terminate.assert_called_once_with()
+        self.assertIsNone(pool._pool)
+
+    def test_apply_timeout_fails_other_jobs_in_pool(self):
+        pool = self.make_pool(processes=2, timeout=2)
+        errors = {}
+        elapsed = {}
+
+        def apply(caller):
+            start = time.monotonic()
+            try:
+                pool.apply(time.sleep, 30)
+            except soufi.exceptions.DownloadError as e:
+                errors[caller] = str(e)
+            elapsed[caller] = time.monotonic() - start
+
+        first = threading.Thread(target=apply, args=('first',))
+        first.start()
+        time.sleep(1)
+        second = threading.Thread(target=apply, args=('second',))
+        second.start()
+        first.join()
+        second.join()
+
+        self.assertIn('Timed out', errors['first'])
+        self.assertIn('torn down', errors['second'])
+        # The second job fails when the first times out, not when its own
+        # timeout is up.
+        self.assertLess(elapsed['second'], 1.8)
+
+    def test_apply_timeout_leaves_newer_pool_alone(self):
+        # A job that times out in a pool that was already replaced must not
+        # take the replacement down with it.
+        pool = self.make_pool()
+        old = mock.MagicMock()
+        new = mock.MagicMock()
+        pool._pool = new
+        pool._discard(old)
+        old.terminate.assert_called_once_with()
+        new.terminate.assert_not_called()
+        self.assertIs(new, pool._pool)
+
+    def test_terminate(self):
+        pool = self.make_pool()
+        pool.apply(str.upper, 'a')
+        terminate = self.patch(pool._pool, 'terminate')
+        pool.terminate()
+        terminate.assert_called_once_with()
+        self.assertIsNone(pool._pool)
+        # Terminating an idle pool is harmless
+        pool.terminate()
+
+    def test_handles_spawn_errors_on_silly_platforms(self):
+        # This simulates starting worker processes from the global scope on
         # platforms that do not support such things.  The default traceback
         # is not intrinsically helpful, so test that we kick back a more
         # useful error message.  See issue #31.
-        process = self.patch(yum, 'Process')
-        process.return_value.start.side_effect = RuntimeError(
+        self.patch(multiprocessing, 'Pool').side_effect = RuntimeError(
             'Simulating a platform that is not using fork to start children'
         )
-        err = self.assertRaises(SystemExit, yum.do_task, None)
+        pool = self.make_pool()
+        err = self.assertRaises(SystemExit, pool.apply, str.upper, 'a')
         self.assertIn('FATAL: ', str(err))
 
-    def test_do_task_leaves_other_spawn_errors_alone(self):
+    def test_leaves_other_spawn_errors_alone(self):
         # As per the above, other RuntimeError exceptions should pass through
-        process = self.patch(yum, 'Process')
-        process.return_value.start.side_effect = RuntimeError
-        self.assertRaises(RuntimeError, yum.do_task, None)
-
-
-# A simple subprocess function that throws a test exception.  Used by
-# TestYumFinderHelpers.test_do_task_reraises_exceptions
-def kaboom(queue, data):
-    try:
-        raise RuntimeError(data)
-    except Exception as e:
-        queue.put((e,))
-    # This should never get called, but just in case...
-    queue.put([])
+        self.patch(multiprocessing, 'Pool').side_effect = RuntimeError
+        pool = self.make_pool()
+        self.assertRaises(RuntimeError, pool.apply, str.upper, 'a')
+
+    def test_default_repomd_pool(self):
+        self.patch(yum, '_default_pool', None)
+        pool = yum.default_repomd_pool()
+        self.assertIsInstance(pool, yum.RepomdPool)
+        self.assertIs(pool, yum.default_repomd_pool())
+
+    def test_finder_uses_default_pool(self):
+        finder = YumFinderImpl('name', 'version', SourceType.os)
+        self.assertIs(yum.default_repomd_pool(), finder.repomd_pool)
+
+    def test_finder_uses_passed_pool(self):
+        pool = self.make_pool()
+        finder = YumFinderImpl(
+            'name', 'version', SourceType.os, repomd_pool=pool
+        )
+        self.assertIs(pool, finder.repomd_pool)
+
+
+# A simple worker function that throws a test exception.  Used by
+# TestRepomdPool.test_apply_reraises_exceptions
+def kaboom(data):
+    raise RuntimeError(data)
 
 
 class TestYumDiscoveredSource(base.TestCase):
@@ -3,10 +3,12 @@
 
 from unittest import mock
 
+import fixtures
 from click.testing import CliRunner
-from testtools.matchers import Contains, Not
+from testtools.matchers import Contains, Equals, Not
 
-from soufi import cli
+from soufi import cli, finder
+from soufi.download_cache import DownloadCache
 from soufi.testing import base
 
 
@@ -47,3 +49,61 @@ class TestCLI(base.TestCase):
         self.assertEqual(0, result.exit_code, result.output)
         self.assertThat(result.output, Contains("\n  find"))
         self.assertThat(result.output, Contains("history"))
+
+    def find_with_output(self, *args):
+        disc_source = mock.MagicMock(spec=finder.DiscoveredSource)
+        self.patch(cli.Finder, "debian").return_value = disc_source
+        make_archive = self.patch(cli, "make_archive_from_discovery_source")
+        result = self.runner.invoke(
+            cli.main, ["find", "debian", "foo", "1.2.3", *args]
+        )
+        self.assertEqual(0, result.exit_code, result.output)
+        return disc_source, make_archive
+
+    def test_find_compression_follows_output_extension(self):
+        disc_source, make_archive = self.find_with_output("-o", "foo.tar.zst")
+        self.assertEqual(finder.Compression.zstd, disc_source.compression)
+        make_archive.assert_called_once_with(disc_source, "foo.tar.zst")
+
+    def test_find_compression_option(self):
+        disc_source, _ = self.find_with_output(
+            "-o",
+            "foo.tar.zst",
+            "--compression",
+            "gzip",
+            "--compression-threads",
+            "0",
+        )
+        self.assertEqual(finder.Compression.gzip, disc_source.compression)
+        self.assertEqual(0, disc_source.compression_threads)
+        self.assertTrue(disc_source.recompress)
+
+    def test_find_no_recompress_option(self):
+        disc_source, _ = self.find_with_output("-O", "--no-recompress")
+        self.assertFalse(disc_source.recompress)
+
+    def test_compression_from_file_name(self):
+        for fname, expected in (
+            ("foo.tar", "none"),
+            ("foo.tar.gz", "gzip"),
+            ("foo.tgz", "gzip"),
+            ("foo.tar.xz", "xz"),
+            ("foo.tar.zst", "zstd"),
+            ("foo.zip", None),
+        ):
+            self.expectThat(
+                cli.compression_from_file_name(fname), Equals(expected)
+            )
+
+    def test_find_download_cache_option(self):
+        cache_dir = self.useFixture(fixtures.TempDir()).path
+        disc_source, _ = self.find_with_output(
+            "-O", "--download-cache", cache_dir, "--download-cache-size", "2"
+        )
+        self.assertIsInstance(disc_source.download_cache, DownloadCache)
+        self.assertEqual(cache_dir, str(disc_source.download_cache.path))
+        self.assertEqual(2 * 1024 * 1024, disc_source.download_cache.max_size)
+
+    def test_find_without_download_cache(self):
+        disc_source, _ = self.find_with_output("-O")
+        self.assertNotIsInstance(disc_source.download_cache, DownloadCache)
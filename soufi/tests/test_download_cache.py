@@ -0,0 +1,179 @@
+# Copyright (c) 2026 Cisco Systems, Inc. and its affiliates
+# All rights reserved.
+
+import hashlib
+import itertools
+import os
+import pathlib
+
+import fixtures
+
+from soufi import download_cache
+from soufi.download_cache import DownloadCache
+from soufi.testing import base
+
+
+class TestDownloadCache(base.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.tmpdir = pathlib.Path(self.useFixture(fixtures.TempDir()).path)
+        self.cache_dir = self.tmpdir / 'cache'
+
+    def make_file(self, content=None):
+        if content is None:
+            content = self.factory.make_bytes('content')
+        path = self.tmpdir / self.factory.make_string('file')
+        path.write_bytes(content)
+        return path
+
+    def test_makes_cache_dir(self):
+        DownloadCache(self.cache_dir)
+        self.assertTrue((self.cache_dir / 'blobs').is_dir())
+        self.assertTrue((self.cache_dir / 'index.sqlite').is_file())
+
+    def test_keys_prefer_digests(self):
+        url = self.factory.make_url()
+        self.assertEqual(
+            ['sha512:abc', f"url:{url}"],
+            DownloadCache.keys(url, {'sha512': 'ABC'}),
+        )
+
+    def test_get_by_url(self):
+        cache = DownloadCache(self.cache_dir)
+        path = self.make_file()
+        url = self.factory.make_url()
+        sha256 = cache.add(path, url=url)
+
+        blob = cache.get(url=url)
+        self.assertEqual(hashlib.sha256(path.read_bytes()).hexdigest(), sha256)
+        self.assertEqual(path.read_bytes(), blob.read_bytes())
+        self.assertEqual(sha256, blob.name)
+        self.assertIsNone(cache.get(url=self.factory.make_url()))
+
+    def test_get_by_digest_from_any_url(self):
+        cache = DownloadCache(self.cache_dir)
+        path = self.make_file()
+        sha1 = hashlib.sha1(path.read_bytes()).hexdigest()  # noqa: S324
+        cache.add(path, url=self.factory.make_url(), digests={'sha1': sha1})
+
+        blob = cache.get(
+            url=self.factory.make_url(), digests={'sha1': sha1.upper()}
+        )
+        self.assertEqual(path.read_bytes(), blob.read_bytes())
+
+    def test_get_by_sha256(self):
+        cache = DownloadCache(self.cache_dir)
+        path = self.make_file()
+        sha256 = cache.add(path)
+        self.assertIsNotNone(cache.get(digests={'sha256': sha256}))
+
+    def test_add_does_not_record_mismatched_digests(self):
+        cache = DownloadCache(self.cache_dir)
+        path = self.make_file()
+        wrong = hashlib.sha512(b'wrong').hexdigest()
+        url = self.factory.make_url()
+        cache.add(path, url=url, digests={'sha512': wrong})
+
+        self.assertIsNone(cache.get(digests={'sha512': wrong}))
+        self.assertIsNotNone(cache.get(url=url))
+
+    def test_add_ignores_unknown_algorithms(self):
+        cache = DownloadCache(self.cache_dir)
+        path = self.make_file()
+        url = self.factory.make_url()
+        digests = {'md4000': hashlib.sha256(b'unknown').hexdigest()}
+        cache.add(path, url=url, digests=digests)
+
+        self.assertIsNone(cache.get(digests=digests))
+        self.assertIsNotNone(cache.get(url=url))
+
+    def test_add_stores_identical_files_once(self):
+        cache = DownloadCache(self.cache_dir)
+        content = self.factory.make_bytes('content')
+        url1, url2 = self.factory.make_url(), self.factory.make_url()
+        cache.add(self.make_file(content), url=url1)
+        cache.add(self.make_file(content), url=url2)
+
+        self.assertEqual(cache.get(url=url1), cache.get(url=url2))
+        blobs = [p for p in (self.cache_dir / 'blobs').rglob('*')]
+        self.assertEqual(1, len([p for p in blobs if p.is_file()]))
+
+    def test_persists(self):
+        path = self.make_file()
+        url = self.factory.make_url()
+        DownloadCache(self.cache_dir).add(path, url=url)
+        self.assertIsNotNone(DownloadCache(self.cache_dir).get(url=url))
+
+    def test_copy(self):
+        cache = DownloadCache(self.cache_dir)
+        path = self.make_file()
+        url = self.factory.make_url()
+        cache.add(path, url=url)
+        target = self.tmpdir / 'target'
+
+        self.assertTrue(cache.copy(target, url=url))
+        self.assertEqual(path.read_bytes(), target.read_bytes())
+        self.assertFalse(
+            cache.copy(self.tmpdir / 'other', url=self.factory.make_url())
+        )
+
+    def test_copies_across_filesystems(self):
+        cache = DownloadCache(self.cache_dir)
+        path = self.make_file()
+        url = self.factory.make_url()
+        link = self.patch(download_cache.os, 'link')
+        link.side_effect = OSError('Invalid cross-device link')
+        cache.add(path, url=url)
+        target = self.tmpdir / 'target'
+
+        self.assertTrue(cache.copy(target, url=url))
+        self.assertEqual(path.read_bytes(), target.read_bytes())
+
+    def test_copy_of_concurrently_evicted_file(self):
+        cache = DownloadCache(self.cache_dir)
+        url = self.factory.make_url()
+        cache.add(self.make_file(), url=url)
+        link = self.patch(download_cache.os, 'link')
+        link.side_effect = FileNotFoundError()
+        self.assertFalse(cache.copy(self.tmpdir / 'target', url=url))
+
+    def test_forgets_files_evicted_by_another_process(self):
+        cache = DownloadCache(self.cache_dir)
+        url = self.factory.make_url()
+        cache.add(self.make_file(), url=url)
+        os.unlink(cache.get(url=url))
+
+        self.assertIsNone(cache.get(url=url))
+        [count] = cache._conn.execute('SELECT COUNT(*) FROM keys').fetchone()
+        self.assertEqual(0, count)
+
+    def test_evicts_least_recently_used(self):
+        clock = itertools.count()
+        self.patch(download_cache.time, 'time', lambda: next(clock))
+        cache = DownloadCache(self.cache_dir, max_size=25)
+        urls = [self.factory.make_url() for _ in range(3)]
+        for i, url in enumerate(urls):
+            cache.add(self.make_file(bytes([i]) * 10), url=url)
+            if i == 1:
+                # Use the first file again, so the second is evicted.
+                cache.get(url=urls[0])
+
+        self.assertIsNotNone(cache.get(url=urls[0]))
+        self.assertIsNone(cache.get(url=urls[1]))
+        self.assertIsNotNone(cache.get(url=urls[2]))
+        self.assertEqual(
+            2,
+            len(
+                [
+                    p
+                    for p in (self.cache_dir / 'blobs').rglob('*')
+                    if p.is_file()
+                ]
+            ),
+        )
+
+    def test_keeps_added_file_bigger_than_max_size(self):
+        cache = DownloadCache(self.cache_dir, max_size=5)
+        url = self.factory.make_url()
+        cache.add(self.make_file(b'x' * 10), url=url)
+        self.assertIsNotNone(cache.get(url=url))
@@ -1,13 +1,32 @@
 # Copyright (c) 2021-2024 Cisco Systems, Inc. and its affiliates
 # All rights reserved.
 
+from unittest import mock
 from unittest.mock import MagicMock
 
+import requests
+
+from soufi import exceptions, finder
 from soufi.finder import SourceType, factory
 from soufi.finders import ubuntu
 from soufi.testing import base
 
 
+class FakeFinder(finder.SourceFinder):
+    distro = "fake"
+    instances = 0
+
+    def __init__(self, *args, missing=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        self.missing = missing
+        type(self).instances += 1
+
+    def _find(self):
+        if self.name in self.missing:
+            raise exceptions.SourceNotFound
+        return (self.name, self.version, self.s_type)
+
+
 class TestFinderFactory(base.TestCase):
     def test_factory_loads_finder_classes(self):
         # Until the finder path is configurable, just check that the
@@ -22,7 +41,37 @@ class TestFinderFactory(base.TestCase):
         finder_mock = MagicMock()
         factory._finders[ubuntu.UbuntuFinder.distro] = finder_mock
         factory(ubuntu.UbuntuFinder.distro, name, version, SourceType.os)
-        finder_mock.assert_called_once_with(name, version, SourceType.os)
+        finder_mock.assert_called_once_with(
+            name, version, SourceType.os, session=factory.session
+        )
+
+    def test_factory_shares_session_between_finders(self):
+        finder_mock = MagicMock()
+        self.patch(factory, '_finders', {'fake': finder_mock})
+        factory('fake')
+        factory('fake')
+        [first, second] = finder_mock.call_args_list
+        self.assertIsInstance(first.kwargs['session'], requests.Session)
+        self.assertIs(first.kwargs['session'], second.kwargs['session'])
+
+    def test_factory_does_not_override_explicit_session(self):
+        finder_mock = MagicMock()
+        self.patch(factory, '_finders', {'fake': finder_mock})
+        factory('fake', session=mock.sentinel.session)
+        finder_mock.assert_called_once_with(session=mock.sentinel.session)
+
+    def test_configure_session_with_session(self):
+        self.patch(factory, '_session', None)
+        session = requests.Session()
+        factory.configure_session(session)
+        self.assertIs(session, factory.session)
+
+    def test_configure_session_with_kwargs(self):
+        self.patch(factory, '_session', None)
+        make_session = self.patch(finder, 'make_session')
+        factory.configure_session(pool_size=42, retries=0)
+        make_session.assert_called_once_with(pool_size=42, retries=0)
+        self.assertIs(make_session.return_value, factory.session)
 
     def test_supported_types(self):
         expected = [
@@ -43,3 +92,134 @@ class TestFinderFactory(base.TestCase):
             "ubuntu",
         ]
         self.assertListEqual(expected, factory.supported_types)
+
+
+class TestFinderFactoryFindMany(base.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.patch(FakeFinder, 'instances', 0)
+        self.patch(
+            factory,
+            '_finders',
+            {'fake': FakeFinder, 'python': FakeFinder},
+        )
+
+    def make_packages(self, distro='fake', count=5):
+        return [
+            (
+                distro,
+                self.factory.make_string('name'),
+                self.factory.make_string('version'),
+            )
+            for _ in range(count)
+        ]
+
+    def test_finds_all_packages(self):
+        packages = self.make_packages()
+        results = dict(factory.find_many(packages))
+        self.assertEqual(
+            {
+                package: (package[1], package[2], SourceType.os)
+                for package in packages
+            },
+            results,
+        )
+
+    def test_makes_one_finder_per_type(self):
+        packages = self.make_packages() + self.make_packages('python')
+        results = list(factory.find_many(packages, max_workers=3))
+        self.assertEqual(len(packages), len(results))
+        self.assertEqual(2, FakeFinder.instances)
+
+    def test_uses_language_source_types(self):
+        [package] = self.make_packages('python', count=1)
+        [(_, result)] = factory.find_many([package])
+        self.assertEqual(SourceType.python, result[2])
+
+    def test_passes_kwargs_to_finders(self):
+        packages = self.make_packages('fake', 2)
+        missing = packages[0][1]
+        results = dict(
+            factory.find_many(
+                packages,
+                finder_kwargs={'fake': {'missing': (missing,)}},
+                timeout=5,
+            )
+        )
+        self.assertIsInstance(results[packages[0]], exceptions.SourceNotFound)
+        self.assertEqual(
+            (packages[1][1], packages[1][2], SourceType.os),
+            results[packages[1]],
+        )
+
+    def test_propagates_unexpected_errors(self):
+        packages = self.make_packages(count=1)
+        self.patch(FakeFinder, '_find').side_effect = ValueError
+        self.assertRaises(ValueError, list, factory.find_many(packages))
+
+    def test_serializes_finders_that_are_not_thread_safe(self):
+        self.patch(FakeFinder, 'thread_safe', False)
+        packages = self.make_packages()
+        results = list(factory.find_many(packages))
+        self.assertEqual(len(packages), len(results))
+
+    def test_finder_kwargs_override_kwargs(self):
+        packages = self.make_packages('fake', 1)
+        fake_finder = MagicMock(wraps=FakeFinder)
+        self.patch(factory, '_finders', {'fake': fake_finder})
+        results = dict(
+            factory.find_many(
+                packages,
+                finder_kwargs={'fake': {'timeout': 10}},
+                timeout=5,
+                s_type=SourceType.python,
+            )
+        )
+        self.assertEqual(SourceType.os, results[packages[0]][2])
+        self.assertEqual(
+            dict(timeout=10, s_type=SourceType.os, session=factory.session),
+            fake_finder.call_args.kwargs,
+        )
+
+    def test_reports_unknown_types(self):
+        [unknown] = self.make_packages('unknown', 1)
+        packages = self.make_packages('fake', 2)
+        results = dict(factory.find_many([unknown, *packages]))
+        self.assertIsInstance(results[unknown], KeyError)
+        self.assertIn("'unknown'", str(results[unknown]))
+        self.assertEqual(
+            (packages[1][1], packages[1][2], SourceType.os),
+            results[packages[1]],
+        )
+
+    def test_reports_finders_that_cannot_be_made(self):
+        broken = MagicMock(side_effect=TypeError('missing aports_dir'))
+        self.patch(factory, '_finders', {'fake': FakeFinder, 'broken': broken})
+        failing = self.make_packages('broken', 2)
+        packages = self.make_packages('fake', 2)
+        results = dict(factory.find_many([*failing, *packages]))
+        for package in failing:
+            self.assertIsInstance(results[package], TypeError)
+        # The finder is only tried once.
+        broken.assert_called_once()
+        self.assertEqual(
+            (packages[1][1], packages[1][2], SourceType.os),
+            results[packages[1]],
+        )
+
+    def test_stops_early(self):
+        packages = self.make_packages()
+        found = []
+        find = FakeFinder._find
+
+        def _find(finder):
+            found.append(finder.name)
+            return find(finder)
+
+        self.patch(FakeFinder, '_find', _find)
+        results = factory.find_many(packages, max_workers=1)
+        next(results)
+        results.close()
+        # The lookup being collected, and at most one more that had already
+        # started, ran; the rest were cancelled.
+        self.assertIn(len(found), (1, 2))
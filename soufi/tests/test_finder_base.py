@@ -1,23 +1,79 @@
 # Copyright (c) 2021 Cisco Systems, Inc. and its affiliates
 # All rights reserved.
 
+import contextlib
+import gzip
+import hashlib
+import lzma
+import os
 import pathlib
 import shutil
 import tarfile
 import tempfile
+import threading
+import time
 from io import BytesIO
+from unittest import mock
+from unittest.mock import MagicMock
 
 import fixtures
+import httpx
 import requests
+import testscenarios
 import testtools
-from testtools.matchers import DirExists, Equals, FileContains, Not
+import urllib3
+import zstandard
+from testtools import ExpectedException
+from testtools.matchers import (
+    Contains,
+    DirExists,
+    Equals,
+    FileContains,
+    Is,
+    IsInstance,
+    Not,
+)
 from testtools.matchers._basic import SameMembers
 
-from soufi import exceptions
-from soufi.finder import DiscoveredSource, SourceFinder, SourceType
+from soufi import exceptions, finder
+from soufi.download_cache import DownloadCache
+from soufi.finder import (
+    Compression,
+    DiscoveredSource,
+    SourceFinder,
+    SourceType,
+    make_async_client,
+    make_session,
+    open_compressor,
+)
 from soufi.testing import base
 
 
+class TestMakeSession(base.TestCase):
+    def test_mounts_pooled_adapter(self):
+        session = make_session(pool_size=7, retries=2, backoff_factor=0.1)
+        for scheme in ('http://', 'https://'):
+            adapter = session.get_adapter(scheme)
+            self.expectThat(adapter._pool_connections, Equals(7))
+            self.expectThat(adapter._pool_maxsize, Equals(7))
+            self.expectThat(adapter.max_retries.total, Equals(2))
+            self.expectThat(adapter.max_retries.backoff_factor, Equals(0.1))
+            self.expectThat(adapter.max_retries.raise_on_status, Equals(False))
+
+
+class TestMakeAsyncClient(base.TestCase):
+    def test_makes_client(self):
+        client = make_async_client(timeout=5)
+        self.expectThat(client, IsInstance(httpx.AsyncClient))
+        self.expectThat(client.timeout, Equals(httpx.Timeout(5)))
+        self.expectThat(client.follow_redirects, Equals(True))
+
+    def test_raises_without_httpx(self):
+        self.patch(finder, 'httpx', None)
+        e = self.assertRaises(RuntimeError, make_async_client)
+        self.assertIn('soufi[async]', str(e))
+
+
 class TestSourceFinderBase(base.TestCase):
     class TestFinder(SourceFinder):
         def distro(self):
@@ -38,6 +94,251 @@ class TestSourceFinderBase(base.TestCase):
         self.expectThat(sf.version, Equals(version))
         self.expectThat(sf.s_type, Equals(s_type))
 
+    def test_uses_passed_session(self):
+        session = requests.Session()
+        sf = self.TestFinder(session=session)
+        self.assertIs(session, sf.session)
+
+    def test_makes_session_by_default(self):
+        sf = self.TestFinder()
+        self.assertIsInstance(sf.session, requests.Session)
+
+    def test_get_url_uses_session(self):
+        session = MagicMock()
+        session.get.return_value.status_code = requests.codes.ok
+        sf = self.TestFinder(session=session)
+        url = self.factory.make_url()
+        response = sf.get_url(url)
+        session.get.assert_called_once_with(url, timeout=30)
+        self.assertIs(session.get.return_value, response)
+
+    def make_response(self, status_code=requests.codes.ok, headers=None):
+        response = MagicMock()
+        response.status_code = status_code
+        response.headers = requests.structures.CaseInsensitiveDict(
+            headers or {}
+        )
+        return response
+
+    def make_revalidating_finder(self, *responses):
+        session = MagicMock()
+        session.get.side_effect = responses
+        return self.TestFinder(
+            session=session,
+            cache_backend='dogpile.cache.memory',
+            cache_ttl=3600,
+        )
+
+    def test_get_url_revalidates_expired_response(self):
+        validators = {
+            'ETag': self.factory.make_string('etag'),
+            'Last-Modified': self.factory.make_string('date'),
+        }
+        cached = self.make_response(headers=validators)
+        sf = self.make_revalidating_finder(
+            cached, self.make_response(requests.codes.not_modified)
+        )
+        url = self.factory.make_url()
+        sf.get_url(url, headers={'Accept': 'application/json'})
+        # Soft invalidation leaves the value in place, as expiry does.
+        sf._cache.invalidate(hard=False)
+        response = sf.get_url(url, headers={'Accept': 'application/json'})
+        self.expectThat(response, Is(cached))
+        self.expectThat(
+            sf.session.get.call_args.kwargs['headers'],
+            Equals(
+                {
+                    'Accept': 'application/json',
+                    'If-None-Match': validators['ETag'],
+                    'If-Modified-Since': validators['Last-Modified'],
+                }
+            ),
+        )
+
+    def test_get_url_replaces_changed_response(self):
+        cached = self.make_response(headers={'ETag': 'old'})
+        changed = self.make_response(headers={'ETag': 'new'})
+        sf = self.make_revalidating_finder(cached, changed)
+        url = self.factory.make_url()
+        sf.get_url(url)
+        sf._cache.invalidate(hard=False)
+        self.expectThat(sf.get_url(url), Is(changed))
+        self.expectThat(
+            sf.session.get.call_args.kwargs['headers'],
+            Equals({'If-None-Match': 'old'}),
+        )
+
+    def test_get_url_refetches_without_validators(self):
+        cached = self.make_response()
+        fresh = self.make_response()
+        sf = self.make_revalidating_finder(cached, fresh)
+        url = self.factory.make_url()
+        sf.get_url(url)
+        sf._cache.invalidate(hard=False)
+        self.expectThat(sf.get_url(url), Is(fresh))
+        sf.session.get.assert_called_with(url, timeout=30)
+
+    def test_get_url_raises_on_unexpected_not_modified(self):
+        # A 304 with nothing to revalidate is an error like any other.
+        sf = self.make_revalidating_finder(
+            self.make_response(requests.codes.not_modified)
+        )
+        self.assertRaises(
+            exceptions.DownloadError, sf.get_url, self.factory.make_url()
+        )
+
+    def make_finder(self, **kwargs):
+        return self.TestFinder(
+            name=self.factory.make_string(),
+            version=self.factory.make_string(),
+            s_type=self.factory.pick_enum(SourceType),
+            **kwargs,
+        )
+
+    def test_makes_async_client_on_first_use(self):
+        sf = self.make_finder(timeout=7)
+        client = sf.async_client
+        self.expectThat(client, IsInstance(httpx.AsyncClient))
+        self.expectThat(client.timeout, Equals(httpx.Timeout(7)))
+        self.expectThat(sf.async_client, Is(client))
+
+    def test_uses_passed_async_client(self):
+        client = httpx.AsyncClient()
+        sf = self.make_finder(async_client=client)
+        self.assertIs(client, sf.async_client)
+
+    def test_afind_runs_find_in_executor(self):
+        sf = self.make_finder()
+        find = self.patch(sf, '_find')
+        result = self.run_async(sf.afind())
+        self.assertIs(find.return_value, result)
+
+    def test_find_sets_download_cache_on_source(self):
+        cache = MagicMock()
+        sf = self.make_finder(download_cache=cache)
+        find = self.patch(sf, '_find')
+        self.assertIs(cache, sf.find().download_cache)
+        self.assertIs(cache, self.run_async(sf.afind()).download_cache)
+        self.assertIs(find.return_value, sf.find())
+
+    def test_afind_overrides_constructor_values(self):
+        sf = self.make_finder()
+        self.patch(sf, '_find')
+        name = self.factory.make_string()
+        version = self.factory.make_string()
+        self.run_async(sf.afind(name, version))
+        self.expectThat(sf.name, Equals(name))
+        self.expectThat(sf.version, Equals(version))
+
+    def test_afind_error_if_missing_value(self):
+        sf = self.TestFinder()
+        self.assertRaises(ValueError, self.run_async, sf.afind())
+
+    def test_aget_release_history_runs_in_executor(self):
+        sf = self.make_finder()
+        history = self.patch(sf, '_get_release_history')
+        result = self.run_async(sf.aget_release_history())
+        self.assertIs(history.return_value, result)
+
+    def test_aget_url(self):
+        sf = self.make_finder()
+        data = {self.factory.make_string(): self.factory.make_string()}
+        handler = self.patch_async_client(sf, json=data)
+        # httpx normalizes the host name.
+        url = self.factory.make_url().lower()
+        response = self.run_async(sf.aget_url(url, params=dict(a='b')))
+        self.expectThat(response.json(), Equals(data))
+        [request] = [call.args[0] for call in handler.call_args_list]
+        self.expectThat(str(request.url), Equals(f"{url}?a=b"))
+        self.expectThat(request.method, Equals('GET'))
+
+    def test_aget_url_raises_on_error(self):
+        sf = self.make_finder()
+        self.patch_async_client(sf, response_code=httpx.codes.NOT_FOUND)
+        url = self.factory.make_url()
+        self.assertRaises(
+            exceptions.DownloadError, self.run_async, sf.aget_url(url)
+        )
+
+    def test_aget_url_caches_responses(self):
+        sf = self.make_finder(cache_backend='dogpile.cache.memory')
+        handler = self.patch_async_client(sf, content=b'data')
+        url = self.factory.make_url()
+
+        async def get_twice():
+            await sf.aget_url(url)
+            return await sf.aget_url(url)
+
+        response = self.run_async(get_twice())
+        self.expectThat(response.content, Equals(b'data'))
+        self.expectThat(handler.call_count, Equals(1))
+
+    def test_aget_url_revalidates_expired_response(self):
+        sf = self.make_finder(
+            cache_backend='dogpile.cache.memory', cache_ttl=3600
+        )
+        etag = self.factory.make_string('etag')
+
+        def responder(request):
+            if request.headers.get('If-None-Match') == etag:
+                return httpx.Response(httpx.codes.NOT_MODIFIED)
+            return httpx.Response(
+                httpx.codes.OK, content=b'data', headers={'ETag': etag}
+            )
+
+        handler = self.patch_async_client(sf, responder=responder)
+        url = self.factory.make_url()
+
+        async def get_expired():
+            first = await sf.aget_url(url)
+            sf._cache.invalidate(hard=False)
+            return first, await sf.aget_url(url)
+
+        first, second = self.run_async(get_expired())
+        self.expectThat(second, Is(first))
+        self.expectThat(handler.call_count, Equals(2))
+
+    def test_atest_url(self):
+        sf = self.make_finder()
+        handler = self.patch_async_client(sf)
+        url = self.factory.make_url()
+        response = self.run_async(sf.atest_url(url))
+        self.expectThat(response.status_code, Equals(httpx.codes.OK))
+        self.expectThat(handler.call_args.args[0].method, Equals('HEAD'))
+
+    def test_atest_url_returns_none_on_error(self):
+        sf = self.make_finder()
+        self.patch_async_client(sf, response_code=httpx.codes.NOT_FOUND)
+        url = self.factory.make_url()
+        self.assertIsNone(self.run_async(sf.atest_url(url)))
+
+    def test_atest_url_retries_with_get_if_head_fails(self):
+        sf = self.make_finder()
+
+        def responder(request):
+            if request.method == 'HEAD':
+                return httpx.Response(httpx.codes.METHOD_NOT_ALLOWED)
+            return httpx.Response(httpx.codes.OK)
+
+        handler = self.patch_async_client(sf, responder=responder)
+        url = self.factory.make_url()
+        response = self.run_async(sf.atest_url(url))
+        self.expectThat(response.status_code, Equals(httpx.codes.OK))
+        self.expectThat(
+            [call.args[0].method for call in handler.call_args_list],
+            Equals(['HEAD', 'GET']),
+        )
+
+    def test_atest_url_timeout(self):
+        sf = self.make_finder()
+
+        def responder(request):
+            raise httpx.ReadTimeout('timeout', request=request)
+
+        self.patch_async_client(sf, responder=responder)
+        url = self.factory.make_url()
+        self.assertFalse(self.run_async(sf.atest_url(url)))
+
     def test_requires_distro_property(self):
         class TestFinder(SourceFinder):
             def find(self):
@@ -145,8 +446,30 @@ class TestSourceFinderBase(base.TestCase):
         )
 
 
+class FakeBody:
+    """A streamed response body, optionally interrupted part way through."""
+
+    def __init__(self, content, fail_after=None, closes=False):
+        self.content = content
+        self.fail_after = fail_after
+        self.closes = closes
+
+    def stream(self, chunk_size, decode_content=None):
+        if self.fail_after is None:
+            yield self.content
+            return
+        yield self.content[: self.fail_after]
+        if not self.closes:
+            raise urllib3.exceptions.ProtocolError('Connection broken')
+
+    def close(self):
+        pass
+
+
 class TestDiscoveredSourceBase(base.TestCase):
     class TestDiscoveredSource(DiscoveredSource):
+        download_backoff_factor = 0
+
         def __init__(self, filename=None, content=None, *args, **kwargs):
             super().__init__(*args, **kwargs)
             self.fake_content = content
@@ -187,7 +510,7 @@ class TestDiscoveredSourceBase(base.TestCase):
         response = requests.Response()
         response.status_code = requests.codes.ok
         response.raw = BytesIO(content)
-        get = self.patch(requests, 'get')
+        get = self.patch(requests.Session, 'get')
         get.return_value = response
 
         f = self.factory.make_string('filename')
@@ -203,6 +526,19 @@ class TestDiscoveredSourceBase(base.TestCase):
         with open(returned_path, 'rb') as fd:
             self.assertThat(fd.read(), Equals(content))
 
+    def test_download_file_uses_session(self):
+        tmpdir = self.useFixture(fixtures.TempDir()).path
+        url = self.factory.make_url()
+        response = requests.Response()
+        response.status_code = requests.codes.ok
+        response.raw = BytesIO(b'')
+        session = MagicMock()
+        session.get.return_value = response
+
+        tds = self.TestDiscoveredSource(urls=[], session=session)
+        tds.download_file(tmpdir, self.factory.make_string(), url)
+        session.get.assert_called_once_with(url, stream=True, timeout=30)
+
     def test_download_file_raises_on_http_errors(self):
         tmpdir = self.useFixture(fixtures.TempDir()).path
         target = self.factory.make_string('filename')
@@ -210,7 +546,7 @@ class TestDiscoveredSourceBase(base.TestCase):
         response = requests.Response()
         response.status_code = requests.codes.not_found
         response.raw = BytesIO(b'')
-        get = self.patch(requests, 'get')
+        get = self.patch(requests.Session, 'get')
         get.return_value = response
 
         tds = self.TestDiscoveredSource(urls=[])
@@ -227,6 +563,463 @@ class TestDiscoveredSourceBase(base.TestCase):
         get.assert_called_once_with(url, stream=True, timeout=30)
         self.assertFalse(expected_path.exists())
 
+    def serve(
+        self, content, ranges=True, failures=(), closes=False, etag='"v1"'
+    ):
+        """Patch Session.get to serve `content` from any URL.
+
+        Successive responses are interrupted after the numbers of bytes in
+        `failures`, by an error or, if `closes`, by the connection closing.
+
+        :return: A list of the headers of each request made.
+        """
+        failures = list(failures)
+        requests_made = []
+
+        def get(session, url, stream, timeout, headers=None):
+            requests_made.append(headers)
+            response = requests.Response()
+            response.status_code = requests.codes.ok
+            body = content
+            if headers and 'Range' in headers and ranges:
+                start, end = headers['Range'].split('=')[1].split('-')
+                body = content[int(start) : int(end) + 1]
+                response.status_code = requests.codes.partial
+            if ranges:
+                response.headers['Accept-Ranges'] = 'bytes'
+                response.headers['ETag'] = etag
+            response.headers['Content-Length'] = str(len(body))
+            fail_after = failures.pop(0) if failures else None
+            response.raw = FakeBody(body, fail_after, closes)
+            return response
+
+        self.patch(requests.Session, 'get', get)
+        return requests_made
+
+    def download(self, tds):
+        tmpdir = self.useFixture(fixtures.TempDir()).path
+        path = tds.download_file(
+            tmpdir, self.factory.make_string(), self.factory.make_url()
+        )
+        return path.read_bytes()
+
+    def test_download_file_resumes_interrupted_download(self):
+        content = self.factory.make_bytes('content') * 10
+        requests_made = self.serve(content, failures=[30, 20])
+        tds = self.TestDiscoveredSource(urls=[])
+
+        self.assertEqual(content, self.download(tds))
+        end = len(content) - 1
+        self.assertEqual(
+            [
+                None,
+                {'Range': f'bytes=30-{end}', 'If-Range': '"v1"'},
+                {'Range': f'bytes=50-{end}', 'If-Range': '"v1"'},
+            ],
+            requests_made,
+        )
+
+    def test_download_file_resumes_when_connection_closes_early(self):
+        content = self.factory.make_bytes('content') * 10
+        requests_made = self.serve(content, failures=[30], closes=True)
+        tds = self.TestDiscoveredSource(urls=[])
+
+        self.assertEqual(content, self.download(tds))
+        self.assertEqual(2, len(requests_made))
+
+    def test_download_file_resumes_without_validator(self):
+        content = self.factory.make_bytes('content') * 10
+        requests_made = self.serve(content, failures=[30], etag=None)
+        tds = self.TestDiscoveredSource(urls=[])
+
+        self.assertEqual(content, self.download(tds))
+        self.assertEqual(
+            {'Range': f'bytes=30-{len(content) - 1}'}, requests_made[1]
+        )
+
+    def test_download_file_restarts_without_range_support(self):
+        content = self.factory.make_bytes('content') * 10
+        requests_made = self.serve(content, ranges=False, failures=[30])
+        tds = self.TestDiscoveredSource(urls=[])
+
+        self.assertEqual(content, self.download(tds))
+        self.assertEqual([None, {}], requests_made)
+
+    def test_download_file_gives_up_after_retries(self):
+        content = self.factory.make_bytes('content') * 10
+        requests_made = self.serve(content, failures=[10] * 5)
+        tds = self.TestDiscoveredSource(urls=[])
+        tds.download_retries = 2
+        tds.download_backoff_factor = 0.5
+        sleep = self.patch(finder.time, 'sleep')
+
+        with ExpectedException(
+            exceptions.DownloadError, '.*Failed to download'
+        ):
+            self.download(tds)
+        self.assertEqual(3, len(requests_made))
+        self.assertEqual([mock.call(0.5), mock.call(1.0)], sleep.mock_calls)
+
+    def test_download_file_raises_if_range_request_not_honoured(self):
+        content = self.factory.make_bytes('content') * 10
+        self.serve(content, failures=[10])
+        get = requests.Session.get
+
+        def get_ignoring_ranges(session, url, stream, timeout, headers=None):
+            response = get(session, url, stream, timeout)
+            response.headers['Accept-Ranges'] = 'bytes'
+            return response
+
+        self.patch(requests.Session, 'get', get_ignoring_ranges)
+        tds = self.TestDiscoveredSource(urls=[])
+
+        with ExpectedException(exceptions.DownloadError, '.*may have changed'):
+            self.download(tds)
+
+    def test_download_file_raises_on_http_errors_when_resuming(self):
+        content = self.factory.make_bytes('content') * 10
+        self.serve(content, failures=[10])
+        get = requests.Session.get
+
+        def get_failing_ranges(session, url, stream, timeout, headers=None):
+            response = get(session, url, stream, timeout, headers)
+            if headers is not None:
+                response.status_code = requests.codes.service_unavailable
+            return response
+
+        self.patch(requests.Session, 'get', get_failing_ranges)
+        tds = self.TestDiscoveredSource(urls=[])
+
+        exc = self.assertRaises(exceptions.DownloadError, self.download, tds)
+        self.assertEqual(requests.codes.service_unavailable, exc.status_code)
+
+    def test_download_file_in_segments(self):
+        content = self.factory.make_bytes('content') * 10
+        length = len(content)
+        size = -(-length // 3)
+        # One of the segments' responses is interrupted.
+        requests_made = self.serve(content, failures=[None, None, 3])
+        tds = self.TestDiscoveredSource(urls=[])
+        tds.download_segments = 4
+        tds.download_segment_size = size
+
+        self.assertEqual(content, self.download(tds))
+        self.assertIsNone(requests_made[0])
+        ranges = [headers['Range'] for headers in requests_made[1:]]
+        # Three segments, and the interrupted one resumed.
+        self.assertEqual(4, len(ranges))
+        for segment in (
+            f'bytes=0-{size - 1}',
+            f'bytes={size}-{2 * size - 1}',
+            f'bytes={2 * size}-{length - 1}',
+        ):
+            self.expectThat(ranges, Contains(segment))
+
+    def test_download_file_verifies_digests(self):
+        content = self.factory.make_bytes('content') * 10
+        self.serve(content, failures=[30])
+        tds = self.TestDiscoveredSource(urls=[])
+        tmpdir = self.useFixture(fixtures.TempDir()).path
+        digests = {
+            'sha1': hashlib.sha1(content).hexdigest().upper(),  # noqa: S324
+            'sha512': hashlib.sha512(content).hexdigest(),
+        }
+
+        path = tds.download_file(
+            tmpdir,
+            self.factory.make_string(),
+            self.factory.make_url(),
+            digests,
+        )
+        self.assertEqual(content, path.read_bytes())
+
+    def test_download_file_removes_file_with_mismatched_digest(self):
+        content = self.factory.make_bytes('content')
+        self.serve(content)
+        tds = self.TestDiscoveredSource(urls=[])
+        tmpdir = self.useFixture(fixtures.TempDir()).path
+        name = self.factory.make_string()
+        digests = {'sha256': hashlib.sha256(b'wrong').hexdigest()}
+
+        with ExpectedException(
+            exceptions.DownloadError, f'.*sha256 digest of .*{name}'
+        ):
+            tds.download_file(tmpdir, name, self.factory.make_url(), digests)
+        self.assertEqual([], os.listdir(tmpdir))
+
+    def test_download_file_verifies_known_digests(self):
+        content = self.factory.make_bytes('content')
+        self.serve(content)
+        tds = self.TestDiscoveredSource(urls=[])
+        known_digests = self.patch(tds, 'known_digests')
+        known_digests.return_value = {'sha256': 'wrong'}
+        url = self.factory.make_url()
+        name = self.factory.make_string()
+
+        tmpdir = self.useFixture(fixtures.TempDir()).path
+        with ExpectedException(exceptions.DownloadError, '.*does not match'):
+            tds.download_file(tmpdir, name, url)
+        known_digests.assert_called_once_with(name, url)
+
+    def test_download_file_verifies_digests_when_restarted(self):
+        content = self.factory.make_bytes('content') * 10
+        self.serve(content, ranges=False, failures=[30])
+        tds = self.TestDiscoveredSource(urls=[])
+        self.patch(tds, 'known_digests').return_value = {
+            'sha256': hashlib.sha256(content).hexdigest()
+        }
+
+        self.assertEqual(content, self.download(tds))
+
+    def test_download_file_verifies_digests_in_segments(self):
+        content = self.factory.make_bytes('content') * 10
+        self.serve(content)
+        tds = self.TestDiscoveredSource(urls=[])
+        tds.download_segments = 3
+        tds.download_segment_size = 10
+        known_digests = self.patch(tds, 'known_digests')
+
+        known_digests.return_value = {
+            'sha256': hashlib.sha256(content).hexdigest()
+        }
+        self.assertEqual(content, self.download(tds))
+        known_digests.return_value = {'sha256': 'wrong'}
+        with ExpectedException(exceptions.DownloadError, '.*does not match'):
+            self.download(tds)
+
+    def test_segments(self):
+        tds = self.TestDiscoveredSource(urls=[])
+        tds.download_segments = 3
+        tds.download_segment_size = 10
+        self.expectThat(tds._segments(None), Equals([(0, None)]))
+        self.expectThat(tds._segments(0), Equals([(0, 0)]))
+        self.expectThat(tds._segments(15), Equals([(0, 8), (8, 15)]))
+        self.expectThat(
+            tds._segments(100), Equals([(0, 34), (34, 68), (68, 100)])
+        )
+        tds.download_segments = 1
+        self.expectThat(tds._segments(100), Equals([(0, 100)]))
+
+    def test_range_support(self):
+        response = requests.Response()
+        self.expectThat(finder._range_support(response), Equals((None, None)))
+        response.headers['Accept-Ranges'] = 'bytes'
+        self.expectThat(finder._range_support(response), Equals((None, None)))
+        response.headers['Content-Length'] = 'foo'
+        self.expectThat(finder._range_support(response), Equals((None, None)))
+        response.headers['Content-Length'] = '10'
+        response.headers['Last-Modified'] = 'yesterday'
+        self.expectThat(
+            finder._range_support(response), Equals((10, 'yesterday'))
+        )
+        response.headers['ETag'] = '"v1"'
+        self.expectThat(finder._range_support(response), Equals((10, '"v1"')))
+        # Weak ETags cannot be used in If-Range.
+        response.headers['ETag'] = 'W/"v1"'
+        self.expectThat(
+            finder._range_support(response), Equals((10, 'yesterday'))
+        )
+        del response.headers['Last-Modified']
+        self.expectThat(finder._range_support(response), Equals((None, None)))
+        response.headers['Content-Encoding'] = 'gzip'
+        self.expectThat(finder._range_support(response), Equals((None, None)))
+
+    def make_downloads(self, count, host=None):
+        files = []
+        for _ in range(count):
+            url = self.factory.make_url()
+            if host is not None:
+                url = f"https://{host}/{self.factory.make_string()}"
+            files.append((self.factory.make_string('filename'), url))
+        return files
+
+    def test_download_files_returns_paths_in_order(self):
+        tmpdir = self.useFixture(fixtures.TempDir()).path
+        files = self.make_downloads(5)
+        tds = self.TestDiscoveredSource(urls=[])
+        download_file = self.patch(tds, 'download_file')
+        download_file.side_effect = lambda d, name, url: pathlib.Path(d, name)
+
+        paths = tds.download_files(tmpdir, files)
+
+        self.assertEqual(
+            [pathlib.Path(tmpdir, name) for name, _ in files], paths
+        )
+        self.assertEqual(5, download_file.call_count)
+
+    def test_download_files_downloads_concurrently(self):
+        tmpdir = self.useFixture(fixtures.TempDir()).path
+        files = self.make_downloads(2)
+        # Both downloads must be in flight at once to pass the barrier.
+        barrier = threading.Barrier(2, timeout=5)
+
+        def download(target_dir, name, url):
+            barrier.wait()
+            return name
+
+        tds = self.TestDiscoveredSource(urls=[])
+        paths = tds.download_files(tmpdir, files, download=download)
+        self.assertEqual([name for name, _ in files], paths)
+
+    def test_download_files_limits_downloads_per_host(self):
+        tmpdir = self.useFixture(fixtures.TempDir()).path
+        host = self.factory.make_string('host')
+        files = self.make_downloads(4, host=host)
+        lock = threading.Lock()
+        active = []
+        peak = []
+
+        def download(target_dir, name, url):
+            with lock:
+                active.append(name)
+                peak.append(len(active))
+            # Give any other download a chance to start.
+            time.sleep(0.01)
+            with lock:
+                active.remove(name)
+            return name
+
+        tds = self.TestDiscoveredSource(urls=[])
+        tds.max_downloads_per_host = 1
+        tds.download_files(tmpdir, files, download=download)
+        self.assertEqual([1, 1, 1, 1], peak)
+
+    def test_download_files_raises_first_error_in_order(self):
+        tmpdir = self.useFixture(fixtures.TempDir()).path
+        files = self.make_downloads(3)
+        finished = []
+
+        def download(target_dir, name, url):
+            if name != files[0][0]:
+                finished.append(name)
+                raise exceptions.DownloadError(name)
+            return name
+
+        tds = self.TestDiscoveredSource(urls=[])
+        exc = self.assertRaises(
+            exceptions.DownloadError,
+            tds.download_files,
+            tmpdir,
+            files,
+            download=download,
+        )
+        self.assertEqual(files[1][0], str(exc))
+        # The other downloads still ran to completion.
+        self.assertThat(finished, SameMembers([name for name, _ in files[1:]]))
+
+    def test_download_files_serially(self):
+        tmpdir = self.useFixture(fixtures.TempDir()).path
+        files = self.make_downloads(3)
+        tds = self.TestDiscoveredSource(urls=[])
+        tds.max_download_workers = 1
+        download_file = self.patch(tds, 'download_file')
+        download_file.side_effect = lambda d, name, url: name
+        executor = self.patch(finder, 'ThreadPoolExecutor')
+
+        paths = tds.download_files(tmpdir, files)
+
+        self.assertEqual([name for name, _ in files], paths)
+        executor.assert_not_called()
+
+    def test_download_files_uses_download_cache(self):
+        tmpdir = self.useFixture(fixtures.TempDir()).path
+        [(name, url)] = files = self.make_downloads(1)
+        content = self.factory.make_bytes('content')
+        tds = self.TestDiscoveredSource(urls=[])
+        tds.download_cache = DownloadCache(pathlib.Path(tmpdir, 'cache'))
+
+        def download(target_dir, target_name, url):
+            path = pathlib.Path(target_dir, target_name)
+            path.write_bytes(content)
+            return path
+
+        download_file = self.patch(tds, 'download_file')
+        download_file.side_effect = download
+        first = pathlib.Path(tmpdir, 'first')
+        first.mkdir()
+        [path] = tds.download_files(str(first), files)
+        self.assertEqual(content, path.read_bytes())
+        download_file.assert_called_once_with(str(first), name, url)
+
+        # The second time, the file comes from the cache.
+        second = pathlib.Path(tmpdir, 'second')
+        second.mkdir()
+        [path] = tds.download_files(str(second), files)
+        self.assertEqual(pathlib.Path(second, name), path)
+        self.assertEqual(content, path.read_bytes())
+        download_file.assert_called_once()
+
+    def test_download_files_finds_cached_files_by_known_digests(self):
+        tmpdir = self.useFixture(fixtures.TempDir()).path
+        content = self.factory.make_bytes('content')
+        cache = DownloadCache(pathlib.Path(tmpdir, 'cache'))
+        cached = pathlib.Path(tmpdir, 'cached')
+        cached.write_bytes(content)
+        cache.add(cached, url=self.factory.make_url())
+        tds = self.TestDiscoveredSource(urls=[])
+        tds.download_cache = cache
+        known_digests = self.patch(tds, 'known_digests')
+        known_digests.return_value = {
+            'sha256': hashlib.sha256(content).hexdigest()
+        }
+        download_file = self.patch(tds, 'download_file')
+
+        [(name, url)] = files = self.make_downloads(1)
+        [path] = tds.download_files(tmpdir, files)
+
+        self.assertEqual(content, path.read_bytes())
+        known_digests.assert_called_once_with(name, url)
+        download_file.assert_not_called()
+
+    def test_download_files_ignores_cached_url_with_changed_digests(self):
+        tmpdir = self.useFixture(fixtures.TempDir()).path
+        [(name, url)] = files = self.make_downloads(1)
+        cache = DownloadCache(pathlib.Path(tmpdir, 'cache'))
+        stale = pathlib.Path(tmpdir, 'stale')
+        stale.write_bytes(self.factory.make_bytes('stale'))
+        cache.add(stale, url=url)
+        content = self.factory.make_bytes('content')
+        tds = self.TestDiscoveredSource(urls=[])
+        tds.download_cache = cache
+        known_digests = self.patch(tds, 'known_digests')
+        known_digests.return_value = {
+            'sha256': hashlib.sha256(content).hexdigest()
+        }
+
+        def download(target_dir, target_name, url):
+            path = pathlib.Path(target_dir, target_name)
+            path.write_bytes(content)
+            return path
+
+        download_file = self.patch(tds, 'download_file')
+        download_file.side_effect = download
+        [path] = tds.download_files(tmpdir, files)
+
+        self.assertEqual(content, path.read_bytes())
+        download_file.assert_called_once_with(tmpdir, name, url)
+
+    def test_download_files_does_not_cache_local_files(self):
+        tmpdir = self.useFixture(fixtures.TempDir()).path
+        tds = self.TestDiscoveredSource(urls=[])
+        tds.download_cache = MagicMock()
+        download = MagicMock()
+        url = f"file://{tmpdir}/foo"
+
+        tds.download_files(tmpdir, [('foo', url)], download=download)
+
+        download.assert_called_once_with(tmpdir, 'foo', url)
+        tds.download_cache.copy.assert_not_called()
+        tds.download_cache.add.assert_not_called()
+
+    def test_known_digests_default(self):
+        tds = self.TestDiscoveredSource(urls=[])
+        self.assertEqual(
+            {},
+            tds.known_digests(
+                self.factory.make_string(), self.factory.make_url()
+            ),
+        )
+
     def test_filter_tarinfo(self):
         tarinfo = tarfile.TarInfo()
         tarinfo.uid = tarinfo.gid = self.factory.randint(0, 100)
@@ -253,12 +1046,17 @@ class TestDiscoveredSourceBase(base.TestCase):
         with open(fake_file, 'wb') as fake_file_fd:
             fake_file_fd.write(content)
 
-        # Patch out download_file to return the fake file:
-        ds = URLDiscoveredSource(urls=[self.factory.make_url()])
-        download_file = self.patch(ds, 'download_file')
-        download_file.return_value = pathlib.Path(fake_file)
+        # Patch out the session to return the fake file:
+        url = self.factory.make_url()
+        ds = URLDiscoveredSource(urls=[url])
+        response = requests.Response()
+        response.status_code = requests.codes.ok
+        response.raw = open(fake_file, 'rb')
+        self.addCleanup(response.raw.close)
+        get = self.patch(requests.Session, 'get')
+        get.return_value = response
 
-        # Call make_archive to fetch the fake file:
+        # Call make_archive to stream the fake file:
         _, tar_file_name = tempfile.mkstemp(dir=tmpdir)
         with ds.make_archive() as tarfile_fd:
             with open(tar_file_name, 'wb') as f:
@@ -266,3 +1064,337 @@ class TestDiscoveredSourceBase(base.TestCase):
 
         # Test that the copied file contains the fake downloaded content.
         self.assertThat(tar_file_name, FileContains(content.decode()))
+        get.assert_called_once_with(url, stream=True, timeout=30)
+
+    def test_remote_url_is_archive_resumes_interrupted_download(self):
+        class URLDiscoveredSource(DiscoveredSource):
+            make_archive = DiscoveredSource.remote_url_is_archive
+            populate_archive = lambda: None  # noqa: E731
+            download_backoff_factor = 0
+
+        content = self.factory.make_bytes('content') * 10
+        requests_made = self.serve(content, failures=[30])
+        ds = URLDiscoveredSource(urls=[self.factory.make_url()])
+        with ds.make_archive() as fd:
+            self.assertEqual(content, fd.read())
+        self.assertEqual(2, len(requests_made))
+
+    def test_remote_url_is_archive_streams_without_retries(self):
+        class URLDiscoveredSource(DiscoveredSource):
+            make_archive = DiscoveredSource.remote_url_is_archive
+            populate_archive = lambda: None  # noqa: E731
+            download_retries = 0
+
+        content = self.factory.make_bytes('content')
+        response = requests.Response()
+        response.status_code = requests.codes.ok
+        response.raw = BytesIO(content)
+        self.patch(requests.Session, 'get').return_value = response
+        ds = URLDiscoveredSource(urls=[self.factory.make_url()])
+        download_file = self.patch(ds, 'download_file')
+        with ds.make_archive() as fd:
+            self.assertEqual(content, fd.read())
+        download_file.assert_not_called()
+
+    def test_remote_url_is_archive_raises_download_error_on_read_errors(
+        self,
+    ):
+        class URLDiscoveredSource(DiscoveredSource):
+            make_archive = DiscoveredSource.remote_url_is_archive
+            populate_archive = lambda: None  # noqa: E731
+            download_retries = 0
+
+        response = requests.Response()
+        response.status_code = requests.codes.ok
+        response.raw = MagicMock()
+        response.raw.read.side_effect = urllib3.exceptions.ProtocolError(
+            'Connection broken'
+        )
+        self.patch(requests.Session, 'get').return_value = response
+        ds = URLDiscoveredSource(urls=[self.factory.make_url()])
+        with ds.make_archive() as fd:
+            with ExpectedException(
+                exceptions.DownloadError, '.*Connection broken'
+            ):
+                fd.read()
+
+    def test_remote_url_is_archive_verifies_known_digests(self):
+        class URLDiscoveredSource(DiscoveredSource):
+            make_archive = DiscoveredSource.remote_url_is_archive
+            populate_archive = lambda: None  # noqa: E731
+            download_retries = 0
+
+            def known_digests(self, target_name, url):
+                return {'sha256': hashlib.sha256(b'right').hexdigest()}
+
+        def make_archive(body):
+            response = requests.Response()
+            response.status_code = requests.codes.ok
+            response.raw = BytesIO(body)
+            self.patch(requests.Session, 'get').return_value = response
+            ds = URLDiscoveredSource(urls=[self.factory.make_url()])
+            return ds.make_archive()
+
+        with make_archive(b'right') as fd:
+            self.assertEqual(b'', fd.read(0))
+            self.assertEqual(b'ri', fd.read(2))
+            self.assertEqual(b'ght', fd.read())
+            self.assertEqual(b'', fd.read())
+            self.assertTrue(fd.readable())
+        with make_archive(b'wrong') as fd:
+            self.assertEqual(b'wrong', fd.read(10))
+            with ExpectedException(
+                exceptions.DownloadError, '.*does not match'
+            ):
+                fd.read(10)
+
+    def test_remote_url_is_archive_uses_download_cache(self):
+        class URLDiscoveredSource(DiscoveredSource):
+            make_archive = DiscoveredSource.remote_url_is_archive
+            populate_archive = lambda: None  # noqa: E731
+
+        tmpdir = self.useFixture(fixtures.TempDir()).path
+        content = self.factory.make_bytes('content')
+        url = self.factory.make_url()
+        cache = DownloadCache(pathlib.Path(tmpdir, 'cache'))
+        cached = pathlib.Path(tmpdir, 'cached')
+        cached.write_bytes(content)
+        cache.add(cached, url=url)
+        get = self.patch(requests.Session, 'get')
+
+        ds = URLDiscoveredSource(urls=[url])
+        ds.download_cache = cache
+        with ds.make_archive() as fd:
+            self.assertEqual(content, fd.read())
+        get.assert_not_called()
+
+    def test_remote_url_is_archive_raises_on_http_errors(self):
+        class URLDiscoveredSource(DiscoveredSource):
+            make_archive = DiscoveredSource.remote_url_is_archive
+            populate_archive = lambda: None  # noqa: E731
+
+        response = requests.Response()
+        response.status_code = requests.codes.not_found
+        response.raw = BytesIO(b'')
+        self.patch(requests.Session, 'get').return_value = response
+
+        ds = URLDiscoveredSource(urls=[self.factory.make_url()])
+        with ExpectedException(exceptions.DownloadError):
+            with ds.make_archive():
+                pass  # pragma: no cover
+
+    def test_write_archive_streams_tar_to_fileobj(self):
+        filename = self.factory.make_string('filename')
+        content = self.factory.make_bytes('content')
+        tds = self.TestDiscoveredSource(filename, content, urls=[])
+
+        # A pipe is not seekable, so this also shows that the archive is
+        # written sequentially.
+        read_fd, write_fd = os.pipe()
+        chunks = []
+        with open(read_fd, 'rb') as pipe:
+            reader = threading.Thread(
+                target=lambda: chunks.extend(iter(pipe.read1, b''))
+            )
+            reader.start()
+            with open(write_fd, 'wb') as out:
+                tds.write_archive(out)
+            reader.join()
+
+        with tarfile.open(fileobj=BytesIO(b''.join(chunks))) as tar:
+            self.expectThat(tar.getnames(), SameMembers([filename]))
+            self.expectThat(tar.extractfile(filename).read(), Equals(content))
+        self.assertThat(tds.temp_dir, Not(DirExists()))
+
+    def test_write_archive_copies_overridden_make_archive(self):
+        content = self.factory.make_bytes('content')
+
+        class URLDiscoveredSource(DiscoveredSource):
+            @contextlib.contextmanager
+            def make_archive(self):
+                yield BytesIO(content)
+
+            populate_archive = lambda: None  # noqa: E731
+
+        out = BytesIO()
+        URLDiscoveredSource(urls=[]).write_archive(out)
+        self.assertEqual(content, out.getvalue())
+
+
+class TestArchiveCompression(testscenarios.WithScenarios, base.TestCase):
+    scenarios = [
+        (
+            'none',
+            dict(compression=Compression.none, threads=1, decompress=bytes),
+        ),
+        (
+            'gzip',
+            dict(
+                compression=Compression.gzip,
+                threads=1,
+                decompress=gzip.decompress,
+            ),
+        ),
+        (
+            'xz',
+            dict(
+                compression=Compression.xz,
+                threads=1,
+                decompress=lzma.decompress,
+            ),
+        ),
+        (
+            'xz-threaded',
+            dict(
+                compression=Compression.xz,
+                threads=0,
+                decompress=lzma.decompress,
+            ),
+        ),
+        (
+            'zstd',
+            dict(
+                compression=Compression.zstd,
+                threads=1,
+                decompress=lambda data: (
+                    zstandard.ZstdDecompressor()
+                    .decompressobj()
+                    .decompress(data)
+                ),
+            ),
+        ),
+        (
+            'zstd-threaded',
+            dict(
+                compression=Compression.zstd,
+                threads=0,
+                decompress=lambda data: (
+                    zstandard.ZstdDecompressor()
+                    .decompressobj()
+                    .decompress(data)
+                ),
+            ),
+        ),
+    ]
+
+    def test_open_compressor(self):
+        content = self.factory.make_bytes('content') * 1000
+        out = BytesIO()
+        with open_compressor(out, self.compression, 1, self.threads) as f:
+            f.write(content)
+        self.assertFalse(out.closed)
+        self.assertEqual(content, self.decompress(out.getvalue()))
+
+    def test_write_archive(self):
+        filename = self.factory.make_string('filename')
+        content = self.factory.make_bytes('content')
+        tds = TestDiscoveredSourceBase.TestDiscoveredSource(
+            filename, content, urls=[]
+        )
+        tds.compression = self.compression
+        tds.compression_threads = self.threads
+        out = BytesIO()
+        tds.write_archive(out)
+
+        self.assertEqual(
+            f".tar{self.compression.value}", tds.archive_extension
+        )
+        data = BytesIO(self.decompress(out.getvalue()))
+        with tarfile.open(fileobj=data, mode='r:') as tar:
+            self.expectThat(tar.getnames(), SameMembers([filename]))
+            self.expectThat(tar.extractfile(filename).read(), Equals(content))
+
+
+class TestDiscoveredSourceCompression(base.TestCase):
+    def test_defaults_to_single_threaded_xz_archives(self):
+        tds = TestDiscoveredSourceBase.TestDiscoveredSource(urls=[])
+        self.assertEqual('.tar.xz', tds.archive_extension)
+        self.assertEqual(Compression.xz, tds.compression)
+        self.assertEqual(1, tds.compression_threads)
+
+    def test_archive_extension_may_be_set(self):
+        tds = TestDiscoveredSourceBase.TestDiscoveredSource(urls=[])
+        tds.archive_extension = '.zip'
+        tds.compression = Compression.gzip
+        self.assertEqual('.zip', tds.archive_extension)
+        tds.archive_extension = None
+        self.assertEqual('.tar.gz', tds.archive_extension)
+
+    def test_member_names_are_last_url_segments(self):
+        tds = TestDiscoveredSourceBase.TestDiscoveredSource(
+            urls=['https://example.com/a/foo.tar.gz', 'https://b/foo.dsc']
+        )
+        self.assertEqual(['foo.tar.gz', 'foo.dsc'], tds.member_names())
+
+    def test_recompresses_compressed_members_by_default(self):
+        tds = TestDiscoveredSourceBase.TestDiscoveredSource(
+            urls=['https://example.com/foo.orig.tar.gz']
+        )
+        self.assertEqual(Compression.xz, tds.archive_compression)
+
+    def test_does_not_recompress_compressed_members(self):
+        tds = TestDiscoveredSourceBase.TestDiscoveredSource(
+            urls=[
+                'https://example.com/foo.dsc',
+                'https://example.com/foo.orig.TAR.XZ',
+            ]
+        )
+        tds.recompress = False
+        self.assertEqual(Compression.none, tds.archive_compression)
+        self.assertEqual('.tar', tds.archive_extension)
+
+    def test_compresses_uncompressed_members_without_recompress(self):
+        tds = TestDiscoveredSourceBase.TestDiscoveredSource(
+            urls=['https://example.com/foo.dsc']
+        )
+        tds.recompress = False
+        tds.compression = Compression.gzip
+        self.assertEqual(Compression.gzip, tds.archive_compression)
+        self.assertEqual('.tar.gz', tds.archive_extension)
+
+    def test_write_archive_uses_archive_compression(self):
+        filename = self.factory.make_string('filename')
+        content = self.factory.make_bytes('content')
+        tds = TestDiscoveredSourceBase.TestDiscoveredSource(
+            filename, content, urls=['https://example.com/foo.tgz']
+        )
+        tds.recompress = False
+        out = BytesIO()
+        tds.write_archive(out)
+        out.seek(0)
+        with tarfile.open(fileobj=out, mode='r:') as tar:
+            self.assertEqual([filename], tar.getnames())
+
+    def test_gzip_is_reproducible(self):
+        out = BytesIO()
+        out.name = self.factory.make_string('archive')
+        with open_compressor(out, Compression.gzip) as f:
+            f.write(self.factory.make_bytes('content'))
+        header = out.getvalue()[:10]
+        # No FNAME flag, and a zero MTIME.
+        self.assertEqual(0, header[3])
+        self.assertEqual(b'\0\0\0\0', header[4:8])
+
+    def test_zstd_requires_zstandard(self):
+        self.patch(finder, 'zstandard', None)
+        with ExpectedException(RuntimeError, '.*soufi\\[zstd\\]'):
+            with open_compressor(BytesIO(), Compression.zstd):
+                pass  # pragma: no cover
+
+    def test_threaded_xz_requires_xz_command(self):
+        popen = self.patch(finder.subprocess, 'Popen')
+        popen.side_effect = FileNotFoundError('xz')
+        with ExpectedException(RuntimeError, '.*requires the xz command'):
+            with open_compressor(BytesIO(), Compression.xz, threads=2):
+                pass  # pragma: no cover
+
+    def test_threaded_xz_raises_on_failure(self):
+        popen = finder.subprocess.Popen
+
+        def failing_xz(command, **kwargs):
+            return popen(['sh', '-c', 'cat >/dev/null; exit 1'], **kwargs)
+
+        self.patch(finder.subprocess, 'Popen', failing_xz)
+        with ExpectedException(finder.subprocess.CalledProcessError):
+            with open_compressor(BytesIO(), Compression.xz, threads=2) as f:
+                f.write(b'content')